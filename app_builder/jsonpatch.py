@@ -0,0 +1,134 @@
+"""
+JSON Patch (RFC 6902) over JSON Pointers (RFC 6901), for the schema editor's incremental saves.
+"""
+import copy
+import re
+
+
+class JsonPatchError(ValueError):
+    """A patch that is malformed or does not apply to the document."""
+
+
+OPERATIONS = ('add', 'remove', 'replace', 'move', 'copy', 'test')
+
+# Array indexes are ASCII decimal without leading zeros, str.isdigit() also takes other scripts' digits
+ARRAY_INDEX = re.compile(r'0|[1-9][0-9]*')
+
+
+def parse_pointer(pointer):
+    # '/apps/0/appName' -> ['apps', '0', 'appName'], '' is the whole document
+    if not isinstance(pointer, str) or (pointer and not pointer.startswith('/')):
+        raise JsonPatchError(f'Invalid JSON pointer {pointer!r}')
+    if not pointer:
+        return []
+    return [token.replace('~1', '/').replace('~0', '~') for token in pointer[1:].split('/')]
+
+
+def array_index(array, token, pointer, allow_end=False):
+    # Indexes are decimal without leading zeros, '-' is the end of the array when adding
+    if allow_end and token == '-':
+        return len(array)
+    if not ARRAY_INDEX.fullmatch(token):
+        raise JsonPatchError(f'Invalid array index {token!r} in {pointer}')
+    index = int(token)
+    if index > len(array) or (index == len(array) and not allow_end):
+        raise JsonPatchError(f'Array index {index} out of range in {pointer}')
+    return index
+
+
+def resolve(document, tokens, pointer):
+    for token in tokens:
+        if isinstance(document, dict):
+            if token not in document:
+                raise JsonPatchError(f'No member {token!r} in {pointer}')
+            document = document[token]
+        elif isinstance(document, list):
+            document = document[array_index(document, token, pointer)]
+        else:
+            raise JsonPatchError(f'{pointer} goes through a value that is not an object or array')
+    return document
+
+
+def json_equal(value, other):
+    """
+    Equality of decoded JSON values for the 'test' operation. Unlike ==, types must match at
+    every level: true is not 1, and 1.0 is not 1, as they are written differently in the schema.
+    """
+    if type(value) is not type(other):
+        return False
+    if isinstance(value, dict):
+        return value.keys() == other.keys() and all(json_equal(value[key], other[key]) for key in value)
+    if isinstance(value, list):
+        return len(value) == len(other) and all(json_equal(item, other_item) for item, other_item in zip(value, other))
+    return value == other
+
+
+def validate_patch(operations):
+    """
+    Check the shape of a patch document: a list of operations, each with a known "op",
+    a "path", a "from" for move and copy and a "value" for add, replace and test.
+    """
+    if not isinstance(operations, list):
+        raise JsonPatchError('A JSON Patch is an array of operations')
+    for operation in operations:
+        if not isinstance(operation, dict) or operation.get('op') not in OPERATIONS:
+            raise JsonPatchError(f'Unknown operation {operation!r}')
+        parse_pointer(operation.get('path'))
+        if operation['op'] in ('move', 'copy'):
+            parse_pointer(operation.get('from'))
+        if operation['op'] in ('add', 'replace', 'test') and 'value' not in operation:
+            raise JsonPatchError(f'{operation["op"]} at {operation["path"]} needs a value')
+
+
+def apply_operation(document, operation):
+    # Returns the document, which is replaced as a whole by operations on the root
+    op, pointer = operation['op'], operation['path']
+    tokens = parse_pointer(pointer)
+    if op == 'test':
+        if not json_equal(resolve(document, tokens, pointer), operation['value']):
+            raise JsonPatchError(f'Test failed at {pointer}')
+        return document
+    if op in ('move', 'copy'):
+        source = operation['from']
+        if op == 'move' and (pointer + '/').startswith(source + '/') and pointer != source:
+            raise JsonPatchError(f'Cannot move {source} into its own child {pointer}')
+        value = copy.deepcopy(resolve(document, parse_pointer(source), source))
+        if op == 'move':
+            document = apply_operation(document, {'op': 'remove', 'path': source})
+        return apply_operation(document, {'op': 'add', 'path': pointer, 'value': value})
+    if not tokens:
+        if op == 'remove':
+            raise JsonPatchError('Cannot remove the whole document')
+        return copy.deepcopy(operation['value'])
+    parent = resolve(document, tokens[:-1], pointer)
+    token = tokens[-1]
+    if isinstance(parent, dict):
+        if op in ('remove', 'replace') and token not in parent:
+            raise JsonPatchError(f'No member {token!r} in {pointer}')
+        if op == 'remove':
+            del parent[token]
+        else:
+            parent[token] = copy.deepcopy(operation['value'])
+    elif isinstance(parent, list):
+        index = array_index(parent, token, pointer, allow_end=op == 'add')
+        if op == 'add':
+            parent.insert(index, copy.deepcopy(operation['value']))
+        elif op == 'remove':
+            del parent[index]
+        else:
+            parent[index] = copy.deepcopy(operation['value'])
+    else:
+        raise JsonPatchError(f'{pointer} goes through a value that is not an object or array')
+    return document
+
+
+def apply_patch(document, operations):
+    """
+    Apply a JSON Patch to a document and return the result. Operations apply in order to a
+    copy, so the document is left as it was when any of them fails.
+    """
+    validate_patch(operations)
+    document = copy.deepcopy(document)
+    for operation in operations:
+        document = apply_operation(document, operation)
+    return document
@@ -1,13 +1,117 @@
 from django.core.management import call_command, BaseCommand
+import hashlib
+import importlib.util
 import json
 import os
 from django.conf import settings
 import subprocess
-from .utils import zip_project_folder, update_venv_and_modules, get_requirements
+import sys
+from .utils import ZIP_COMPRESSION, ScaffoldCache, generator_version, zip_project_folder, update_venv_and_modules, get_requirements, schema_project_name, SchemaApps, read_dirty_apps, write_dirty_apps
+
+# Name of the project the startproject boilerplate is rendered for in the scaffold cache
+SCAFFOLD_PROJECT_NAME = 'scaffold_project'
 
 class Command(BaseCommand):
     help = 'Generate Django apps, models, migrations, admin, and DRF views from JSON schema files.'
 
+    # Cache backend ('locmem' or 'file') used for the generated read cache, None disables it
+    cache_backend = None
+    # Serve list endpoints from QuerySet.values() instead of the list serializer
+    fast_list = False
+    # Give every model an auto_now updated_at field and answer conditional GETs from it
+    timestamps = False
+    # Also emit async views (Django async ORM) and an ASGI-first settings layout
+    async_target = False
+    profile = 'dev'
+    # Database engine of the generated settings, 'sqlite' or 'postgresql'
+    database = 'sqlite'
+    # Route the reads of safe requests to a replica database alias
+    replica = False
+    # Compression of the project zip, see utils.zip_project_folder
+    compression = 'deflate'
+    compresslevel = None
+    zip_workers = 1
+    # Files shared by every project, rendered once and linked into each (see utils.ScaffoldCache)
+    scaffold = ScaffoldCache(None, 'off')
+    # Apps of the schema being built, aggregates may refer to models of any of them
+    schema_apps = []
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--cache',
+            nargs='?',
+            const='file',
+            choices=['file', 'redis', 'locmem'],
+            help='Cache list and retrieve responses of the generated viewsets (default backend: file). '
+                 'locmem is per process, gunicorn refuses to start more than one worker with it.',
+        )
+        parser.add_argument(
+            '--fast-list',
+            action='store_true',
+            help='Serve list endpoints straight from QuerySet.values() with precomputed field converters.',
+        )
+        parser.add_argument(
+            '--timestamps',
+            action='store_true',
+            help='Add an updated_at field maintained on every save to the models, and answer list and retrieve '
+                 'requests revalidating their ETag or Last-Modified with 304 Not Modified.',
+        )
+        parser.add_argument(
+            '--async',
+            action='store_true',
+            dest='async_target',
+            help='Generate async list/retrieve/create/update/delete views and serve the project through ASGI.',
+        )
+        parser.add_argument(
+            '--profile',
+            choices=['dev', 'production'],
+            default='dev',
+            help='Settings profile: dev (DEBUG, inline secret) or production (environment-driven secrets, '
+                 'cached templates, compressed responses and static files, persistent connections).',
+        )
+        parser.add_argument(
+            '--database',
+            choices=['sqlite', 'postgresql'],
+            default='sqlite',
+            help='Database of the generated settings. Searchable fields use SQLite FTS5 or a PostgreSQL '
+                 'search vector with a GIN index.',
+        )
+        parser.add_argument(
+            '--replica',
+            action='store_true',
+            help='Add a read replica database alias and a router sending the reads of GET requests to it, '
+                 'with the writing client pinned to the primary for a few seconds.',
+        )
+        parser.add_argument(
+            '--scaffold-cache',
+            choices=['reflink', 'link', 'copy', 'off'],
+            default='reflink',
+            help='Render the files every project shares once into .scaffold/ and clone them into each project '
+                 'where the filesystem supports reflinks, copying them otherwise (reflink, the default), clone or '
+                 'hard-link them (link, projects then share the files with the cache), copy them (copy) or render '
+                 'them into every project (off).',
+        )
+        parser.add_argument(
+            '--compression',
+            choices=list(ZIP_COMPRESSION),
+            default='deflate',
+            help='Compression of the project zip: stored (none), deflate, bzip2 or lzma.',
+        )
+        parser.add_argument(
+            '--compresslevel',
+            type=int,
+            choices=range(10),
+            metavar='0-9',
+            help='Compression level of the project zip, 0-9 for deflate and 1-9 for bzip2 (ignored by stored and lzma).',
+        )
+        parser.add_argument(
+            '--zip-workers',
+            type=int,
+            default=1,
+            help='Threads compressing the files of the project zip at once, 0 for one per CPU. '
+                 'The zip is the same whatever the number of threads.',
+        )
+
     def handle(self, *args, **options):
         """
         Generates the necessary code for a new app based on a given JSON Schema file.
@@ -17,7 +121,44 @@ class Command(BaseCommand):
         - An admin class with list/detail view templates
         - A Django Rest Framework API Viewset with serializer classes for both list and detail views
         - A URL configuration entry pointing at the API Viewset
+        - Optionally (--cache) a response cache for list/retrieve invalidated by model signals
+        - Optionally (--fast-list) a values()-based read path for list endpoints
+        - Optionally (--timestamps) an updated_at field per model and conditional GETs answered with 304
+        - Optionally (--async) async views per model and tests driving them through ASGI
+        - Optionally (--profile production) production settings and precompressed static files
+        - For fields marked "searchable", a full-text index migration and a search endpoint
+        - Optionally (--replica) a primary/replica database router with read-your-writes pinning
+        - For models declaring "aggregates", reverse-relation counts/sums annotated on their querysets
+        - For models declaring "indexes", a database index per declared list of fields
+        - A gunicorn configuration sized from the CPU count, a start script and a server benchmark
+        When the project was built before, it is updated in place: the app files are regenerated and
+        each app with migrations gets one holding only the changes since the previous build's schema.
+        When the schema was only patched since (see views.schema_document), only the apps the patches
+        changed and the apps relating to them are regenerated.
         """
+        self.cache_backend = options.get('cache')
+        self.fast_list = options.get('fast_list', False)
+        self.timestamps = options.get('timestamps', False)
+        self.async_target = options.get('async_target', False)
+        self.profile = options.get('profile') or 'dev'
+        self.database = options.get('database') or 'sqlite'
+        self.replica = options.get('replica', False)
+        self.compression = options.get('compression') or 'deflate'
+        self.compresslevel = options.get('compresslevel')
+        self.zip_workers = options.get('zip_workers', 1)
+        if self.compression == 'bzip2' and self.compresslevel == 0:
+            self.stdout.write(self.style.ERROR('bzip2 compression levels are 1-9'))
+            return
+        if self.zip_workers < 0:
+            self.stdout.write(self.style.ERROR('--zip-workers must be 0 (one per CPU) or more'))
+            return
+        if self.cache_backend == 'locmem' and self.profile == 'production':
+            # Invalidations only reach the worker handling the write, the others serve stale responses
+            self.stdout.write(self.style.ERROR('--cache locmem is per process, production runs several workers: use --cache file or --cache redis'))
+            return
+        self.scaffold = ScaffoldCache(os.path.join(settings.BASE_DIR, '.scaffold', generator_version()), options.get('scaffold_cache') or 'reflink')
+        if self.scaffold.mode != 'off':
+            self.scaffold.prune()
         # Define the path to the schema directory next to manage.py
         schema_directory = os.path.join(settings.BASE_DIR, 'schema')
         # Check if the schema directory exists
@@ -33,41 +174,84 @@ class Command(BaseCommand):
             for schema_file_name in schema_files:
                 schema_file_path = os.path.join(schema_directory, schema_file_name)
 
-                # Load the schema from the JSON file
-                with open(schema_file_path, 'r', encoding='utf-8') as schema_file:
-                    schema = json.load(schema_file)
-                # Extract project name, apps, and other schema data
-                project_name = schema.get('projectName')
-                apps = schema.get('apps', [])
+                # Stream the schema from the JSON file, the generators get one app at a time
+                project_name = schema_project_name(schema_file_path)
+                apps = SchemaApps(schema_file_path)
+                self.schema_apps = apps
                 self.stdout.write(self.style.SUCCESS(f'Project Name (from {schema_file_name}): {project_name}\n'))
-                # Create the Django project
-                if not self.create_django_project(project_name):
-                    continue
-                self.create_authentication_app(project_name)
+                # A project built before is updated in place, from the diff with the schema it was built from
+                snapshot = self.read_schema_snapshot(project_name)
+                if snapshot is None:
+                    # Create the Django project
+                    if not self.create_django_project(project_name):
+                        continue
+                    self.create_authentication_app(project_name)
+                else:
+                    self.stdout.write(self.style.SUCCESS(f'Updating {project_name} from the schema of its previous build'))
+                # Apps changed by patches since the previous build, None rebuilds them all
+                dirty_apps = None
+                if snapshot is not None and snapshot.get('options') == self.build_options():
+                    dirty_apps = read_dirty_apps(schema_file_path)
+                if dirty_apps is not None:
+                    dirty_apps = self.dependent_apps(apps, dirty_apps)
+                    self.stdout.write(self.style.SUCCESS(f"Apps changed since the previous build: {', '.join(sorted(dirty_apps)) or 'none'}"))
+                self.check_aggregates(apps)
+                self.check_indexes(apps)
                 # Create the Django apps within the project
                 app_names = [app.get('appName') for app in apps]
-                if not self.create_apps(project_name, app_names, schema):
+                if not self.create_apps(project_name, apps, dirty_apps):
                     continue
                 self.generate_settings_content(app_names, project_name)
+                self.generate_listing_module(project_name)
+                self.generate_renderers_module(project_name)
+                self.generate_thumbnails_module(project_name)
+                self.generate_fieldsets_module(project_name)
+                self.generate_bulk_module(project_name)
+                self.generate_export_module(project_name)
+                self.generate_instrumentation_module(project_name)
+                self.generate_serializer_benchmark(project_name, apps)
+                self.generate_testing_modules(project_name)
+                self.generate_seed_command(project_name, app_names)
+                self.generate_load_test(project_name, apps)
+                self.generate_server_config(project_name)
+                if self.cache_backend:
+                    self.generate_caching_module(project_name)
+                if self.timestamps:
+                    self.generate_conditional_module(project_name)
+                if self.async_target:
+                    self.generate_async_modules(project_name)
+                if self.replica:
+                    self.generate_replica_modules(project_name)
+                if self.has_aggregates(apps):
+                    self.generate_aggregates_module(project_name)
                 self.index_file_generator(project_name)
+                self.generate_openapi_document(project_name, apps)
+                if self.has_searchable_fields(apps):
+                    self.generate_search_module(project_name)
+                    if snapshot is None:
+                        self.generate_search_migrations(project_name, apps)
+                # Last, collectstatic loads the settings and urls, which import the modules above
+                if self.profile == 'production':
+                    self.generate_storage_module(project_name)
+                    self.collect_static_files(project_name)
+                if snapshot is not None:
+                    self.generate_schema_migrations(project_name, snapshot, apps, dirty_apps)
+                self.write_schema_snapshot(project_name, apps)
+                # The project is built from this version of the schema, no app is dirty anymore
+                write_dirty_apps(schema_file_path, [])
                 
-                command = update_venv_and_modules()
-                self.set_requirements(project_name, command)
+                command = update_venv_and_modules(os.path.join(settings.BASE_DIR, project_name))
+                run_steps = self.run_steps(command, update=snapshot is not None)
+                self.set_requirements(project_name, run_steps)
                 self.stdout.write(self.style.ERROR(f'''
-Project (from {schema_file_name}): {project_name} is built successfully.\n 
+Project (from {schema_file_name}): {project_name} is {'updated' if snapshot is not None else 'built'} successfully.\n 
 Copy following command and Enter in console:\n\t
     cd {settings.BASE_DIR}/{project_name}
-    {command}
-    pip install -r requirements.txt
-    python manage.py makemigrations Authentication
-    python manage.py migrate
-    python manage.py makemigrations
-    python manage.py migrate
-    echo "from django.contrib.auth import get_user_model;User = get_user_model(); User.objects.create_superuser('admin', 'admin@email.com', 'pass')" | python manage.py shell
-    python manage.py runserver
-            '''))
+{run_steps}            '''))
             
-            zip_file_path = zip_project_folder(project_name)
+            if self.scaffold.mode != 'off':
+                self.stdout.write(self.style.SUCCESS(self.scaffold.summary()))
+            zip_file_path = zip_project_folder(project_name, self.compression, self.compresslevel, self.zip_workers)
             if zip_file_path:
                 print(f'Folder "{project_name}" zipped and saved as: {zip_file_path}')
         except json.JSONDecodeError:
@@ -75,14 +259,14 @@ Copy following command and Enter in console:\n\t
         except Exception as e:
             self.stdout.write(self.style.ERROR(f'An error occurred: {str(e)}'))
 
-    def create_apps(self, project_name, app_names, schema):
+    def create_apps(self, project_name, apps, dirty_apps=None):
         """
-        Create Django apps within the project based on the provided app names and schema.
+        Create Django apps within the project based on the provided schema apps.
 
         Args:
         project_name (str): The name of the Django project.
-        app_names (list): A list of app names to create.
-        schema (dict): The JSON schema representing the application's structure.
+        apps (iterable): The apps of the schema, read one at a time.
+        dirty_apps (set): The apps to regenerate when updating the project, None for all of them.
 
         Returns:
         bool: True if all apps were created successfully, False otherwise.
@@ -90,13 +274,14 @@ Copy following command and Enter in console:\n\t
         try:
             project_directory = os.path.join(settings.BASE_DIR, project_name)
 
-            for app_name in app_names:
+            for app_schema in apps:
+                app_name = app_schema.get('appName')
+                # The files of an unchanged app are what this build would generate again
+                if dirty_apps is not None and app_name not in dirty_apps and os.path.exists(os.path.join(project_directory, app_name)):
+                    continue
                 if not self.create_app(project_name, app_name):
                     continue
 
-                # Fetch the app schema based on app_name from the schema dictionary
-                app_schema = next((app for app in schema.get("apps", []) if app.get("appName") == app_name), None)
-
                 # After creating the app, create models for the app based on the schema
                 if app_schema:
                     self.create_models_for_app(project_name, app_name, app_schema)
@@ -104,7 +289,11 @@ Copy following command and Enter in console:\n\t
                     self.generate_and_save_admin_code_for_app(project_name, app_name, app_schema)
                     self.generate_and_save_viewsets_code_for_app(project_name, app_name, app_schema)
                     self.generate_and_save_urls_code_for_app(project_name, app_name, app_schema)
-                    
+                    if self.cache_backend or self.timestamps:
+                        self.generate_and_save_signals_code_for_app(project_name, app_name, app_schema)
+                    if self.async_target:
+                        self.generate_and_save_async_views_code_for_app(project_name, app_name, app_schema)
+                    self.generate_and_save_tests_code_for_app(project_name, app_name, app_schema)
 
             return True
         except Exception as e:
@@ -125,6 +314,10 @@ Copy following command and Enter in console:\n\t
         try:
             project_directory = os.path.join(settings.BASE_DIR, project_name)
 
+            # An update keeps the apps of the previous build, their files are regenerated
+            if os.path.exists(os.path.join(project_directory, app_name, 'apps.py')):
+                return True
+
             # Create the app within the project directory
             subprocess.run(['python', 'manage.py', 'startapp', app_name], check=True, cwd=project_directory)
 
@@ -146,8 +339,16 @@ Copy following command and Enter in console:\n\t
         bool: True if the project was created successfully, False otherwise.
         """
         try:
-            # Create the Django project one level above the current project directory
-            subprocess.run(['django-admin', 'startproject', project_name, '--extension=py,yml'], check=True)
+            # The names startproject accepts: an identifier that is not an importable module
+            if not project_name.isidentifier() or importlib.util.find_spec(project_name) is not None:
+                raise ValueError(f"'{project_name}' is not a valid project name, use an identifier that is not the name of a Python module")
+            project_directory = os.path.join(settings.BASE_DIR, project_name)
+            if os.path.exists(project_directory):
+                raise ValueError(f"'{project_directory}' already exists")
+            # The boilerplate of startproject is rendered once (for every project with --scaffold-cache off),
+            # the placeholder name is replaced by the project's
+            self.scaffold.write_folder('startproject', project_directory, self.render_django_project,
+                                       {SCAFFOLD_PROJECT_NAME: project_name})
 
             self.stdout.write(self.style.SUCCESS(f'Project Created: {project_name}'))
             return True
@@ -155,6 +356,16 @@ Copy following command and Enter in console:\n\t
             self.stdout.write(self.style.ERROR(f"An error occurred while creating project {project_name}: {str(e)}"))
             return False
 
+    def render_django_project(self, folder):
+        """
+        Render the startproject boilerplate into folder, for the project SCAFFOLD_PROJECT_NAME.
+
+        :param folder: The folder of the project
+        :return: None
+        """
+        os.makedirs(folder, exist_ok=True)
+        subprocess.run(['django-admin', 'startproject', SCAFFOLD_PROJECT_NAME, folder, '--extension=py,yml'], check=True)
+
     def create_models_for_app(self, project_name, app_name, app_schema):
         """
         Create Django models for an app based on the provided schema.
@@ -167,6 +378,7 @@ Copy following command and Enter in console:\n\t
         Returns:
         bool: True if models were created successfully, False otherwise.
         """
+        from .utils import UNQUOTED_ATTRIBUTES, resolve_indexes
         try:
             # Create a directory for the models
             models_dir = os.path.join(settings.BASE_DIR, project_name, app_name)
@@ -176,7 +388,13 @@ Copy following command and Enter in console:\n\t
             models_py_path = os.path.join(models_dir, 'models.py')
 
             models_code = f"# Models for {app_name} app\n\n"
-            models_code += f"from django.db import models\n\n"
+            models_code += f"from django.db import models\n"
+            # PostgreSQL full-text search stores a search vector per row, indexed with GIN
+            vector_search = self.database == 'postgresql' and self.has_searchable_fields([app_schema])
+            if vector_search:
+                models_code += f"from django.contrib.postgres.indexes import GinIndex\n"
+                models_code += f"from django.contrib.postgres.search import SearchVectorField\n"
+            models_code += "\n"
 
             # Iterate through models in the app's schema
             for model_schema in app_schema.get('models', []):
@@ -193,13 +411,27 @@ Copy following command and Enter in console:\n\t
                     valid_attributes = {key: value for key, value in attributes.items() if value and key != 'undefined'}
 
                     # Prepare a list of attributes in string format
-                    attr_list = [f'{key}="{value}"' if key not in [ 'max_length','on_delete'] else f'{key}={value}' for key, value in valid_attributes.items()]
+                    attr_list = [f'{key}="{value}"' if key not in UNQUOTED_ATTRIBUTES else f'{key}={value}' for key, value in valid_attributes.items()]
 
                     # Join the attributes into a single string
                     attr_str = ', '.join(attr_list)
 
                     models_code += f"    {field_name} = models.{field_type}({attr_str})\n"
                     # models_code += "\n"  # Add newline after each field definition
+                if self.timestamp_field(model_schema):
+                    models_code += f"    updated_at = models.DateTimeField(auto_now=True, db_index=True)\n"
+
+                indexes = [
+                    f"models.Index(fields={index['fields']!r}, name='{index['name']}')"
+                    for index in resolve_indexes(app_name, model_schema)[0]
+                ]
+                if vector_search and self.searchable_fields(model_schema):
+                    models_code += f"    # Filled by a database trigger, see the search migration\n"
+                    models_code += f"    search_vector = SearchVectorField(null=True, editable=False)\n"
+                    indexes.append(f"GinIndex(fields=['search_vector'], name='{self.search_index_name(app_name, model_name)}')")
+                if indexes:
+                    models_code += f"\n    class Meta:\n"
+                    models_code += f"        indexes = [{', '.join(indexes)}]\n"
 
                 models_code += '\n'
 
@@ -232,18 +464,48 @@ Copy following command and Enter in console:\n\t
             # Create serializers.py file and write the serializers code
             serializers_py_path = os.path.join(serializers_dir, 'serializers.py')
 
+            from .utils import aggregate_serializer_field
             serializers_code = f"# Serializers for {app_name} app\n\n"
-            serializers_code += f"from rest_framework import serializers\n\n"
-            
+            serializers_code += f"from rest_framework import serializers\n"
+            serializers_code += f"from {project_name}.fieldsets import DynamicFieldsMixin\n"
+            if self.has_image_fields([app_schema]):
+                serializers_code += f"from {project_name}.thumbnails import ThumbnailURLField\n"
+            serializers_code += "\n"
+
             # Iterate through models in the app's schema
             for model_schema in app_schema.get('models', []):
                 model_name = model_schema.get('modelName', 'DefaultModel')
                 serializer_code = f"from .models import {model_name}\n"
+                # Aggregates are queryset annotations, rendered by read-only fields
+                aggregates = self.model_aggregates(app_name, model_schema)
+                aggregate_fields = ''.join(
+                    f"    {aggregate['name']} = {aggregate_serializer_field(aggregate)}\n" for aggregate in aggregates
+                )
+                # Images are rendered with links to their thumbnail next to the original
+                image_fields = self.image_fields(model_schema)
+                aggregate_fields += ''.join(
+                    f"    {field_name}_thumbnail = ThumbnailURLField(source='{field_name}')\n" for field_name in image_fields
+                )
                 # Create a serializer for the model
-                serializer_code += f"class {model_name}Serializer(serializers.ModelSerializer):\n"
+                serializer_code += f"class {model_name}Serializer(DynamicFieldsMixin, serializers.ModelSerializer):\n"
+                serializer_code += aggregate_fields
+                serializer_code += f"    class Meta:\n"
+                serializer_code += f"        model = {model_name}\n"
+                if self.database == 'postgresql' and self.searchable_fields(model_schema):
+                    serializer_code += f"        exclude = ['search_vector']\n\n"
+                else:
+                    serializer_code += f"        fields = '__all__'\n\n"
+                # Lean serializer for list responses: explicit fields, no many-to-many lookups
+                list_fields = ['id'] + [field['fieldName'] for field in model_schema.get('fields', []) if field['fieldType'] != 'ManyToManyField']
+                if self.timestamp_field(model_schema):
+                    list_fields.append('updated_at')
+                list_fields += [aggregate['name'] for aggregate in aggregates]
+                list_fields += [f'{field_name}_thumbnail' for field_name in image_fields]
+                serializer_code += f"class {model_name}ListSerializer(DynamicFieldsMixin, serializers.ModelSerializer):\n"
+                serializer_code += aggregate_fields
                 serializer_code += f"    class Meta:\n"
                 serializer_code += f"        model = {model_name}\n"
-                serializer_code += f"        fields = '__all__'\n"
+                serializer_code += f"        fields = {list_fields}\n"
                 
                 serializers_code += serializer_code
                 serializers_code += "\n"  # Add newline after each serializer definition
@@ -279,6 +541,10 @@ Copy following command and Enter in console:\n\t
 
             admin_code = f"# Admin for {app_name} app\n\n"
             admin_code += f"from django.contrib import admin\n"
+            if self.has_searchable_fields([app_schema]):
+                admin_code += f"from {project_name}.search import FullTextSearchAdminMixin\n"
+            if self.has_image_fields([app_schema]):
+                admin_code += f"from {project_name}.thumbnails import thumbnail_tag\n"
 
             # Iterate through models in the app's schema
             for model_schema in app_schema.get('models', []):
@@ -288,13 +554,29 @@ Copy following command and Enter in console:\n\t
                 # Exclude fields with ManyToManyField attribute
                 list_display = [field['fieldName'] for field in fields if field['fieldType'] != 'ManyToManyField']
                 search_fields = list_display
+                # Join the related rows shown in the changelist instead of querying them row by row
+                list_select_related = [field['fieldName'] for field in fields if field['fieldType'] in ('ForeignKey', 'OneToOneField')]
+                # The changelist shows the thumbnails of images rather than their paths
+                image_fields = self.image_fields(model_schema)
+                # Searchable models search through the full-text index
+                admin_bases = 'admin.ModelAdmin'
+                if self.searchable_fields(model_schema):
+                    search_fields = self.searchable_fields(model_schema)
+                    admin_bases = 'FullTextSearchAdminMixin, admin.ModelAdmin'
 
                 # Generate code for the model's admin class using the @admin.register decorator
                 admin_code += f'from {app_name}.models import {model_name}\n\n'
                 admin_code += f'@admin.register({model_name})\n'
-                admin_code += f'class {model_name}Admin(admin.ModelAdmin):\n'
-                admin_code += f'    list_display = {list_display}\n'
-                admin_code += f'    search_fields = {search_fields}\n\n\n'
+                admin_code += f'class {model_name}Admin({admin_bases}):\n'
+                admin_code += f'    list_display = {[f"{name}_thumbnail" if name in image_fields else name for name in list_display]}\n'
+                admin_code += f'    search_fields = {search_fields}\n'
+                if list_select_related:
+                    admin_code += f'    list_select_related = {list_select_related}\n'
+                for field_name in image_fields:
+                    admin_code += f'\n    @admin.display(description={field_name!r})\n'
+                    admin_code += f'    def {field_name}_thumbnail(self, obj):\n'
+                    admin_code += f'        return thumbnail_tag(obj.{field_name}) if obj.{field_name} else None\n'
+                admin_code += '\n\n'
 
             with open(admin_py_path, 'w') as admin_file:
                 admin_file.write(admin_code)
@@ -328,17 +610,53 @@ Copy following command and Enter in console:\n\t
 
             views_code = f"# Views for {app_name} app\n\n"
             views_code += f"from rest_framework import viewsets\n"
-            
+            if self.timestamps:
+                views_code += f"from {project_name}.conditional import ConditionalMixin\n"
+            if self.cache_backend:
+                views_code += f"from {project_name}.caching import CachedReadMixin\n"
+            if self.fast_list:
+                views_code += f"from {project_name}.listing import ListSerializerMixin, ValuesListMixin\n"
+            else:
+                views_code += f"from {project_name}.listing import ListSerializerMixin\n"
+            views_code += f"from {project_name}.fieldsets import SparseFieldsMixin\n"
+            views_code += f"from {project_name}.bulk import BulkMixin\n"
+            views_code += f"from {project_name}.export import ExportMixin\n"
+            if self.has_searchable_fields([app_schema]):
+                views_code += f"from {project_name}.search import SearchMixin\n"
+            if self.has_aggregates([app_schema]):
+                views_code += f"from {project_name}.aggregates import AggregatesMixin, reverse_aggregate\n"
+
+            # Mixins are listed before ModelViewSet so their list/retrieve wrap the default ones
+            bases = []
+            if self.timestamps:
+                # First, so unchanged responses are answered before the cache or the rows are read
+                bases.append('ConditionalMixin')
+            if self.cache_backend:
+                bases.append('CachedReadMixin')
+            if self.fast_list:
+                bases.append('ValuesListMixin')
+            bases += ['SparseFieldsMixin', 'ListSerializerMixin', 'BulkMixin', 'ExportMixin', 'viewsets.ModelViewSet']
+
             # Iterate through models in the app's schema
             for model_schema in app_schema.get('models', []):
                 model_name = model_schema.get('modelName', 'DefaultModel')
 
                 # Generate code for the viewset class
                 views_code += f"from .models import {model_name}\n"
-                views_code += f"from .serializers import {model_name}Serializer\n\n"
-                views_code += f"class {model_name}ViewSet(viewsets.ModelViewSet):\n"
+                views_code += f"from .serializers import {model_name}Serializer, {model_name}ListSerializer\n\n"
+                model_bases = bases
+                if self.searchable_fields(model_schema):
+                    model_bases = bases[:-1] + ['SearchMixin'] + bases[-1:]
+                aggregates = self.model_aggregates(app_name, model_schema)
+                if aggregates:
+                    sparse_index = model_bases.index('SparseFieldsMixin')
+                    model_bases = model_bases[:sparse_index] + ['AggregatesMixin'] + model_bases[sparse_index:]
+                views_code += f"class {model_name}ViewSet({', '.join(model_bases)}):\n"
                 views_code += f"    queryset = {model_name}.objects.all()\n"
                 views_code += f"    serializer_class = {model_name}Serializer\n"
+                views_code += f"    list_serializer_class = {model_name}ListSerializer\n"
+                views_code += self.aggregates_code(aggregates)
+                views_code += "\n"
 
             with open(views_py_path, 'w') as views_file:
                 views_file.write(views_code)
@@ -349,6 +667,22 @@ Copy following command and Enter in console:\n\t
             self.stdout.write(self.style.ERROR(f"An error occurred while generating and saving viewsets for app {app_name}: {str(e)}"))
             return False
 
+    def router_routes(self, app_schema):
+        """
+        The router registrations of an app: one (model name, URL prefix) pair per model.
+
+        Args:
+        app_schema (dict): The schema for the app.
+
+        Returns:
+        list: (model_name, prefix) tuples, in schema order.
+        """
+        routes = []
+        for model_schema in app_schema.get('models', []):
+            model_name = model_schema.get('modelName', 'DefaultModel')
+            routes.append((model_name, f"{model_name.lower()}s"))
+        return routes
+
     def generate_and_save_urls_code_for_app(self, project_name, app_name, app_schema):
         """
         Generate and save URL patterns code for an app.
@@ -374,15 +708,19 @@ Copy following command and Enter in console:\n\t
             urls_code += f'from rest_framework.routers import DefaultRouter\n'
             urls_code += f"router = DefaultRouter()\n\n"
             urls_code += f"from rest_framework.routers import DefaultRouter\n\n"
-            # Iterate through models in the app's schema
-            for model_schema in app_schema.get('models', []):
-                model_name = model_schema.get('modelName', 'DefaultModel')
-
+            async_patterns = ''
+            # Iterate through the routes of the app's models
+            for model_name, prefix in self.router_routes(app_schema):
                 # Generate code for the model's URL patterns
                 urls_code += f"from .views import {model_name}ViewSet\n"
-                urls_code += f"router.register(r'{model_name.lower()}s', {model_name}ViewSet)\n\n"
+                urls_code += f"router.register(r'{prefix}', {model_name}ViewSet)\n\n"
+                if self.async_target:
+                    urls_code += f"from .async_views import {model_name}CollectionView, {model_name}ItemView\n\n"
+                    async_patterns += f"    path('async/{prefix}/', {model_name}CollectionView.as_view()),\n"
+                    async_patterns += f"    path('async/{prefix}/<int:pk>/', {model_name}ItemView.as_view()),\n"
 
             urls_code += f"urlpatterns = [\n"
+            urls_code += async_patterns
             urls_code += f"    path('', include(router.urls)),\n"
             urls_code += f"]\n"
 
@@ -395,6 +733,882 @@ Copy following command and Enter in console:\n\t
             self.stdout.write(self.style.ERROR(f"An error occurred while generating and saving URL patterns for app {app_name}: {str(e)}"))
             return False
 
+    def generate_and_save_signals_code_for_app(self, project_name, app_name, app_schema):
+        """
+        Generate and save signal handlers that invalidate cached responses when models of an app change.
+
+        With a cache backend, every model gets post_save/post_delete handlers and every
+        ManyToManyField gets an m2m_changed handler, all of which bump the model's cache version.
+        With --timestamps, the m2m_changed handlers also touch the updated_at field of the rows
+        whose links changed, which saving the links alone leaves as it was. The app's apps.py
+        is rewritten so the handlers are connected when the app is ready.
+
+        Args:
+        project_name (str): The name of the Django project.
+        app_name (str): The name of the app.
+        app_schema (dict): The schema for the app.
+
+        Returns:
+        bool: True if signals code was generated and saved successfully, False otherwise.
+        """
+        try:
+            app_dir = os.path.join(settings.BASE_DIR, project_name, app_name)
+            os.makedirs(app_dir, exist_ok=True)
+
+            handlers_code = ""
+            # Iterate through models in the app's schema
+            for model_schema in app_schema.get('models', []):
+                model_name = model_schema.get('modelName', 'DefaultModel')
+                fields = model_schema.get('fields', [])
+
+                model_code = ""
+                if self.cache_backend:
+                    model_code += f"@receiver(post_save, sender={model_name})\n"
+                    model_code += f"@receiver(post_delete, sender={model_name})\n"
+                    model_code += f"def {model_name.lower()}_changed(sender, **kwargs):\n"
+                    model_code += f"    bump_model_version(sender)\n\n"
+
+                for field in fields:
+                    if field.get('fieldType') != 'ManyToManyField':
+                        continue
+                    field_name = field.get('fieldName')
+                    model_code += f"@receiver(m2m_changed, sender={model_name}.{field_name}.through)\n"
+                    model_code += f"def {model_name.lower()}_{field_name}_changed(sender, instance, action, reverse, model, pk_set, **kwargs):\n"
+                    if self.timestamps:
+                        # Before a clear, the rows losing their links can still be found
+                        model_code += f"    if action in ('post_add', 'post_remove', 'pre_clear'):\n"
+                        model_code += f"        touch_many_to_many({model_name}, '{field_name}', instance, reverse, pk_set)\n"
+                    if self.cache_backend:
+                        # Both sides of the relation serialize the link, so both versions are bumped
+                        model_code += f"    if action in ('post_add', 'post_remove', 'post_clear'):\n"
+                        model_code += f"        bump_model_version(instance.__class__)\n"
+                        model_code += f"        bump_model_version(model)\n"
+                    model_code += "\n"
+
+                # Models without handlers are not imported
+                if model_code:
+                    handlers_code += f"from .models import {model_name}\n\n" + model_code
+
+            # Only the signals and helpers the handlers above use are imported
+            signal_names = [name for name in ('m2m_changed', 'post_delete', 'post_save') if f'@receiver({name},' in handlers_code]
+            signals_code = f"# Signals for {app_name} app\n\n"
+            if signal_names:
+                signals_code += f"from django.db.models.signals import {', '.join(signal_names)}\n"
+                signals_code += f"from django.dispatch import receiver\n\n"
+            if 'bump_model_version(' in handlers_code:
+                signals_code += f"from {project_name}.caching import bump_model_version\n"
+            if 'touch_many_to_many(' in handlers_code:
+                signals_code += f"from {project_name}.conditional import touch_many_to_many\n"
+            signals_code += handlers_code
+
+            with open(os.path.join(app_dir, 'signals.py'), 'w') as signals_file:
+                signals_file.write(signals_code)
+
+            # Connect the handlers once the app registry is ready
+            apps_code = f"from django.apps import AppConfig\n\n\n"
+            # Same config class name startapp would have generated
+            config_name = ''.join(x for x in app_name.title() if x != '_')
+            apps_code += f"class {config_name}Config(AppConfig):\n"
+            apps_code += f"    default_auto_field = 'django.db.models.BigAutoField'\n"
+            apps_code += f"    name = '{app_name}'\n\n"
+            apps_code += f"    def ready(self):\n"
+            apps_code += f"        from . import signals  # noqa: F401\n"
+
+            with open(os.path.join(app_dir, 'apps.py'), 'w') as apps_file:
+                apps_file.write(apps_code)
+
+            self.stdout.write(self.style.SUCCESS(f'Signals for app "{app_name}" have been generated and saved.'))
+
+        except Exception as e:
+            self.stdout.write(self.style.ERROR(f"An error occurred while generating and saving signals for app {app_name}: {str(e)}"))
+            return False
+
+    def generate_caching_module(self, project_name):
+        """
+        Generate the caching.py module inside the project package.
+
+        :param project_name: The name of the Django project
+        :return: None
+        """
+        from .utils import caching_content
+        caching_file_path = os.path.join(settings.BASE_DIR, project_name, project_name, 'caching.py')
+        self.scaffold.write_file('caching.py', caching_file_path, caching_content)
+        self.stdout.write(self.style.SUCCESS("caching.py file has been generated successfully."))
+
+    def generate_conditional_module(self, project_name):
+        """
+        Generate the conditional.py module (ETag/Last-Modified validators) inside the project package.
+
+        :param project_name: The name of the Django project
+        :return: None
+        """
+        from .utils import conditional_content
+        conditional_file_path = os.path.join(settings.BASE_DIR, project_name, project_name, 'conditional.py')
+        with open(conditional_file_path, 'w') as conditional_file:
+            conditional_file.write(conditional_content(project_name))
+        self.stdout.write(self.style.SUCCESS("conditional.py file has been generated successfully."))
+
+    def generate_and_save_async_views_code_for_app(self, project_name, app_name, app_schema):
+        """
+        Generate and save async views (collection and item view per model) for an app.
+
+        Args:
+        project_name (str): The name of the Django project.
+        app_name (str): The name of the app.
+        app_schema (dict): The schema for the app.
+
+        Returns:
+        bool: True if async views code was generated and saved successfully, False otherwise.
+        """
+        try:
+            views_dir = os.path.join(settings.BASE_DIR, project_name, app_name)
+            os.makedirs(views_dir, exist_ok=True)
+
+            views_code = f"# Async views for {app_name} app\n\n"
+            views_code += f"from {project_name}.asyncapi import AsyncCollectionView, AsyncItemView\n"
+            if self.has_aggregates([app_schema]):
+                views_code += f"from {project_name}.aggregates import reverse_aggregate\n"
+
+            # Iterate through models in the app's schema
+            for model_schema in app_schema.get('models', []):
+                model_name = model_schema.get('modelName', 'DefaultModel')
+
+                views_code += f"from .models import {model_name}\n"
+                views_code += f"from .serializers import {model_name}Serializer, {model_name}ListSerializer\n\n"
+                aggregates_code = self.aggregates_code(self.model_aggregates(app_name, model_schema))
+                views_code += f"class {model_name}CollectionView(AsyncCollectionView):\n"
+                views_code += f"    model = {model_name}\n"
+                views_code += f"    serializer_class = {model_name}Serializer\n"
+                views_code += f"    list_serializer_class = {model_name}ListSerializer\n"
+                views_code += aggregates_code + "\n"
+                views_code += f"class {model_name}ItemView(AsyncItemView):\n"
+                views_code += f"    model = {model_name}\n"
+                views_code += f"    serializer_class = {model_name}Serializer\n"
+                views_code += aggregates_code + "\n"
+
+            with open(os.path.join(views_dir, 'async_views.py'), 'w') as views_file:
+                views_file.write(views_code)
+
+            self.stdout.write(self.style.SUCCESS(f'Async views for app "{app_name}" have been generated and saved.'))
+
+        except Exception as e:
+            self.stdout.write(self.style.ERROR(f"An error occurred while generating and saving async views for app {app_name}: {str(e)}"))
+            return False
+
+    def generate_and_save_tests_code_for_app(self, project_name, app_name, app_schema):
+        """
+        Generate and save tests.py for an app, replacing the empty one created by startapp.
+
+        Args:
+        project_name (str): The name of the Django project.
+        app_name (str): The name of the app.
+        app_schema (dict): The schema for the app.
+
+        Returns:
+        bool: True if tests code was generated and saved successfully, False otherwise.
+        """
+        try:
+            tests_dir = os.path.join(settings.BASE_DIR, project_name, app_name)
+            os.makedirs(tests_dir, exist_ok=True)
+
+            tests_code = f"# Tests for {app_name} app\n\n"
+            mixins = ['QueryCountTestMixin']
+            if self.async_target:
+                mixins.insert(0, 'AsyncViewTestMixin')
+                tests_code += f"from django.test import TestCase, TransactionTestCase\n\n"
+            else:
+                tests_code += f"from django.test import TestCase\n\n"
+            if any(self.search_test_field(model_schema) for model_schema in app_schema.get('models', [])):
+                mixins.append('SearchTestMixin')
+            if self.replica:
+                mixins.append('ReplicaRoutingTestMixin')
+            if self.has_aggregates([app_schema]):
+                mixins.append('AggregateTestMixin')
+            if self.timestamps:
+                mixins.append('ConditionalGetTestMixin')
+            if self.has_image_fields([app_schema]):
+                mixins.append('ThumbnailTestMixin')
+            tests_code += f"from {project_name}.testing import {', '.join(mixins)}\n"
+
+            # Iterate through models in the app's schema
+            for model_schema in app_schema.get('models', []):
+                model_name = model_schema.get('modelName', 'DefaultModel')
+
+                tests_code += f"from .models import {model_name}\n\n"
+                tests_code += f"class {model_name}QueryCountTests(QueryCountTestMixin, TestCase):\n"
+                tests_code += f"    model = {model_name}\n"
+                tests_code += f"    url = '/{app_name}/{model_name.lower()}s/'\n\n"
+                search_field = self.search_test_field(model_schema)
+                if search_field:
+                    tests_code += f"class {model_name}SearchTests(SearchTestMixin, TestCase):\n"
+                    tests_code += f"    model = {model_name}\n"
+                    tests_code += f"    url = '/{app_name}/{model_name.lower()}s/'\n"
+                    tests_code += f"    search_field = '{search_field}'\n\n"
+                aggregates = self.model_aggregates(app_name, model_schema)
+                if aggregates:
+                    tests_code += f"class {model_name}AggregateTests(AggregateTestMixin, TestCase):\n"
+                    tests_code += f"    model = {model_name}\n"
+                    tests_code += f"    url = '/{app_name}/{model_name.lower()}s/'\n"
+                    tests_code += f"    aggregates = {{\n"
+                    for aggregate in aggregates:
+                        spec = (aggregate['model'], aggregate['relation'], aggregate['function'], aggregate['field'])
+                        tests_code += f"        '{aggregate['name']}': {spec!r},\n"
+                    tests_code += f"    }}\n\n"
+                image_fields = self.image_fields(model_schema)
+                if image_fields:
+                    tests_code += f"class {model_name}ThumbnailTests(ThumbnailTestMixin, TestCase):\n"
+                    tests_code += f"    model = {model_name}\n"
+                    tests_code += f"    url = '/{app_name}/{model_name.lower()}s/'\n"
+                    tests_code += f"    image_field = '{image_fields[0]}'\n\n"
+                if self.timestamps and not aggregates:
+                    tests_code += f"class {model_name}ConditionalGetTests(ConditionalGetTestMixin, TestCase):\n"
+                    tests_code += f"    model = {model_name}\n"
+                    tests_code += f"    url = '/{app_name}/{model_name.lower()}s/'\n\n"
+                if self.replica:
+                    tests_code += f"class {model_name}ReplicaRoutingTests(ReplicaRoutingTestMixin, TestCase):\n"
+                    tests_code += f"    model = {model_name}\n"
+                    tests_code += f"    url = '/{app_name}/{model_name.lower()}s/'\n\n"
+                if self.async_target:
+                    # Requests run in other threads through the ASGI application, so rows must be committed
+                    tests_code += f"class {model_name}AsyncViewTests(AsyncViewTestMixin, TransactionTestCase):\n"
+                    tests_code += f"    model = {model_name}\n"
+                    tests_code += f"    url = '/{app_name}/async/{model_name.lower()}s/'\n\n"
+
+            with open(os.path.join(tests_dir, 'tests.py'), 'w') as tests_file:
+                tests_file.write(tests_code)
+
+            self.stdout.write(self.style.SUCCESS(f'Tests for app "{app_name}" have been generated and saved.'))
+
+        except Exception as e:
+            self.stdout.write(self.style.ERROR(f"An error occurred while generating and saving tests for app {app_name}: {str(e)}"))
+            return False
+
+    def generate_async_modules(self, project_name):
+        """
+        Generate the asyncapi.py module (async views) inside the project package.
+
+        :param project_name: The name of the Django project
+        :return: None
+        """
+        from .utils import asyncapi_content
+        asyncapi_file_path = os.path.join(settings.BASE_DIR, project_name, project_name, 'asyncapi.py')
+        with open(asyncapi_file_path, 'w') as asyncapi_file:
+            asyncapi_file.write(asyncapi_content(project_name))
+        self.stdout.write(self.style.SUCCESS("asyncapi.py file has been generated successfully."))
+
+    def generate_testing_modules(self, project_name):
+        """
+        Generate the factories.py (test data) and testing.py (query count and in-process
+        ASGI test helpers) modules used by the generated tests inside the project package.
+
+        :param project_name: The name of the Django project
+        :return: None
+        """
+        from .utils import factories_content, testing_content
+        package_folder = os.path.join(settings.BASE_DIR, project_name, project_name)
+        self.scaffold.write_file('factories.py', os.path.join(package_folder, 'factories.py'), factories_content)
+        with open(os.path.join(package_folder, 'testing.py'), 'w') as module_file:
+            module_file.write(testing_content(project_name, replica=self.replica, timestamps=self.timestamps))
+        self.stdout.write(self.style.SUCCESS("factories.py and testing.py files have been generated successfully."))
+
+    def generate_seed_command(self, project_name, app_names):
+        """
+        Generate the seed management command (Authentication/management/commands/seed.py)
+        that fills the models of the given apps with fake rows.
+
+        :param project_name: The name of the Django project
+        :param app_names: The apps whose models are seeded
+        :return: None
+        """
+        from .utils import seed_command_content
+        management_folder = os.path.join(settings.BASE_DIR, project_name, 'Authentication', 'management')
+        commands_folder = os.path.join(management_folder, 'commands')
+        os.makedirs(commands_folder, exist_ok=True)
+        for package_folder in (management_folder, commands_folder):
+            open(os.path.join(package_folder, '__init__.py'), 'a').close()
+        with open(os.path.join(commands_folder, 'seed.py'), 'w') as seed_file:
+            seed_file.write(seed_command_content(project_name, app_names, cache_enabled=bool(self.cache_backend)))
+        self.stdout.write(self.style.SUCCESS("seed command has been generated successfully."))
+
+    def generate_replica_modules(self, project_name):
+        """
+        Generate the routers.py module (primary/replica router and pinning middleware) inside the
+        project package and, for SQLite, the syncreplica command copying the primary into the replica.
+
+        :param project_name: The name of the Django project
+        :return: None
+        """
+        from .utils import routers_content, sync_replica_command_content
+        routers_file_path = os.path.join(settings.BASE_DIR, project_name, project_name, 'routers.py')
+        with open(routers_file_path, 'w') as routers_file:
+            routers_file.write(routers_content())
+        self.stdout.write(self.style.SUCCESS("routers.py file has been generated successfully."))
+        if self.database != 'sqlite':
+            return
+        commands_folder = os.path.join(settings.BASE_DIR, project_name, 'Authentication', 'management', 'commands')
+        with open(os.path.join(commands_folder, 'syncreplica.py'), 'w') as command_file:
+            command_file.write(sync_replica_command_content(project_name))
+        self.stdout.write(self.style.SUCCESS("syncreplica command has been generated successfully."))
+
+    def generate_listing_module(self, project_name):
+        """
+        Generate the listing.py module (list serializer selection and values() read path) inside the project package.
+
+        :param project_name: The name of the Django project
+        :return: None
+        """
+        from .utils import listing_content
+        listing_file_path = os.path.join(settings.BASE_DIR, project_name, project_name, 'listing.py')
+        self.scaffold.write_file('listing.py', listing_file_path, listing_content)
+        self.stdout.write(self.style.SUCCESS("listing.py file has been generated successfully."))
+
+    def generate_renderers_module(self, project_name):
+        """
+        Generate the renderers.py module (JSON renderer and parser on orjson) inside the project package.
+
+        :param project_name: The name of the Django project
+        :return: None
+        """
+        from .utils import renderers_content
+        renderers_file_path = os.path.join(settings.BASE_DIR, project_name, project_name, 'renderers.py')
+        self.scaffold.write_file('renderers.py', renderers_file_path, renderers_content)
+        self.stdout.write(self.style.SUCCESS("renderers.py file has been generated successfully."))
+
+    def generate_thumbnails_module(self, project_name):
+        """
+        Generate the thumbnails.py module (background rendering of image variants) inside the project package.
+
+        :param project_name: The name of the Django project
+        :return: None
+        """
+        from .utils import thumbnails_content
+        thumbnails_file_path = os.path.join(settings.BASE_DIR, project_name, project_name, 'thumbnails.py')
+        self.scaffold.write_file('thumbnails.py', thumbnails_file_path, thumbnails_content)
+        self.stdout.write(self.style.SUCCESS("thumbnails.py file has been generated successfully."))
+
+    def generate_fieldsets_module(self, project_name):
+        """
+        Generate the fieldsets.py module (?fields= and ?expand= support) inside the project package.
+
+        :param project_name: The name of the Django project
+        :return: None
+        """
+        from .utils import fieldsets_content
+        fieldsets_file_path = os.path.join(settings.BASE_DIR, project_name, project_name, 'fieldsets.py')
+        self.scaffold.write_file('fieldsets.py', fieldsets_file_path, fieldsets_content)
+        self.stdout.write(self.style.SUCCESS("fieldsets.py file has been generated successfully."))
+
+    def generate_bulk_module(self, project_name):
+        """
+        Generate the bulk.py module (bulk create/update/delete endpoints) inside the project package.
+
+        :param project_name: The name of the Django project
+        :return: None
+        """
+        from .utils import bulk_content
+        bulk_file_path = os.path.join(settings.BASE_DIR, project_name, project_name, 'bulk.py')
+        self.scaffold.write_file('bulk.py', bulk_file_path, bulk_content)
+        self.stdout.write(self.style.SUCCESS("bulk.py file has been generated successfully."))
+
+    def generate_export_module(self, project_name):
+        """
+        Generate the export.py module (streaming CSV/NDJSON export endpoints) inside the project package.
+
+        :param project_name: The name of the Django project
+        :return: None
+        """
+        from .utils import export_content
+        export_file_path = os.path.join(settings.BASE_DIR, project_name, project_name, 'export.py')
+        with open(export_file_path, 'w') as export_file:
+            export_file.write(export_content(project_name))
+        self.stdout.write(self.style.SUCCESS("export.py file has been generated successfully."))
+
+    def generate_storage_module(self, project_name):
+        """
+        Generate the storage.py module (manifest static files storage writing gzip copies) inside the project package.
+
+        :param project_name: The name of the Django project
+        :return: None
+        """
+        from .utils import storage_content
+        storage_file_path = os.path.join(settings.BASE_DIR, project_name, project_name, 'storage.py')
+        self.scaffold.write_file('storage.py', storage_file_path, storage_content)
+        self.stdout.write(self.style.SUCCESS("storage.py file has been generated successfully."))
+
+    def run_project_command(self, project_name, *args):
+        """
+        Run a manage.py command of the generated project with the builder's interpreter.
+
+        :param project_name: The name of the Django project
+        :param args: The command and its arguments
+        :return: subprocess.CompletedProcess: The finished command, output captured
+        """
+        environment = dict(os.environ)
+        environment.pop('DJANGO_SETTINGS_MODULE', None)
+        # Build-time commands read no secret, any value satisfies the production settings
+        environment.setdefault('DJANGO_SECRET_KEY', 'buildapp')
+        # makemigrations writes dependencies in set order, a fixed hash seed keeps the files reproducible
+        environment['PYTHONHASHSEED'] = '0'
+        project_folder = os.path.join(settings.BASE_DIR, project_name)
+        database_path = os.path.join(project_folder, 'db.sqlite3')
+        had_database = os.path.exists(database_path)
+        result = subprocess.run(
+            [sys.executable, 'manage.py', *args],
+            cwd=project_folder, env=environment, capture_output=True, text=True,
+        )
+        # makemigrations opens the SQLite database to check the migration history, creating an empty file
+        if not had_database and os.path.exists(database_path) and not os.path.getsize(database_path):
+            os.remove(database_path)
+        return result
+
+    def collect_static_files(self, project_name):
+        """
+        Run collectstatic in the generated project so the hashed and precompressed static files
+        ship with it. Needs the project's requirements importable; otherwise RUNME does it later.
+
+        :param project_name: The name of the Django project
+        :return: bool: True if the static files were collected
+        """
+        result = self.run_project_command(project_name, 'collectstatic', '--noinput')
+        if result.returncode != 0:
+            self.stdout.write(self.style.ERROR(f"collectstatic failed, run it after installing the requirements: {result.stderr.strip().splitlines()[-1:]}"))
+            return False
+        self.stdout.write(self.style.SUCCESS("Static files have been collected and compressed."))
+        return True
+
+    def searchable_fields(self, model_schema):
+        """
+        Names of the fields of a model marked "searchable" in the schema. Relations hold
+        keys, not text, so they are never indexed.
+        """
+        return [
+            field['fieldName'] for field in model_schema.get('fields', [])
+            if field.get('searchable') and field.get('fieldType') not in ('ForeignKey', 'OneToOneField', 'ManyToManyField')
+        ]
+
+    def timestamp_field(self, model_schema, timestamps=None):
+        # Whether the generated updated_at field is added, the schema may declare its own
+        timestamps = self.timestamps if timestamps is None else timestamps
+        return timestamps and not any(field.get('fieldName') == 'updated_at' for field in model_schema.get('fields', []))
+
+    def image_fields(self, model_schema):
+        # Names of the ImageFields of a model, they get thumbnails
+        return [field.get('fieldName') for field in model_schema.get('fields', []) if field.get('fieldType') == 'ImageField']
+
+    def has_image_fields(self, apps):
+        return any(self.image_fields(model_schema) for app in apps for model_schema in app.get('models', []))
+
+    def has_searchable_fields(self, apps):
+        return any(self.searchable_fields(model_schema) for app in apps for model_schema in app.get('models', []))
+
+    def search_test_field(self, model_schema):
+        # A searchable text field the generated search test can store a six letter word in
+        searchable = self.searchable_fields(model_schema)
+        for field in model_schema.get('fields', []):
+            attributes = field.get('attributes', {})
+            max_length = str(attributes.get('max_length', ''))
+            if (field['fieldName'] in searchable
+                    and field.get('fieldType') in ('CharField', 'TextField')
+                    and not attributes.get('choices')
+                    and (not max_length.isdigit() or int(max_length) >= 6)):
+                return field['fieldName']
+        return None
+
+    def search_index_name(self, app_name, model_name):
+        # Index names are limited to 30 characters and unique per database
+        digest = hashlib.md5(f'{app_name}.{model_name}'.encode()).hexdigest()[:8]
+        return f'{model_name.lower()[:12]}_search_{digest}'
+
+    def model_aggregates(self, app_name, model_schema):
+        """
+        The valid aggregates declared by a model schema, see utils.resolve_aggregates.
+        """
+        from .utils import resolve_aggregates
+        aggregates, _ = resolve_aggregates(app_name, model_schema, self.schema_apps)
+        return aggregates
+
+    def has_aggregates(self, apps):
+        return any(model_schema.get('aggregates') for app in apps for model_schema in app.get('models', []))
+
+    def check_aggregates(self, apps):
+        """
+        Report the aggregate declarations of the schema that are invalid, they are not generated.
+
+        :param apps: The apps of the schema
+        :return: None
+        """
+        from .utils import resolve_aggregates
+        for app in apps:
+            for model_schema in app.get('models', []):
+                _, errors = resolve_aggregates(app.get('appName'), model_schema, apps)
+                for error in errors:
+                    self.stdout.write(self.style.ERROR(f'Skipped {error}'))
+
+    def check_indexes(self, apps):
+        """
+        Report the index declarations of the schema that are invalid, they are not generated.
+
+        :param apps: The apps of the schema
+        :return: None
+        """
+        from .utils import resolve_indexes
+        for app in apps:
+            for model_schema in app.get('models', []):
+                _, errors = resolve_indexes(app.get('appName'), model_schema)
+                for error in errors:
+                    self.stdout.write(self.style.ERROR(f'Skipped {error}'))
+
+    def latest_migration(self, project_name, app_name):
+        # Name of the highest numbered migration of an app, None before its first makemigrations
+        migrations_folder = os.path.join(settings.BASE_DIR, project_name, app_name, 'migrations')
+        if not os.path.isdir(migrations_folder):
+            return None
+        names = sorted(name[:-3] for name in os.listdir(migrations_folder) if name[:4].isdigit() and name.endswith('.py'))
+        return names[-1] if names else None
+
+    def schema_snapshot_path(self, project_name, app_name=None):
+        # The build's options and app names, and next to them one file per app
+        snapshot_folder = os.path.join(settings.BASE_DIR, project_name, '.buildapp')
+        if app_name is None:
+            return os.path.join(snapshot_folder, 'schema.json')
+        return os.path.join(snapshot_folder, 'apps', f'{app_name}.json')
+
+    def read_schema_snapshot(self, project_name, app_name=None):
+        """
+        The schema the project was last built from, None when it was never built.
+
+        :param project_name: The name of the Django project
+        :param app_name: The app whose schema to read, by default the database and app names of the build
+        :return: dict: The recorded build or app, or None
+        """
+        try:
+            with open(self.schema_snapshot_path(project_name, app_name), 'r', encoding='utf-8') as snapshot_file:
+                return json.load(snapshot_file)
+        except FileNotFoundError:
+            return None
+
+    def write_schema_snapshot(self, project_name, apps):
+        """
+        Record the schema the project was built from, the next build diffs against it.
+
+        :param project_name: The name of the Django project
+        :param apps: The apps of the schema
+        :return: None
+        """
+        apps_folder = os.path.dirname(self.schema_snapshot_path(project_name, ''))
+        os.makedirs(apps_folder, exist_ok=True)
+        app_names = []
+        for app in apps:
+            app_names.append(app.get('appName'))
+            with open(self.schema_snapshot_path(project_name, app_names[-1]), 'w', encoding='utf-8') as snapshot_file:
+                json.dump(app, snapshot_file, indent=1)
+        for file_name in os.listdir(apps_folder):
+            if file_name[:-len('.json')] not in app_names:
+                os.remove(os.path.join(apps_folder, file_name))
+        with open(self.schema_snapshot_path(project_name), 'w', encoding='utf-8') as snapshot_file:
+            json.dump({'projectName': project_name, 'database': self.database, 'options': self.build_options(), 'apps': app_names}, snapshot_file, indent=1)
+
+    def build_options(self):
+        # The options the app files depend on, changing any of them regenerates every app
+        return {
+            'cache': self.cache_backend,
+            'fast_list': self.fast_list,
+            'timestamps': self.timestamps,
+            'async': self.async_target,
+            'profile': self.profile,
+            'database': self.database,
+            'replica': self.replica,
+        }
+
+    def dependent_apps(self, apps, app_names):
+        """
+        The given apps and the apps relating to or aggregating over their models, whose generated
+        code reads those models' schema.
+
+        :param apps: The apps of the schema
+        :param app_names: The names of the changed apps
+        :return: set: The names of the apps to regenerate
+        """
+        dependent = set(app_names)
+        for app in apps:
+            labels = [
+                str(label) for model_schema in app.get('models', []) for label in
+                [field.get('attributes', {}).get('to', '') for field in model_schema.get('fields', [])] +
+                [aggregate.get('model', '') for aggregate in model_schema.get('aggregates', [])]
+            ]
+            if any(label.split('.')[0] in app_names for label in labels if '.' in label):
+                dependent.add(app.get('appName'))
+        return dependent
+
+    def model_states(self, app_name, app_schema, database, timestamps=False):
+        """
+        The models of an app as its migrations see them, built from the schema the way
+        create_models_for_app writes them, see utils.schema_operations.
+
+        Args:
+        app_name (str): The name of the app.
+        app_schema (dict): The schema for the app.
+        database (str): The database the models were generated for.
+        timestamps (bool): Whether the models were generated with an updated_at field.
+
+        Returns:
+        dict: The fields, indexes and searchable fields of each model, by model name.
+        """
+        from django.db import models
+        from .utils import resolve_indexes, schema_field
+        states = {}
+        for model_schema in app_schema.get('models', []):
+            model_name = model_schema.get('modelName', 'DefaultModel')
+            fields = [(field.get('fieldName'), schema_field(app_name, field)) for field in model_schema.get('fields', [])]
+            if self.timestamp_field(model_schema, timestamps):
+                fields.append(('updated_at', models.DateTimeField(auto_now=True, db_index=True)))
+            indexes = [models.Index(fields=index['fields'], name=index['name']) for index in resolve_indexes(app_name, model_schema)[0]]
+            search = self.searchable_fields(model_schema)
+            if database == 'postgresql' and search:
+                from django.contrib.postgres.indexes import GinIndex
+                from django.contrib.postgres.search import SearchVectorField
+                fields.append(('search_vector', SearchVectorField(null=True, editable=False)))
+                indexes.append(GinIndex(fields=['search_vector'], name=self.search_index_name(app_name, model_name)))
+            states[model_name] = {'fields': fields, 'indexes': indexes, 'search': search}
+        return states
+
+    def generate_schema_migrations(self, project_name, snapshot, apps, dirty_apps=None):
+        """
+        Write a migration per app holding only the operations between the schema of the previous
+        build and this one, without loading the project. Apps without migrations yet are left to
+        makemigrations, their initial migration picks the new models up.
+
+        :param project_name: The name of the Django project
+        :param snapshot: The schema of the previous build, see read_schema_snapshot
+        :param apps: The apps of the schema
+        :param dirty_apps: The apps changed since the previous build, None to diff all of them
+        :return: bool: True if the migrations were written
+        """
+        from .utils import schema_migration_content, schema_operations
+        if snapshot.get('database', 'sqlite') != self.database:
+            self.stdout.write(self.style.ERROR(
+                f"The project was built for {snapshot.get('database', 'sqlite')}, no migration is written "
+                f"for the switch to {self.database}"
+            ))
+            return False
+        old_names = snapshot.get('apps', [])
+        new_names, plans, unmigrated = [], {}, []
+        for app in apps:
+            app_name = app.get('appName')
+            new_names.append(app_name)
+            if dirty_apps is not None and app_name not in dirty_apps:
+                continue
+            latest = self.latest_migration(project_name, app_name)
+            if latest is None:
+                unmigrated.append(app_name)
+                continue
+            old_app = (self.read_schema_snapshot(project_name, app_name) if app_name in old_names else None) or {}
+            try:
+                operations, related, warnings = schema_operations(
+                    app_name,
+                    self.model_states(app_name, old_app, snapshot.get('database', 'sqlite'), snapshot.get('options', {}).get('timestamps', False)),
+                    self.model_states(app_name, app, self.database, self.timestamps),
+                    self.database,
+                )
+            except Exception as e:
+                self.stdout.write(self.style.ERROR(f"Could not diff the models of app {app_name}, run makemigrations: {str(e)}"))
+                continue
+            for warning in warnings:
+                self.stdout.write(self.style.ERROR(warning))
+            if operations:
+                plans[app_name] = (latest, f'{int(latest[:4]) + 1:04d}_schema_update', operations, related)
+        for app_name in set(old_names) - set(new_names):
+            self.stdout.write(self.style.ERROR(f'App {app_name} left the schema, its folder and tables are kept'))
+        # Models deleted from an app go after the migrations removing the relations other apps had to them
+        for app_name, (_, _, operations, related) in plans.items():
+            deleted = {f'{app_name}.{operation.name}'.lower() for operation in operations if operation.__class__.__name__ == 'DeleteModel'}
+            if not deleted:
+                continue
+            for other_name in plans:
+                other_app = self.read_schema_snapshot(project_name, other_name) if other_name in old_names else None
+                if other_name != app_name and other_app and any(
+                        str(field.get('attributes', {}).get('to', '')).lower() in deleted
+                        for model_schema in other_app.get('models', []) for field in model_schema.get('fields', [])):
+                    related.add(other_name)
+        for app_name, (latest, name, operations, related) in plans.items():
+            dependencies = [(app_name, latest)]
+            for other_name in sorted(related):
+                other_latest = plans[other_name][1] if other_name in plans else self.latest_migration(project_name, other_name)
+                dependencies.append((other_name, other_latest or '__first__'))
+            migration_path = os.path.join(settings.BASE_DIR, project_name, app_name, 'migrations', f'{name}.py')
+            with open(migration_path, 'w') as migration_file:
+                migration_file.write(schema_migration_content(app_name, name, dependencies, operations))
+            self.stdout.write(self.style.SUCCESS(f'Migration {app_name}/{name} has been generated.'))
+        search_apps = [app for app in apps if app.get('appName') in unmigrated and self.has_searchable_fields([app])]
+        if search_apps:
+            self.generate_search_migrations(project_name, search_apps)
+        return True
+
+    def aggregates_code(self, aggregates):
+        """
+        The `aggregates` class attribute of a generated view, empty without aggregates.
+
+        Args:
+        aggregates (list): The model's aggregates, see model_aggregates.
+
+        Returns:
+        str: The attribute's code, indented for a class body.
+        """
+        if not aggregates:
+            return ''
+        code = "    aggregates = {\n"
+        for aggregate in aggregates:
+            arguments = [repr(aggregate['model']), repr(aggregate['relation']), repr(aggregate['function'])]
+            if aggregate['field']:
+                arguments.append(repr(aggregate['field']))
+            code += f"        '{aggregate['name']}': reverse_aggregate({', '.join(arguments)}),\n"
+        code += "    }\n"
+        return code
+
+    def generate_aggregates_module(self, project_name):
+        """
+        Generate the aggregates.py module (reverse-relation aggregate annotations) inside the project package.
+
+        :param project_name: The name of the Django project
+        :return: None
+        """
+        from .utils import aggregates_content
+        aggregates_file_path = os.path.join(settings.BASE_DIR, project_name, project_name, 'aggregates.py')
+        with open(aggregates_file_path, 'w') as aggregates_file:
+            aggregates_file.write(aggregates_content(project_name))
+        self.stdout.write(self.style.SUCCESS("aggregates.py file has been generated successfully."))
+
+    def generate_search_module(self, project_name):
+        """
+        Generate the search.py module (search action and admin search over the full-text index) inside the project package.
+
+        :param project_name: The name of the Django project
+        :return: None
+        """
+        from .utils import search_content
+        search_file_path = os.path.join(settings.BASE_DIR, project_name, project_name, 'search.py')
+        self.scaffold.write_file(f'search/{self.database}.py', search_file_path, lambda: search_content(self.database))
+        self.stdout.write(self.style.SUCCESS("search.py file has been generated successfully."))
+
+    def generate_search_migrations(self, project_name, apps):
+        """
+        Create the initial migrations of the project, then a migration per app with searchable
+        fields creating their full-text index (FTS5 table or search vector trigger) and the
+        triggers keeping it in sync.
+
+        :param project_name: The name of the Django project
+        :param apps: The apps of the schema
+        :return: bool: True if the migrations were written
+        """
+        from .utils import search_migration_content
+        app_names = [app.get('appName') for app in apps]
+        result = self.run_project_command(project_name, 'makemigrations', '--no-header', 'Authentication', *app_names)
+        if result.returncode != 0:
+            self.stdout.write(self.style.ERROR(
+                f"makemigrations failed, the search migrations were not written. Install the requirements "
+                f"and rebuild: {result.stderr.strip().splitlines()[-1:]}"
+            ))
+            return False
+        for app in apps:
+            app_name = app.get('appName')
+            models = [
+                (model_schema.get('modelName', 'DefaultModel'), self.searchable_fields(model_schema))
+                for model_schema in app.get('models', [])
+                if self.searchable_fields(model_schema)
+            ]
+            if not models:
+                continue
+            latest = self.latest_migration(project_name, app_name)
+            migration_path = os.path.join(settings.BASE_DIR, project_name, app_name, 'migrations', f'{int(latest[:4]) + 1:04d}_search.py')
+            with open(migration_path, 'w') as migration_file:
+                migration_file.write(search_migration_content(app_name, latest, models, self.database))
+        self.stdout.write(self.style.SUCCESS("Search migrations have been generated successfully."))
+        return True
+
+    def generate_instrumentation_module(self, project_name):
+        """
+        Generate the instrumentation.py module (per-request SQL and timing middleware) inside the project package.
+
+        :param project_name: The name of the Django project
+        :return: None
+        """
+        from .utils import instrumentation_content
+        instrumentation_file_path = os.path.join(settings.BASE_DIR, project_name, project_name, 'instrumentation.py')
+        self.scaffold.write_file('instrumentation.py', instrumentation_file_path, instrumentation_content)
+        self.stdout.write(self.style.SUCCESS("instrumentation.py file has been generated successfully."))
+
+    def generate_serializer_benchmark(self, project_name, apps):
+        """
+        Generate benchmarks/serializers.py comparing list throughput of the ModelSerializer,
+        the list serializer and the values() read path for every generated viewset, and
+        benchmarks/renderers.py comparing JSON rendering and parsing throughput.
+
+        :param project_name: The name of the Django project
+        :param apps: The apps of the schema
+        :return: None
+        """
+        from .utils import renderer_benchmark_content, serializer_benchmark_content
+        viewsets = [
+            f"{app.get('appName')}.views.{model.get('modelName', 'DefaultModel')}ViewSet"
+            for app in apps
+            for model in app.get('models', [])
+        ]
+        benchmarks_folder = os.path.join(settings.BASE_DIR, project_name, 'benchmarks')
+        os.makedirs(benchmarks_folder, exist_ok=True)
+        with open(os.path.join(benchmarks_folder, 'serializers.py'), 'w') as benchmark_file:
+            benchmark_file.write(serializer_benchmark_content(project_name, viewsets))
+        with open(os.path.join(benchmarks_folder, 'renderers.py'), 'w') as benchmark_file:
+            benchmark_file.write(renderer_benchmark_content(project_name, viewsets))
+        self.stdout.write(self.style.SUCCESS("benchmarks/serializers.py and benchmarks/renderers.py files have been generated successfully."))
+
+    def generate_load_test(self, project_name, apps):
+        """
+        Generate benchmarks/loadtest.py, an asyncio load generator for every router endpoint
+        (and async endpoint with --async) of the project.
+
+        :param project_name: The name of the Django project
+        :param apps: The apps of the schema
+        :return: None
+        """
+        from .utils import load_test_content
+        routes = []
+        for app in apps:
+            app_name = app.get('appName')
+            for model_name, prefix in self.router_routes(app):
+                routes.append({
+                    'name': f"{app_name}.{model_name}",
+                    'url': f"/{app_name}/{prefix}/",
+                    'async_url': f"/{app_name}/async/{prefix}/" if self.async_target else None,
+                })
+        benchmarks_folder = os.path.join(settings.BASE_DIR, project_name, 'benchmarks')
+        os.makedirs(benchmarks_folder, exist_ok=True)
+        with open(os.path.join(benchmarks_folder, 'loadtest.py'), 'w') as load_test_file:
+            load_test_file.write(load_test_content(project_name, routes))
+        self.stdout.write(self.style.SUCCESS("benchmarks/loadtest.py file has been generated successfully."))
+
+    def generate_server_config(self, project_name):
+        """
+        Generate gunicorn.conf.py (application server settings derived from the CPU count), start.sh
+        (migrate and serve) next to manage.py, and benchmarks/server.py, measuring the throughput of
+        worker and thread settings.
+
+        :param project_name: The name of the Django project
+        :return: None
+        """
+        from .utils import gunicorn_conf_content, server_benchmark_content, start_script_content
+        project_folder = os.path.join(settings.BASE_DIR, project_name)
+        with open(os.path.join(project_folder, 'gunicorn.conf.py'), 'w') as config_file:
+            config_file.write(gunicorn_conf_content(project_name, self.async_target, self.profile, self.cache_backend))
+        start_script_path = os.path.join(project_folder, 'start.sh')
+        with open(start_script_path, 'w') as start_script:
+            start_script.write(start_script_content(project_name, self.profile))
+        os.chmod(start_script_path, 0o755)
+        benchmarks_folder = os.path.join(project_folder, 'benchmarks')
+        os.makedirs(benchmarks_folder, exist_ok=True)
+        with open(os.path.join(benchmarks_folder, 'server.py'), 'w') as benchmark_file:
+            benchmark_file.write(server_benchmark_content(project_name, self.async_target))
+        self.stdout.write(self.style.SUCCESS("gunicorn.conf.py, start.sh and benchmarks/server.py files have been generated successfully."))
+
     def create_authentication_app(self, project_name):
         """
         Create the 'Authentication' app with the specified models and admin code inside the project folder.
@@ -422,14 +1636,35 @@ Copy following command and Enter in console:\n\t
             
             #change directory to project folder
             os.chdir(project_directory)
-            # Run the startapp command to create the app
-            os.system(f'python manage.py startapp {app_name}')
+            # The app is the same in every project but for the project name, it is rendered once into the scaffold cache
+            self.scaffold.write_folder(app_name, app_directory, self.render_authentication_app, {SCAFFOLD_PROJECT_NAME: project_name})
 
-            # Get the app directory
-            app_directory = os.path.join(project_directory, app_name)
+            self.stdout.write(self.style.SUCCESS(f'App "{app_name}" has been created with content inside the project folder "{project_name}".'))
 
-            # Add content to models.py
-            models_code = '''
+            return True
+
+        except Exception as e:
+            self.stdout.write(self.style.ERROR(f"An error occurred while creating the 'Authentication' app: {str(e)}"))
+            return False
+
+    def render_authentication_app(self, app_directory):
+        """
+        Render the 'Authentication' app (custom user model, its admin showing profile picture
+        thumbnails and the app config connecting the thumbnail rendering) into app_directory,
+        for the project SCAFFOLD_PROJECT_NAME.
+
+        Args:
+        app_directory (str): The folder of the app.
+
+        Returns:
+        None
+        """
+        os.makedirs(app_directory, exist_ok=True)
+        # Run the startapp command to create the app
+        subprocess.run(['django-admin', 'startapp', 'Authentication', app_directory], check=True)
+
+        # Add content to models.py
+        models_code = '''
 from django.db import models
 from django.contrib.auth.models import AbstractUser
 from django.core.validators import FileExtensionValidator
@@ -447,42 +1682,64 @@ class ApplicationUser(AbstractUser):
     address = models.CharField(max_length=255, blank=True, null=True)
     '''
 
-            # Create a models.py file in the app directory and add the models code
-            models_file_path = os.path.join(app_directory, 'models.py')
-            with open(models_file_path, 'w') as models_file:
-                models_file.write(models_code)
+        # Create a models.py file in the app directory and add the models code
+        models_file_path = os.path.join(app_directory, 'models.py')
+        with open(models_file_path, 'w') as models_file:
+            models_file.write(models_code)
 
-            # Add content to admin.py
-            admin_code = '''
+        # Add content to admin.py
+        admin_code = f'''
 from django.utils.html import format_html
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
+from {SCAFFOLD_PROJECT_NAME}.thumbnails import thumbnail_tag
 from .models import ApplicationUser
-
+''' + '''
 class ApplicationUserAdmin(UserAdmin):
     list_display = ('username', 'email', 'contact', 'profile_pic_image')
 
     def profile_pic_image(self, obj):
         if obj.profile_pic:
-            return format_html(f'<img src ="{obj.profile_pic.url}" width="150" height="150" alt="{obj.username}"/>')
+            return thumbnail_tag(obj.profile_pic, alt=obj.username)
         else:
             return format_html("<img src='data:image/png;base64,iVBORw0KGgoAAAANSUhEUgAAAI0AAACNCAMAAAC9gAmXAAAAY1BMVEX///8AAADi4uL39/coKCg7OzsYGBjAwMDm5ua6urrLy8vt7e2WlpY1NTXW1tZQUFCdnZ3c3NwREREiIiIdHR2lpaWLi4swMDBVVVWxsbGBgYFcXFxnZ2dvb296enpCQkJJSUkC9QxWAAAESUlEQVR4nO1aaZOiMBCVSyOMICAo6Ij//1duuVN0mkPI0c1s1eZ9nMnxDH3ldXY7BwcHBwcHBwcHBwcHPohjVd+i8lJGt7Y6+r/IJEjr7uphhF2dBr/Dpcq8OWTV9nyS8yyVH3yJbckcowUynndqNuTi3xe5vHHbzKDj/SoZz9sftiGzZDED69mCTD3ZNoyyLIvCyd+f25O5NXEugiAQftyMzanelsx97DvHIaGWl8wR75XF0zgXxDc8hNXTc+xN1YdBVSHHFCkfmeAk9zl9jrcChcYrX5pAvn1b2iVA1sPm577c47Ey9FsOzZnYyC1eq2NvysQNkcIG4XqOTqSJxSxsHlrrxzD6zkEm0Dx7+V0TBjbgUArf6Q0BRSqDW0mvVQ33kEQWo4EZpHurlpkJo5Mf9D0WLIc+Wz31l276Kd/kbPrcU6gfu9/n2BM1meDSe5TGpN6rLtRm7PdlQqYx6a5/nmqA0KpjA61O8DZio1PrfvWTqG8z4OBnjUnNP8WmYmfzT3wpKG50rBgiJrUVi97DXxqTeoGH3MMh+pUakay/DJNHP8gMnvoNKe3PkzwzyEj26VI3BbgUfdYEp1JPDVCfHcnZQKLyVFUrWZ8x6FwP3XMH/34w3H7BCvZqdpyX+pamDnmDeSmNl2oyizAAJ69UjEqlh96j3oDwoRJbkdLDJOHIw9mvXR8TqUlyaZGJFK26ZVsIXjBS+fqljUbucV2KIVjcYlT+UNdl/7lKwFr7i4/MTmCJup3/WkGLxpSs7YYU7eTtq6kxJ9WgCcEoib5R4b28Uz30df9r2CnSKaKN0HhDlG1zSH3hp4emHbcaOFLCCp33Jwuv4UyXaAMys3RmsVH/TnQKXLrNepv+dZVMyCVaj5FP+2VzaJm9+y+SWqWr+UbRckizA1TThuFnXHjjTb7eeh4iY/xch8v8nkXURcWHf3H5+SAd/iB6nmPpySI+t9M3BN8sZXEwfsRxOuczWTM/n0bjOgZjFqNf3S7UN6NDvJLHnnRgMpcV503qEg9XvIEpY1BmeXeFO8NjwJ606Bp0njs13SxGlTqtnoTz0kPVKBPUavVCOs/Cp26kiXqETSqcJfX0xBjNJHpTgZYsdKVWfJkhEUYT6dsGtigQHYr6qzU/mTdimcAIbuToO5klQPRIxl5Sl1nH9KUR6PteaUtG/jJz0VdmOMvyIoHrgUVwF5C0Irt0Lu9ONg3/M9HhgNVcrZbpSJYBAd1SDpfr2LgVxBqdvvMcwJAtYk5CdDT4cMwDMri3pS9gWdLcjqGSsH9iCSHQ+KVSAF/bvnKDhszJ9JghRRXWZHY7iICmXgWlG8VbWIiAporX0/bnYBg9xMDoby2LurkqBIR1wwX66TQFNsgbZquJfjrN20oIF2YnDbo5zYNuiDhm1TpUEzS6r+Vy4JM0ghCkGbNKifi9SkzEhkbvyGnN0MHBwcHBwcHBwcHhP8Qf+m4owMUfTr8AAAAASUVORK5CYII=' height='150' width='150' alt=''/>")
 
 admin.site.register(ApplicationUser, ApplicationUserAdmin)
     '''
 
-            # Create an admin.py file in the app directory and add the admin code
-            admin_file_path = os.path.join(app_directory, 'admin.py')
-            with open(admin_file_path, 'w') as admin_file:
-                admin_file.write(admin_code)
+        # Create an admin.py file in the app directory and add the admin code
+        admin_file_path = os.path.join(app_directory, 'admin.py')
+        with open(admin_file_path, 'w') as admin_file:
+            admin_file.write(admin_code)
 
-            self.stdout.write(self.style.SUCCESS(f'App "{app_name}" has been created with content inside the project folder "{project_name}".'))
+        # Connect the thumbnail rendering once every model is loaded
+        apps_code = f'''from django.apps import AppConfig
 
-            return True
 
-        except Exception as e:
-            self.stdout.write(self.style.ERROR(f"An error occurred while creating the 'Authentication' app: {str(e)}"))
-            return False
+class AuthenticationConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'Authentication'
+
+    def ready(self):
+        from {SCAFFOLD_PROJECT_NAME}.thumbnails import connect_image_fields
+        connect_image_fields()
+'''
+        with open(os.path.join(app_directory, 'apps.py'), 'w') as apps_file:
+            apps_file.write(apps_code)
+
+        tests_code = f'''# Tests for Authentication app
+
+from django.test import TestCase
+
+from {SCAFFOLD_PROJECT_NAME}.testing import ThumbnailTestMixin
+from .models import ApplicationUser
+
+class ApplicationUserThumbnailTests(ThumbnailTestMixin, TestCase):
+    model = ApplicationUser
+    image_field = 'profile_pic'
+'''
+        with open(os.path.join(app_directory, 'tests.py'), 'w') as tests_file:
+            tests_file.write(tests_code)
 
     def index_file_generator(self, project_name):
             """
@@ -498,13 +1755,30 @@ admin.site.register(ApplicationUser, ApplicationUserAdmin)
                 os.makedirs(templates_folder)
             # Define the path to the index.html file inside the templates folder
             index_html_path = os.path.join(templates_folder, "index.html")
-            index_html_content = generate_index_html_content()
             # Write the content to the index.html file
-            with open(index_html_path, "w") as index_file:
-                index_file.write(index_html_content)
+            self.scaffold.write_file('index.html', index_html_path, generate_index_html_content)
             # Print a success message
             self.stdout.write(self.style.SUCCESS("index.html file has been generated and updated successfully in the templates folder."))
 
+    def generate_openapi_document(self, project_name, apps):
+        """
+        Write the OpenAPI document of the project (openapi.json next to manage.py), the docs.py
+        module serving it and the swagger.html page rendering it.
+        :param project_name: The name of the Django application
+        :param apps: The apps of the schema
+        :return: None
+        """
+        from .utils import docs_content, generate_swagger_html_content, write_openapi_document
+        project_folder = os.path.join(settings.BASE_DIR, project_name)
+        with open(os.path.join(project_folder, 'openapi.json'), 'w') as openapi_file:
+            write_openapi_document(openapi_file, project_name, apps, async_target=self.async_target, timestamps=self.timestamps)
+        self.scaffold.write_file('docs.py', os.path.join(project_folder, project_name, 'docs.py'), docs_content)
+        templates_folder = os.path.join(project_folder, 'Authentication', 'templates')
+        os.makedirs(templates_folder, exist_ok=True)
+        with open(os.path.join(templates_folder, 'swagger.html'), 'w') as swagger_file:
+            swagger_file.write(generate_swagger_html_content(project_name))
+        self.stdout.write(self.style.SUCCESS("openapi.json, docs.py and swagger.html have been generated successfully."))
+
     def generate_settings_content(self, schema_generated_apps, project_name):
         """
         Generates settings.py file content based on the apps generated by the user
@@ -513,7 +1787,15 @@ admin.site.register(ApplicationUser, ApplicationUserAdmin)
         :return: None
         """
         from .utils import settings_content
-        full_settings_content, urls_content = settings_content(project_name, schema_generated_apps)
+        full_settings_content, urls_content = settings_content(
+            project_name,
+            schema_generated_apps,
+            cache_backend=self.cache_backend,
+            async_target=self.async_target,
+            profile=self.profile,
+            database=self.database,
+            replica=self.replica,
+        )
         # Define the path to the settings.py file
         settings_file_path = os.path.join(settings.BASE_DIR, project_name, project_name , 'settings.py')
         urls_file_path = os.path.join(settings.BASE_DIR, project_name, project_name , 'urls.py')
@@ -526,30 +1808,88 @@ admin.site.register(ApplicationUser, ApplicationUserAdmin)
         # Print a success message
         self.stdout.write(self.style.SUCCESS("settings.py and urls.py file has been updated successfully."))
     
-    def set_requirements(self, project_name, command):
+    def production_run_steps(self):
         """
-        Adds requirements.txt file in the root directory of the project
-        :param project_name: Name of the django app
-        :return: None
+        Extra setup commands of the production profile, empty for the dev profile.
+        :return: str: The commands, one indented line each
         """
-        runfile_txt_path = os.path.join(settings.BASE_DIR, project_name, 'RUNME')
-        with open(runfile_txt_path, 'a+') as f:
-            f.write(f'''
-    {command}
+        if self.profile != 'production':
+            return ''
+        return '''    export DJANGO_SECRET_KEY="<a long random value>"
+    export DJANGO_ALLOWED_HOSTS="localhost,127.0.0.1"
+    python manage.py collectstatic --noinput
+'''
+
+    def serve_run_step(self):
+        """
+        The command serving the project: the development server for the dev profile, gunicorn
+        through start.sh for the production one.
+        :return: str: The command
+        """
+        return './start.sh' if self.profile == 'production' else 'python manage.py runserver'
+
+    def replica_run_steps(self):
+        """
+        Commands filling the SQLite replica after the migrations, empty without --replica.
+        :return: str: The commands, one indented line each
+        """
+        if not self.replica or self.database != 'sqlite':
+            return ''
+        return '''    python manage.py syncreplica
+'''
+
+    def run_steps(self, command, update=False):
+        """
+        The commands setting the project up after a build, or applying an in-place update to a
+        project already set up (no superuser, no first migrations).
+        :param command: The command activating the virtual environment
+        :param update: Whether the project was updated in place
+        :return: str: The commands, one indented line each
+        """
+        if update:
+            return f'''    {command}
     pip install -r requirements.txt
-    python manage.py makemigrations Authentication
+    python manage.py makemigrations
+    python manage.py migrate
+{self.replica_run_steps()}'''
+        return f'''    {command}
+    pip install -r requirements.txt
+{self.production_run_steps()}    python manage.py makemigrations Authentication
     python manage.py migrate
     python manage.py makemigrations
     python manage.py migrate
-    echo "from django.contrib.auth import get_user_model;User = get_user_model(); User.objects.create_superuser('admin', 'admin@email.com', 'pass')" | python manage.py shell
-    python manage.py runserver
-''')
+{self.replica_run_steps()}    echo "from django.contrib.auth import get_user_model;User = get_user_model(); User.objects.create_superuser('admin', 'admin@email.com', 'pass')" | python manage.py shell
+    {self.serve_run_step()}
+'''
+
+    def set_requirements(self, project_name, run_steps):
+        """
+        Writes the RUNME (the setup commands of the last build) and requirements.txt files in the
+        root directory of the project
+        :param project_name: Name of the django app
+        :param run_steps: The setup commands, see run_steps
+        :return: None
+        """
+        runfile_txt_path = os.path.join(settings.BASE_DIR, project_name, 'RUNME')
+        with open(runfile_txt_path, 'w') as f:
+            f.write(f'\n{run_steps}')
         requirements_txt_path = os.path.join(settings.BASE_DIR, project_name , 'requirements.txt')
         try:
-            requirements = get_requirements()
-            with open(requirements_txt_path, 'w') as requirement_file:
-                requirement_file.write(requirements)
-                self.stdout.write(self.style.SUCCESS('Requirement.txt and RUNFILE files created'))
+            extra_requirements = []
+            if self.async_target:
+                # daphne turns runserver into an ASGI server, gunicorn runs uvicorn workers
+                extra_requirements += ['daphne', 'uvicorn']
+            if self.database == 'postgresql':
+                extra_requirements.append('psycopg[binary]')
+            if self.cache_backend == 'redis':
+                extra_requirements.append('redis')
+            redis_suffix = '-redis' if self.cache_backend == 'redis' else ''
+            self.scaffold.write_file(
+                f"requirements/{'async' if self.async_target else 'sync'}-{self.database}{redis_suffix}.txt",
+                requirements_txt_path,
+                lambda: get_requirements(extra_requirements),
+            )
+            self.stdout.write(self.style.SUCCESS('Requirement.txt and RUNFILE files created'))
         except Exception as e:
             self.stderr.write(str(e))
         
@@ -3,6 +3,7 @@ import subprocess
 import os
 import json
 from django.conf import settings
+from .utils import iter_schema, schema_project_name
 
 class Command(BaseCommand):
     help = 'Creates a new Flutter project based on the project name in the JSON schema'
@@ -22,14 +23,13 @@ class Command(BaseCommand):
             if not schema_files:
                 raise CommandError('No schema files found in the schema directory')
 
-            # Read the first schema file
-            with open(os.path.join(schema_dir, schema_files[0]), 'r') as schema_file:
-                schema = json.load(schema_file)
-                project_name = str(schema.get('projectName')).lower()
+            # Read the first schema file, streamed one model at a time
+            schema_path = os.path.join(schema_dir, schema_files[0])
+            project_name = str(schema_project_name(schema_path)).lower()
 
 
-                if not project_name:
-                    raise CommandError('Project name not found in the schema')
+            if not project_name:
+                raise CommandError('Project name not found in the schema')
 
             # Define the path where the Flutter project will be created
             project_path = os.path.join(base_dir, project_name)
@@ -42,7 +42,7 @@ class Command(BaseCommand):
             subprocess.run(['flutter', 'create', project_name], check=True, cwd=base_dir)
 
             # Generate Flutter models based on the JSON schema
-            self.generate_flutter_models(schema, project_path)
+            self.generate_flutter_models(schema_path, project_path)
 
             self.stdout.write(self.style.SUCCESS(f'Successfully created Flutter project "{project_name}" based on the schema'))
         except json.JSONDecodeError:
@@ -53,12 +53,12 @@ class Command(BaseCommand):
             raise CommandError(f'An error occurred: {str(e)}')
 
     
-    def generate_flutter_models(self, schema, flutter_project_path):
+    def generate_flutter_models(self, schema_path, flutter_project_path):
         models_dir = os.path.join(flutter_project_path, 'lib', 'models')
         os.makedirs(models_dir, exist_ok=True)
 
-        for app in schema.get('apps', []):
-            for model in app.get('models', []):
+        for kind, _, model in iter_schema(schema_path):
+            if kind == 'model':
                 model_name = model.get('modelName')
                 fields = model.get('fields', [])
                 self.create_dart_model_file(model_name, fields, models_dir)
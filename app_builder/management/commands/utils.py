@@ -1,12 +1,118 @@
+import collections
+import hashlib
+import json
 import os
+import re
+import shutil
+import tempfile
 import zipfile
+import zlib
 import sys
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
 from django.conf import settings
 
 
-def zip_project_folder(project_name):
+# Entries of a project zip get fixed metadata, identical project folders give byte-identical archives
+ZIP_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+# The virtualenv and bytecode of the machine that built the project are left out
+ZIP_EXCLUDED_FOLDERS = ('.venv', '__pycache__')
 
+def project_files(project_folder):
+    """
+    The files of a project folder as (archive path, file path), sorted by archive path.
+    """
+    files = []
+    for root, folders, file_names in os.walk(project_folder):
+        folders[:] = [folder for folder in folders if folder not in ZIP_EXCLUDED_FOLDERS]
+        for file_name in file_names:
+            if not file_name.endswith('.pyc'):
+                file_path = os.path.join(root, file_name)
+                files.append(('/'.join(os.path.relpath(file_path, project_folder).split(os.sep)), file_path))
+    return sorted(files)
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as hashed_file:
+        for chunk in iter(lambda: hashed_file.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+# Compression methods of project zips, by --compression
+ZIP_COMPRESSION = {
+    'stored': zipfile.ZIP_STORED,
+    'deflate': zipfile.ZIP_DEFLATED,
+    'bzip2': zipfile.ZIP_BZIP2,
+    'lzma': zipfile.ZIP_LZMA,
+}
+
+# Compressing in threads writes entries through zipfile internals, missing from other Python
+# versions maybe, which then get the archive written by ZipFile.open() one file at a time
+THREADED_ZIP = (
+    hasattr(zipfile, '_get_compressor') and hasattr(zipfile, '_MASK_COMPRESS_OPTION_1')
+    and hasattr(zipfile.ZipFile, '_writecheck')
+)
+# Compressed entries larger than this wait for their turn in a temporary file, not in memory
+ZIP_SPOOL_SIZE = 8 << 20
+
+def copy_zip_entry(zipf, info, file_path):
+    # The size lets zipfile pick zip64 headers for large files only
+    info.file_size = os.path.getsize(file_path)
+    with open(file_path, 'rb') as source, zipf.open(info, 'w') as target:
+        shutil.copyfileobj(source, target, 1 << 20)
+
+def compress_zip_entry(file_path, compress_type, compresslevel=None):
+    """
+    The CRC, size and compressed bytes (a file object, at its start) of a file, compressed with
+    the compressor ZipFile would use. zlib, bz2 and lzma release the GIL, so several files
+    compress at once in threads.
+    """
+    compressor = zipfile._get_compressor(compress_type, compresslevel)
+    crc, size = 0, 0
+    data = tempfile.SpooledTemporaryFile(max_size=ZIP_SPOOL_SIZE)
+    try:
+        with open(file_path, 'rb') as source:
+            for chunk in iter(lambda: source.read(1 << 20), b''):
+                crc = zlib.crc32(chunk, crc)
+                size += len(chunk)
+                data.write(compressor.compress(chunk) if compressor else chunk)
+        if compressor:
+            data.write(compressor.flush())
+    except BaseException:
+        data.close()
+        raise
+    data.seek(0)
+    return crc, size, data
+
+def write_zip_entry(zipf, info, crc, size, data):
+    # What ZipFile.open(info, 'w') writes to a seekable file, for data compressed beforehand
+    with data:
+        data.seek(0, os.SEEK_END)
+        info.CRC, info.file_size, info.compress_size = crc, size, data.tell()
+        data.seek(0)
+        info.flag_bits = zipfile._MASK_COMPRESS_OPTION_1 if info.compress_type == zipfile.ZIP_LZMA else 0
+        zipf._writecheck(info)
+        zipf._didModify = True
+        info.header_offset = zipf.fp.tell()
+        zipf.fp.write(info.FileHeader(size * 1.05 > zipfile.ZIP64_LIMIT))
+        shutil.copyfileobj(data, zipf.fp, 1 << 20)
+    zipf.start_dir = zipf.fp.tell()
+    zipf.filelist.append(info)
+    zipf.NameToInfo[info.filename] = info
+
+def zip_project_folder(project_name, compression='deflate', compresslevel=None, workers=1):
+    """
+    Zip a project folder into projects/<project_name>.zip, with a <project_name>.zip.sha256 next
+    to it in sha256sum format. Entries are sorted, dated 1980-01-01 and get 644 or 755
+    permissions, so the same project always zips to the same bytes and hash.
+
+    :param project_name: The name of the Django project
+    :param compression: 'stored', 'deflate', 'bzip2' or 'lzma'
+    :param compresslevel: 0-9 for deflate, 1-9 for bzip2, None for the default level
+    :param workers: Threads compressing files at once, 0 for one per CPU. The archive is the
+        same whatever the number of threads. One thread writes through ZipFile.open().
+    :return: The path of the zip file
+    """
     # Find the folder with the specified project_name in the base directory
     project_folder = os.path.join(settings.BASE_DIR, project_name)
     if not os.path.exists(project_folder):
@@ -20,16 +126,211 @@ def zip_project_folder(project_name):
     # Define the file path for the zip file
     zip_file_path = os.path.join(projects_folder, f'{project_name}.zip')
 
-    # Create a zip file that contains the project folder
-    with zipfile.ZipFile(zip_file_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-        for root, _, files in os.walk(project_folder):
-            for file in files:
-                file_path = os.path.join(root, file)
-                rel_path = os.path.relpath(file_path, project_folder)
-                zipf.write(file_path, os.path.join(project_name, rel_path))
+    compress_type = ZIP_COMPRESSION[compression]
+    workers = workers or os.cpu_count() or 1
+
+    def entry_info(archive_path, file_path):
+        info = zipfile.ZipInfo(f'{project_name}/{archive_path}', ZIP_DATE_TIME)
+        info.compress_type = compress_type
+        # ZipInfo.compress_level is public from Python 3.13, _compresslevel before
+        setattr(info, 'compress_level' if hasattr(info, 'compress_level') else '_compresslevel', compresslevel)
+        info.create_system = 3
+        executable = os.stat(file_path).st_mode & 0o111
+        info.external_attr = (0o100755 if executable else 0o100644) << 16
+        return info
+
+    def write_entry(zipf, archive_path, file_path, compressed):
+        write_zip_entry(zipf, entry_info(archive_path, file_path), *compressed.result())
+
+    # Create a zip file that contains the project folder, the previous one is replaced once complete
+    with tempfile.NamedTemporaryFile(dir=projects_folder, suffix='.zip.tmp', delete=False) as zip_file:
+        try:
+            with zipfile.ZipFile(zip_file, 'w', compress_type, compresslevel=compresslevel) as zipf:
+                if workers == 1 or not THREADED_ZIP:
+                    for archive_path, file_path in project_files(project_folder):
+                        copy_zip_entry(zipf, entry_info(archive_path, file_path), file_path)
+                else:
+                    with ThreadPoolExecutor(max_workers=workers) as executor:
+                        # Files are compressed a few ahead of the one being written, in archive order
+                        pending = collections.deque()
+                        try:
+                            for archive_path, file_path in project_files(project_folder):
+                                pending.append((archive_path, file_path, executor.submit(compress_zip_entry, file_path, compress_type, compresslevel)))
+                                if len(pending) > 2 * workers:
+                                    write_entry(zipf, *pending.popleft())
+                            while pending:
+                                write_entry(zipf, *pending.popleft())
+                        finally:
+                            # Spooled entries left by a failure
+                            for _, _, compressed in pending:
+                                if not compressed.cancel() and compressed.exception() is None:
+                                    compressed.result()[2].close()
+        except BaseException:
+            zip_file.close()
+            os.remove(zip_file.name)
+            raise
+    os.replace(zip_file.name, zip_file_path)
+
+    # The content hash lets artifact stores skip uploading an archive they already have
+    with open(f'{zip_file_path}.sha256', 'w', encoding='utf-8') as hash_file:
+        hash_file.write(f'{file_sha256(zip_file_path)}  {project_name}.zip\n')
 
     return zip_file_path
 
+# ioctl cloning a file into another on Linux (copy-on-write, on btrfs, XFS and others)
+FICLONE = 0x40049409
+
+def generator_version():
+    """
+    A hash of the builder's code and the Django version, scaffold rendered by another version is
+    never reused.
+    """
+    import django
+    digest = hashlib.sha256(django.get_version().encode())
+    commands_folder = os.path.dirname(os.path.abspath(__file__))
+    for file_name in sorted(os.listdir(commands_folder)):
+        if file_name.endswith('.py'):
+            with open(os.path.join(commands_folder, file_name), 'rb') as source_file:
+                digest.update(source_file.read())
+    return digest.hexdigest()[:16]
+
+def link_file(source, destination, mode='reflink'):
+    """
+    Place the content of source at destination sharing its blocks where possible. mode 'reflink'
+    makes a copy-on-write clone when the filesystem supports it and a copy otherwise, 'link'
+    falls back to a hard link before copying, 'copy' always copies. An existing destination is
+    replaced, never written through. Returns how the file was placed: 'reflink', 'hardlink' or 'copy'.
+    """
+    if os.path.lexists(destination):
+        os.remove(destination)
+    if mode in ('reflink', 'link'):
+        try:
+            import fcntl
+            with open(source, 'rb') as source_file, open(destination, 'wb') as destination_file:
+                fcntl.ioctl(destination_file.fileno(), FICLONE, source_file.fileno())
+            os.chmod(destination, os.stat(source).st_mode & 0o777 | 0o200)
+            return 'reflink'
+        except (ImportError, OSError):
+            if os.path.exists(destination):
+                os.remove(destination)
+    if mode == 'link':
+        try:
+            os.link(source, destination)
+            return 'hardlink'
+        except OSError:
+            pass
+    shutil.copyfile(source, destination)
+    os.chmod(destination, os.stat(source).st_mode & 0o777 | 0o200)
+    return 'copy'
+
+class ScaffoldCache:
+    """
+    The parts of a project that are the same in every project built by this version of the
+    builder, rendered once into folder and placed into each project (see link_file). Cached
+    files are read-only and the placed files get their write permission back, but for hard links,
+    which share the cache's inode: editing one in place (after a chmod) changes the cache and
+    every project linked to it.
+    mode is 'reflink' (clones, copies where the filesystem has none), 'link' (clones or hard
+    links), 'copy' (cached but copied) or 'off' (rendered into every project).
+    """
+
+    def __init__(self, folder, mode='reflink'):
+        self.folder = folder
+        self.mode = mode
+        self.placed = collections.Counter()
+
+    def cached(self, name, render):
+        # Path of the cached file or folder name, rendered by render(path) the first time
+        path = os.path.join(self.folder, name)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            rendering = tempfile.mkdtemp(dir=os.path.dirname(path), prefix='.rendering-')
+            try:
+                render(os.path.join(rendering, 'content'))
+                for root, _, file_names in os.walk(rendering):
+                    for file_name in file_names:
+                        os.chmod(os.path.join(root, file_name), os.stat(os.path.join(root, file_name)).st_mode & 0o555)
+                # Another build may have rendered it meanwhile, either copy is the same
+                try:
+                    os.rename(os.path.join(rendering, 'content'), path)
+                except OSError:
+                    if not os.path.exists(path):
+                        raise
+            finally:
+                shutil.rmtree(rendering, ignore_errors=True)
+        return path
+
+    def place(self, source, destination):
+        os.makedirs(os.path.dirname(destination), exist_ok=True)
+        self.placed[link_file(source, destination, self.mode)] += 1
+
+    def write_file(self, name, destination, render):
+        """
+        Write the text render() returns at destination, through the cache file name.
+        """
+        def write(path):
+            with open(path, 'w') as cached_file:
+                cached_file.write(render())
+
+        if self.mode == 'off':
+            if os.path.lexists(destination):
+                os.remove(destination)
+            return write(destination)
+        self.place(self.cached(name, write), destination)
+
+    def write_folder(self, name, destination, render, replacements=None):
+        """
+        Fill destination with the files render(folder) writes into folder, through the cache
+        folder name. replacements ({text: replacement}) are applied to the names and contents of
+        the cached files, the files they change are written rather than linked.
+        """
+        if self.mode == 'off':
+            # Rendered for this project only, then written with the replacements like cached files
+            os.makedirs(os.path.dirname(destination), exist_ok=True)
+            rendering = tempfile.mkdtemp(dir=os.path.dirname(destination), prefix='.rendering-')
+            try:
+                render(os.path.join(rendering, 'content'))
+                self.copy_folder(os.path.join(rendering, 'content'), destination, replacements, link=False)
+            finally:
+                shutil.rmtree(rendering, ignore_errors=True)
+            return
+        self.copy_folder(self.cached(name, render), destination, replacements)
+
+    def copy_folder(self, folder, destination, replacements=None, link=True):
+        # The files of folder with the replacements applied, placed at destination when link and unchanged
+        for root, _, file_names in os.walk(folder):
+            for file_name in file_names:
+                source = os.path.join(root, file_name)
+                relative_path = os.path.relpath(source, folder)
+                with open(source, 'rb') as source_file:
+                    original = source_file.read()
+                content = original
+                for text, replacement in (replacements or {}).items():
+                    relative_path = relative_path.replace(text, replacement)
+                    content = content.replace(text.encode(), replacement.encode())
+                target = os.path.join(destination, relative_path)
+                if link and content == original:
+                    self.place(source, target)
+                    continue
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                if os.path.lexists(target):
+                    os.remove(target)
+                with open(target, 'wb') as target_file:
+                    target_file.write(content)
+                os.chmod(target, os.stat(source).st_mode & 0o777 | 0o200)
+                self.placed['rendered'] += 1
+
+    def prune(self):
+        # Scaffold of other builder versions, the projects built from it keep their links
+        parent = os.path.dirname(self.folder)
+        for name in os.listdir(parent) if os.path.isdir(parent) else []:
+            if os.path.join(parent, name) != self.folder:
+                shutil.rmtree(os.path.join(parent, name), ignore_errors=True)
+
+    def summary(self):
+        counts = ', '.join(f'{count} {method}' for method, count in sorted(self.placed.items()))
+        return f'Scaffold files from {self.folder}: {counts or "none"}'
+
 def generate_index_html_content():
     # Create the content for the index.html file with Bootstrap cards
     index_html_content = """
@@ -110,7 +411,818 @@ def generate_index_html_content():
     """
     return index_html_content
 
-def settings_content(project_name, schema_generated_apps):
+# OpenAPI schema of each schema field type, matching what the generated ModelSerializers accept and return
+OPENAPI_FIELD_TYPES = {
+    'AutoField': {'type': 'integer'},
+    'BigAutoField': {'type': 'integer'},
+    'BigIntegerField': {'type': 'integer', 'format': 'int64'},
+    'BinaryField': {'type': 'string', 'format': 'binary'},
+    'BooleanField': {'type': 'boolean'},
+    'CharField': {'type': 'string'},
+    'DateField': {'type': 'string', 'format': 'date'},
+    'DateTimeField': {'type': 'string', 'format': 'date-time'},
+    'DecimalField': {'type': 'string', 'format': 'decimal'},
+    'DurationField': {'type': 'string'},
+    'EmailField': {'type': 'string', 'format': 'email'},
+    'FileField': {'type': 'string', 'format': 'uri'},
+    'FilePathField': {'type': 'string'},
+    'FloatField': {'type': 'number'},
+    'GenericIPAddressField': {'type': 'string'},
+    'ImageField': {'type': 'string', 'format': 'uri'},
+    'IntegerField': {'type': 'integer'},
+    'JSONField': {},
+    'PositiveBigIntegerField': {'type': 'integer', 'minimum': 0},
+    'PositiveIntegerField': {'type': 'integer', 'minimum': 0},
+    'PositiveSmallIntegerField': {'type': 'integer', 'minimum': 0},
+    'SlugField': {'type': 'string', 'format': 'slug'},
+    'SmallIntegerField': {'type': 'integer'},
+    'TextField': {'type': 'string'},
+    'TimeField': {'type': 'string', 'format': 'time'},
+    'URLField': {'type': 'string', 'format': 'uri'},
+    'UUIDField': {'type': 'string', 'format': 'uuid'},
+}
+
+def openapi_field_schema(field):
+    field_type = field.get('fieldType')
+    attributes = field.get('attributes', {})
+    related_model = str(attributes.get('to', '')).split('.')[-1]
+    if field_type in ('ForeignKey', 'OneToOneField'):
+        schema = {'type': 'integer', 'description': f'Primary key of a {related_model}.'}
+    elif field_type == 'ManyToManyField':
+        schema = {'type': 'array', 'items': {'type': 'integer'}, 'description': f'Primary keys of {related_model} objects.'}
+    else:
+        schema = dict(OPENAPI_FIELD_TYPES.get(field_type, {'type': 'string'}))
+    if str(attributes.get('max_length', '')).isdigit():
+        schema['maxLength'] = int(attributes['max_length'])
+    # Same truthiness the models generator applies to attribute values
+    if attributes.get('null'):
+        schema['nullable'] = True
+    return schema
+
+def openapi_field_required(field):
+    attributes = field.get('attributes', {})
+    return not any(attributes.get(name) for name in ('null', 'blank', 'default'))
+
+def json_content(schema):
+    return {'application/json': {'schema': schema}}
+
+class SchemaStream:
+    """
+    Incremental reader of a JSON document: objects and arrays are walked member by member
+    and only the values asked for are decoded, so a schema file is never held whole in memory.
+    """
+    WHITESPACE = re.compile(r'[ \t\n\r]*')
+    # What may follow the part of a number decoded so far, up to the end of the buffer
+    NUMBER_TAIL = re.compile(r'[0-9.eE+-]*\Z')
+    decoder = json.JSONDecoder()
+
+    def __init__(self, stream_file, chunk_size=1 << 16):
+        self.file = stream_file
+        self.chunk_size = chunk_size
+        self.buffer = ''
+        self.pos = 0
+
+    def read_more(self, size=None):
+        # Drop the consumed text and append the next chunk, False at the end of the file
+        chunk = self.file.read(size or self.chunk_size)
+        if not chunk:
+            return False
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self):
+        while True:
+            self.pos = self.WHITESPACE.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self.read_more():
+                raise json.JSONDecodeError('Unexpected end of document', self.buffer, self.pos)
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise json.JSONDecodeError(f'Expecting {char!r}', self.buffer, self.pos)
+        self.pos += 1
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                # Incomplete value, read as much again as is buffered so long values decode in few attempts
+                if not self.read_more(max(self.chunk_size, len(self.buffer) - self.pos)):
+                    raise
+                continue
+            # A number running to the end of the buffer, maybe cut after '.', 'e' or a sign
+            # that it left undecoded, may go on in the next chunk
+            is_number = isinstance(value, (int, float)) and not isinstance(value, bool)
+            if is_number and self.NUMBER_TAIL.match(self.buffer, end) and self.read_more():
+                continue
+            self.pos = end
+            return value
+
+    def members(self):
+        # Keys of the object at the current position, the caller reads each value
+        self.expect('{')
+        if self.peek() == '}':
+            self.pos += 1
+            return
+        while True:
+            key = self.value()
+            self.expect(':')
+            yield key
+            if self.peek() == '}':
+                self.pos += 1
+                return
+            self.expect(',')
+
+    def items(self):
+        # One step per element of the array at the current position, the caller reads each element
+        self.expect('[')
+        if self.peek() == ']':
+            self.pos += 1
+            return
+        while True:
+            yield
+            if self.peek() == ']':
+                self.pos += 1
+                return
+            self.expect(',')
+
+    def end(self):
+        # Read the rest of the file after the document, which may only be whitespace
+        while True:
+            self.pos = self.WHITESPACE.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer):
+                raise json.JSONDecodeError('Extra data', self.buffer, self.pos)
+            if not self.read_more():
+                return
+
+def iter_schema(path, chunk_size=1 << 16):
+    """
+    Read a schema file as a stream of ('projectName', None, name), ('app', app name, None) and
+    ('model', app name, model schema) events, in file order. One model is decoded at a time.
+    Anything but whitespace after the document raises JSONDecodeError once it is read.
+    """
+    with open(path, 'r', encoding='utf-8') as schema_file:
+        stream = SchemaStream(schema_file, chunk_size)
+        for key in stream.members():
+            if key == 'projectName':
+                yield 'projectName', None, stream.value()
+            elif key == 'apps':
+                for _ in stream.items():
+                    yield from iter_schema_app(stream)
+            else:
+                stream.value()
+        stream.end()
+
+def iter_schema_app(stream):
+    app_name, pending = None, []
+    for key in stream.members():
+        if key == 'appName':
+            app_name = stream.value()
+            yield 'app', app_name, None
+            # Models listed before the app's name wait for it
+            for model_schema in pending:
+                yield 'model', app_name, model_schema
+            pending = None
+        elif key == 'models':
+            for _ in stream.items():
+                if pending is None:
+                    yield 'model', app_name, stream.value()
+                else:
+                    pending.append(stream.value())
+        else:
+            stream.value()
+    if pending is not None:
+        yield 'app', None, None
+        for model_schema in pending:
+            yield 'model', None, model_schema
+
+def schema_project_name(path):
+    for kind, _, value in iter_schema(path):
+        if kind == 'projectName':
+            return value
+    return None
+
+def iter_schema_apps(path, chunk_size=1 << 16):
+    # The apps of a schema file one at a time, each with its models
+    app = None
+    for kind, app_name, value in iter_schema(path, chunk_size):
+        if kind == 'app':
+            if app is not None:
+                yield app
+            app = {'appName': app_name, 'models': []}
+        elif kind == 'model':
+            app['models'].append(value)
+    if app is not None:
+        yield app
+
+class SchemaApps:
+    """
+    The apps of a schema file, streamed again from the file on every iteration so that only
+    the app being generated is in memory. Aggregates look their related models up by label,
+    those models are indexed on first use.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.aggregate_targets = None
+
+    def __iter__(self):
+        return iter_schema_apps(self.path)
+
+    def find_model_schema(self, label):
+        if self.aggregate_targets is None:
+            labels = set()
+            for kind, app_name, model_schema in iter_schema(self.path):
+                if kind == 'model':
+                    for declaration in model_schema.get('aggregates', []):
+                        target = str(declaration.get('model', ''))
+                        labels.add(target if '.' in target else f'{app_name}.{target}')
+            self.aggregate_targets = {}
+            if labels:
+                for kind, app_name, model_schema in iter_schema(self.path):
+                    if kind == 'model' and f"{app_name}.{model_schema.get('modelName')}" in labels:
+                        self.aggregate_targets[f"{app_name}.{model_schema.get('modelName')}"] = model_schema
+        return self.aggregate_targets.get(label)
+
+class SchemaCopy(SchemaStream):
+    """
+    SchemaStream writing the document it reads to output as it goes, with the values passed
+    to replace_value rewritten on the way. finish copies the rest of the document.
+    """
+
+    def __init__(self, stream_file, output, chunk_size=1 << 16):
+        super().__init__(stream_file, chunk_size)
+        self.output = output
+        self.copied = 0
+
+    def read_more(self, size=None):
+        self.output.write(self.buffer[self.copied:self.pos])
+        self.copied = self.pos
+        if not super().read_more(size):
+            return False
+        self.copied = 0
+        return True
+
+    def replace_value(self, replace):
+        # replace(value, original text) returns the text written in place of the value
+        self.peek()
+        self.output.write(self.buffer[self.copied:self.pos])
+        self.copied = self.pos
+        value = self.value()
+        original = self.buffer[self.copied:self.pos]
+        self.copied = self.pos
+        self.output.write(replace(value, original))
+
+    def finish(self):
+        self.output.write(self.buffer[self.copied:])
+        self.copied = len(self.buffer)
+        shutil.copyfileobj(self.file, self.output)
+
+def dumps_like(value, original):
+    # JSON text of value, formatted like the text it replaces: compact, or indented from its column
+    if '\n' not in original:
+        return json.dumps(value)
+    lines = original.split('\n')
+    margin = lines[-1][:len(lines[-1]) - len(lines[-1].lstrip())]
+    indent = len(lines[1]) - len(lines[1].lstrip()) - len(margin)
+    return json.dumps(value, indent=max(indent, 1)).replace('\n', '\n' + margin)
+
+# Pointers into one app of a schema, '/apps/3/models/0/fields/-'
+APP_POINTER = re.compile(r'^/apps/(0|[1-9][0-9]*)(/.*)?$')
+
+def app_operations(operations):
+    """
+    The operations of a patch grouped by the app they change, with paths relative to that app:
+    {app index: [operations]}. None when an operation adds, removes or moves whole apps, spans
+    two apps or changes the document outside its apps, as every app after it is affected.
+    """
+    patches = {}
+    for operation in operations:
+        matches = [APP_POINTER.match(operation[key]) for key in ('path', 'from') if key in operation]
+        if not all(matches) or len({match.group(1) for match in matches}) != 1:
+            return None
+        relative = dict(operation, path=matches[0].group(2) or '')
+        if 'from' in operation:
+            relative['from'] = matches[1].group(2) or ''
+        if (relative['path'] == '' and operation['op'] not in ('replace', 'test')) or relative.get('from') == '' and operation['op'] == 'move':
+            return None
+        patches.setdefault(int(matches[0].group(1)), []).append(relative)
+    return patches
+
+def patch_schema_file(path, operations):
+    """
+    Apply a JSON Patch (RFC 6902) to a schema file. Returns the names of the apps it changed,
+    {'*'} when it changed the project itself.
+    A patch that stays within existing apps is applied while streaming the file: only those
+    apps are decoded and rewritten, the rest of the file is copied as it is. Other patches
+    are applied to the whole document.
+    """
+    from app_builder.jsonpatch import JsonPatchError, apply_patch, validate_patch
+    validate_patch(operations)
+    patches = app_operations(operations)
+    changed = set()
+    with tempfile.NamedTemporaryFile('w', encoding='utf-8', dir=os.path.dirname(path), suffix='.patch', delete=False) as output:
+        try:
+            with open(path, 'r', encoding='utf-8') as schema_file:
+                if patches is None:
+                    document = json.load(schema_file)
+                    patched = apply_patch(document, operations)
+                    if not isinstance(patched, dict):
+                        raise JsonPatchError('A schema is a JSON object')
+                    json.dump(patched, output, indent=4)
+                    if patched.get('projectName') != document.get('projectName'):
+                        changed.add('*')
+                    old_apps = {app.get('appName'): app for app in document.get('apps', [])}
+                    new_apps = {app.get('appName'): app for app in patched.get('apps', [])}
+                    changed |= {name for name in old_apps.keys() | new_apps.keys() if old_apps.get(name) != new_apps.get(name)}
+                else:
+                    def patch_app(app, original):
+                        try:
+                            patched = apply_patch(app, patches[index])
+                        except JsonPatchError as error:
+                            raise JsonPatchError(f'{error} of /apps/{index}') from error
+                        if not isinstance(patched, dict):
+                            raise JsonPatchError(f'App {index} of the schema is a JSON object')
+                        changed.update({app.get('appName'), patched.get('appName')})
+                        return dumps_like(patched, original)
+
+                    stream = SchemaCopy(schema_file, output)
+                    count = 0
+                    for key in stream.members():
+                        if key != 'apps':
+                            stream.value()
+                            continue
+                        for _ in stream.items():
+                            index = count
+                            count += 1
+                            if index in patches:
+                                stream.replace_value(patch_app)
+                            else:
+                                stream.value()
+                    stream.finish()
+                    if patches and max(patches) >= count:
+                        raise JsonPatchError(f'Array index {max(patches)} out of range in /apps')
+        except BaseException:
+            output.close()
+            os.remove(output.name)
+            raise
+    os.replace(output.name, path)
+    return changed
+
+def file_etag(path):
+    return file_sha256(path)[:16]
+
+def read_dirty_apps(path, etag=None):
+    """
+    The apps of a schema file changed by patches since its last build, recorded next to it in
+    <schema>.dirty along with the ETag of the file they describe. None when unknown: the file was
+    never built, was saved whole or edited by hand since.
+    """
+    try:
+        with open(f'{path}.dirty', 'r', encoding='utf-8') as dirty_file:
+            state = json.load(dirty_file)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    if state.get('etag') != (etag or file_etag(path)) or '*' in state.get('apps', ['*']):
+        return None
+    return set(state['apps'])
+
+def write_dirty_apps(path, app_names):
+    with open(f'{path}.dirty', 'w', encoding='utf-8') as dirty_file:
+        json.dump({'etag': file_etag(path), 'apps': sorted(app_names)}, dirty_file)
+
+# Functions a schema aggregate may use, and the relations it may aggregate over
+AGGREGATE_FUNCTIONS = ('Count', 'Sum', 'Avg', 'Min', 'Max')
+AGGREGATE_RELATION_TYPES = ('ForeignKey', 'OneToOneField', 'ManyToManyField')
+INTEGER_FIELD_TYPES = ('AutoField', 'BigAutoField', 'BigIntegerField', 'IntegerField', 'PositiveBigIntegerField',
+                       'PositiveIntegerField', 'PositiveSmallIntegerField', 'SmallIntegerField')
+
+def find_model_schema(apps, label):
+    if isinstance(apps, SchemaApps):
+        return apps.find_model_schema(label)
+    app_label, _, model_name = label.partition('.')
+    for app in apps:
+        if app.get('appName') != app_label:
+            continue
+        for model_schema in app.get('models', []):
+            if model_schema.get('modelName') == model_name:
+                return model_schema
+    return None
+
+def resolve_aggregates(app_name, model_schema, apps):
+    """
+    The aggregates declared by a model schema, e.g.
+    {"name": "product_count", "function": "Count", "model": "Product", "relation": "category"}:
+    function ("Count", "Sum", "Avg", "Min" or "Max") of field over the rows of model whose
+    relation (a foreign key or many-to-many field) points at this model.
+    Returns (aggregates, errors). Each aggregate is a dict with the name, function, model label
+    ('App.Model'), relation, field and the aggregated field's schema (None when unknown).
+    Declarations with an error are left out.
+    """
+    model_name = model_schema.get('modelName', 'DefaultModel')
+    field_names = {field['fieldName'] for field in model_schema.get('fields', [])} | {'id'}
+    aggregates, errors = [], []
+    for declaration in model_schema.get('aggregates', []):
+        name = declaration.get('name', '')
+        function = declaration.get('function', 'Count')
+        label = declaration.get('model', '')
+        if '.' not in label:
+            label = f'{app_name}.{label}'
+        relation = declaration.get('relation', '')
+        field = declaration.get('field') or None
+        where = f'{app_name}.{model_name} aggregate "{name}"'
+        if not name.isidentifier() or name in field_names:
+            errors.append(f'{where}: the name must be an identifier distinct from the model fields')
+            continue
+        if function not in AGGREGATE_FUNCTIONS:
+            errors.append(f'{where}: function must be one of {", ".join(AGGREGATE_FUNCTIONS)}')
+            continue
+        if function != 'Count' and field is None:
+            errors.append(f'{where}: {function} needs a field to aggregate')
+            continue
+        field_schema = None
+        related_schema = find_model_schema(apps, label)
+        if related_schema is not None:
+            related_fields = {related['fieldName']: related for related in related_schema.get('fields', [])}
+            relation_schema = related_fields.get(relation, {})
+            target = str(relation_schema.get('attributes', {}).get('to', ''))
+            if '.' not in target:
+                target = f"{label.split('.')[0]}.{target}"
+            if relation_schema.get('fieldType') not in AGGREGATE_RELATION_TYPES or target != f'{app_name}.{model_name}':
+                errors.append(f'{where}: {label}.{relation} is not a relation to {model_name}')
+                continue
+            if field is not None and field not in related_fields and field != 'id':
+                errors.append(f'{where}: {label} has no field {field}')
+                continue
+            field_schema = related_fields.get(field)
+        aggregates.append({'name': name, 'function': function, 'model': label, 'relation': relation,
+                           'field': field, 'field_schema': field_schema})
+    return aggregates, errors
+
+def index_name(app_name, model_name, fields):
+    # Index names are limited to 30 characters and unique per database
+    digest = hashlib.md5(f'{app_name}.{model_name}.{",".join(fields)}'.encode()).hexdigest()[:8]
+    return f'{model_name.lower()[:10]}_{fields[0].lstrip("-").lower()[:8]}_{digest}'
+
+def resolve_indexes(app_name, model_schema):
+    """
+    The database indexes declared by a model schema, e.g. "indexes": [["category", "-released"]]:
+    one list of field names per index, a leading "-" sorts the column descending.
+    Returns (indexes, errors), each index a dict with its generated name and fields.
+    Declarations with an error are left out.
+    """
+    model_name = model_schema.get('modelName', 'DefaultModel')
+    field_types = {field['fieldName']: field.get('fieldType') for field in model_schema.get('fields', [])}
+    field_types['id'] = 'BigAutoField'
+    indexes, errors = [], []
+    for fields in model_schema.get('indexes', []):
+        where = f'{app_name}.{model_name} index {fields}'
+        if isinstance(fields, str):
+            fields = [fields]
+        if not fields or any(not isinstance(field, str) or field.lstrip('-') not in field_types for field in fields):
+            errors.append(f'{where}: every entry must be a field of {model_name}')
+            continue
+        if any(field_types[field.lstrip('-')] == 'ManyToManyField' for field in fields):
+            errors.append(f'{where}: many-to-many fields have no column to index')
+            continue
+        name = index_name(app_name, model_name, fields)
+        if any(index['name'] == name for index in indexes):
+            errors.append(f'{where}: declared twice')
+            continue
+        indexes.append({'name': name, 'fields': list(fields)})
+    return indexes, errors
+
+def aggregate_serializer_field(aggregate):
+    # Read-only serializer field rendering an aggregate like the aggregated field would be rendered
+    field_schema = aggregate['field_schema'] or {}
+    field_type = field_schema.get('fieldType')
+    if aggregate['function'] == 'Count' or (aggregate['function'] != 'Avg' and field_type in INTEGER_FIELD_TYPES):
+        return 'serializers.IntegerField(read_only=True)'
+    if aggregate['function'] == 'Avg' or field_type == 'FloatField':
+        return 'serializers.FloatField(read_only=True)'
+    if field_type == 'DecimalField':
+        decimal_places = field_schema.get('attributes', {}).get('decimal_places') or 2
+        return f'serializers.DecimalField(max_digits=None, decimal_places={decimal_places}, read_only=True)'
+    return 'serializers.ReadOnlyField()'
+
+def openapi_aggregate_schema(aggregate):
+    serializer_field = aggregate_serializer_field(aggregate)
+    if 'IntegerField' in serializer_field:
+        schema = {'type': 'integer'}
+    elif 'FloatField' in serializer_field:
+        schema = {'type': 'number'}
+    elif aggregate['field_schema']:
+        schema = dict(OPENAPI_FIELD_TYPES.get(aggregate['field_schema'].get('fieldType'), {'type': 'string'}))
+    else:
+        schema = {}
+    model_name = aggregate['model'].split('.')[-1]
+    if aggregate['function'] == 'Count':
+        schema['description'] = f"Number of {model_name} rows whose {aggregate['relation']} is this object."
+    else:
+        schema['description'] = f"{aggregate['function']} of {aggregate['field']} over the {model_name} rows whose {aggregate['relation']} is this object."
+    schema['readOnly'] = True
+    # Count and Sum of no rows are 0, the other functions have no value
+    if aggregate['function'] not in ('Count', 'Sum'):
+        schema['nullable'] = True
+    return schema
+
+def openapi_model_paths(app_name, model_name, async_target=False, searchable=False):
+    prefix = f'/{app_name}/{model_name.lower()}s/'
+    model_ref = {'$ref': f'#/components/schemas/{model_name}'}
+    list_ref = {'$ref': f'#/components/schemas/{model_name}List'}
+    id_parameter = {'name': 'id', 'in': 'path', 'required': True, 'schema': {'type': 'integer'}}
+    read_parameters = [{'$ref': '#/components/parameters/fields'}, {'$ref': '#/components/parameters/expand'}]
+    errors = {'400': {'description': 'Validation errors.'}}
+    not_found = {'404': {'description': 'Not found.'}}
+    bulk_errors = {'400': {'description': 'Per-item validation errors, nothing was written.', 'content': json_content({'$ref': '#/components/schemas/BulkErrors'})}}
+    tags = [app_name]
+
+    paths = {
+        prefix: {
+            'get': {'operationId': f'{app_name}_{model_name}_list', 'tags': tags, 'parameters': read_parameters,
+                    'responses': {'200': {'description': f'All {model_name} objects.', 'content': json_content({'type': 'array', 'items': list_ref})}}},
+            'post': {'operationId': f'{app_name}_{model_name}_create', 'tags': tags, 'requestBody': {'required': True, 'content': json_content(model_ref)},
+                     'responses': {'201': {'description': f'The created {model_name}.', 'content': json_content(model_ref)}, **errors}},
+        },
+        prefix + '{id}/': {
+            'parameters': [id_parameter],
+            'get': {'operationId': f'{app_name}_{model_name}_read', 'tags': tags, 'parameters': read_parameters,
+                    'responses': {'200': {'description': f'A {model_name}.', 'content': json_content(model_ref)}, **not_found}},
+            'put': {'operationId': f'{app_name}_{model_name}_update', 'tags': tags, 'requestBody': {'required': True, 'content': json_content(model_ref)},
+                    'responses': {'200': {'description': f'The updated {model_name}.', 'content': json_content(model_ref)}, **errors, **not_found}},
+            'patch': {'operationId': f'{app_name}_{model_name}_partial_update', 'tags': tags, 'requestBody': {'required': True, 'content': json_content(model_ref)},
+                      'responses': {'200': {'description': f'The updated {model_name}.', 'content': json_content(model_ref)}, **errors, **not_found}},
+            'delete': {'operationId': f'{app_name}_{model_name}_delete', 'tags': tags, 'responses': {'204': {'description': 'Deleted.'}, **not_found}},
+        },
+        prefix + 'bulk/': {
+            'parameters': [{'$ref': '#/components/parameters/batch_size'}],
+            'post': {'operationId': f'{app_name}_{model_name}_bulk_create', 'tags': tags,
+                     'requestBody': {'required': True, 'content': json_content({'type': 'array', 'items': model_ref})},
+                     'responses': {'201': {'description': 'Number and primary keys of the created objects.'}, **bulk_errors}},
+            'patch': {'operationId': f'{app_name}_{model_name}_bulk_update', 'tags': tags,
+                      'requestBody': {'required': True, 'content': json_content({'type': 'array', 'items': {'allOf': [model_ref], 'required': ['id']}})},
+                      'responses': {'200': {'description': 'Number of updated objects.'}, **bulk_errors}},
+            'delete': {'operationId': f'{app_name}_{model_name}_bulk_delete', 'tags': tags,
+                       'requestBody': {'required': True, 'content': json_content({'type': 'array', 'items': {'type': 'integer'}})},
+                       'responses': {'200': {'description': 'Number of deleted objects.'}, **bulk_errors}},
+        },
+        prefix + 'export/csv/': {
+            'get': {'operationId': f'{app_name}_{model_name}_export_csv', 'tags': tags, 'parameters': read_parameters[:1],
+                    'responses': {'200': {'description': 'Every row as CSV, streamed.', 'content': {'text/csv': {'schema': {'type': 'string'}}}}}},
+        },
+        prefix + 'export/ndjson/': {
+            'get': {'operationId': f'{app_name}_{model_name}_export_ndjson', 'tags': tags, 'parameters': read_parameters[:1],
+                    'responses': {'200': {'description': 'Every row as one JSON object per line, streamed.', 'content': {'application/x-ndjson': {'schema': {'type': 'string'}}}}}},
+        },
+    }
+    if searchable:
+        paths[prefix + 'search/'] = {
+            'get': {
+                'operationId': f'{app_name}_{model_name}_search', 'tags': tags,
+                'parameters': [
+                    {'name': 'q', 'in': 'query', 'required': True, 'schema': {'type': 'string'},
+                     'description': 'Words to find in the searchable fields, the last one matches as a prefix.'},
+                    {'name': 'limit', 'in': 'query', 'schema': {'type': 'integer', 'default': 20, 'maximum': 100}},
+                    {'name': 'offset', 'in': 'query', 'schema': {'type': 'integer', 'default': 0}},
+                    read_parameters[0],
+                ],
+                'responses': {'200': {'description': 'Matching rows, best ranked first.', 'content': json_content({
+                    'type': 'object',
+                    'properties': {
+                        'count': {'type': 'integer'},
+                        'results': {'type': 'array', 'items': {'allOf': [list_ref, {
+                            'type': 'object', 'properties': {'rank': {'type': 'number'}},
+                        }]}},
+                    },
+                })}},
+            },
+        }
+    if async_target:
+        async_prefix = f'/{app_name}/async/{model_name.lower()}s/'
+        page_parameters = [
+            {'name': 'limit', 'in': 'query', 'schema': {'type': 'integer'}, 'description': 'Page size, the total is returned in X-Total-Count.'},
+            {'name': 'offset', 'in': 'query', 'schema': {'type': 'integer'}},
+        ]
+        paths[async_prefix] = {
+            'get': {**paths[prefix]['get'], 'operationId': f'{app_name}_{model_name}_async_list', 'parameters': page_parameters},
+            'post': {**paths[prefix]['post'], 'operationId': f'{app_name}_{model_name}_async_create'},
+        }
+        paths[async_prefix + '{id}/'] = {
+            'parameters': [id_parameter],
+            **{
+                method: {**operation, 'operationId': operation['operationId'].replace(f'{model_name}_', f'{model_name}_async_', 1), 'parameters': []}
+                for method, operation in paths[prefix + '{id}/'].items() if method != 'parameters'
+            },
+        }
+    return paths
+
+def openapi_model_document(app_name, model_schema, apps, async_target=False, timestamps=False):
+    # The component schemas and paths a model adds to the OpenAPI document
+    model_name = model_schema.get('modelName', 'DefaultModel')
+    fields = model_schema.get('fields', [])
+    properties = {'id': {'type': 'integer', 'readOnly': True}}
+    properties.update({field['fieldName']: openapi_field_schema(field) for field in fields})
+    # The updated_at field --timestamps adds, unless the schema declares its own
+    if timestamps and 'updated_at' not in properties:
+        properties['updated_at'] = {'type': 'string', 'format': 'date-time', 'readOnly': True}
+    aggregates, _ = resolve_aggregates(app_name, model_schema, apps)
+    properties.update({aggregate['name']: openapi_aggregate_schema(aggregate) for aggregate in aggregates})
+    properties.update({
+        f"{field['fieldName']}_thumbnail": {'type': 'string', 'format': 'uri', 'nullable': True, 'readOnly': True}
+        for field in fields if field.get('fieldType') == 'ImageField'
+    })
+    required = [field['fieldName'] for field in fields if openapi_field_required(field)]
+    list_properties = {name: schema for name, schema in properties.items() if schema.get('type') != 'array'}
+    schemas = {
+        model_name: {'type': 'object', 'properties': properties, 'required': required},
+        f'{model_name}List': {'type': 'object', 'properties': list_properties},
+    }
+    searchable = any(field.get('searchable') for field in fields)
+    return schemas, openapi_model_paths(app_name, model_name, async_target, searchable)
+
+def build_openapi_document(project_name, apps, async_target=False, timestamps=False):
+    """
+    Build the OpenAPI 3 document of a generated project from its schema, so the
+    project can serve it as a static file instead of introspecting views per request.
+    """
+    schemas = {
+        'BulkErrors': {
+            'type': 'object',
+            'properties': {'errors': {'type': 'array', 'items': {
+                'type': 'object',
+                'properties': {'index': {'type': 'integer'}, 'errors': {'type': 'object'}},
+            }}},
+        },
+        'Login': {
+            'type': 'object',
+            'properties': {'username': {'type': 'string'}, 'email': {'type': 'string', 'format': 'email'}, 'password': {'type': 'string'}},
+            'required': ['password'],
+        },
+        'Registration': {
+            'type': 'object',
+            'properties': {'username': {'type': 'string'}, 'email': {'type': 'string', 'format': 'email'},
+                           'password1': {'type': 'string'}, 'password2': {'type': 'string'}},
+            'required': ['username', 'password1', 'password2'],
+        },
+    }
+    paths = {
+        '/dj-rest-auth/login/': {'post': {'operationId': 'auth_login', 'tags': ['Authentication'],
+                                          'requestBody': {'required': True, 'content': json_content({'$ref': '#/components/schemas/Login'})},
+                                          'responses': {'200': {'description': 'Token for the authenticated user.'}, '400': {'description': 'Invalid credentials.'}}}},
+        '/dj-rest-auth/logout/': {'post': {'operationId': 'auth_logout', 'tags': ['Authentication'], 'responses': {'200': {'description': 'Logged out.'}}}},
+        '/dj-rest-auth/user/': {'get': {'operationId': 'auth_user', 'tags': ['Authentication'], 'responses': {'200': {'description': 'The authenticated user.'}}}},
+        '/dj-rest-auth/registration/': {'post': {'operationId': 'auth_register', 'tags': ['Authentication'],
+                                                 'requestBody': {'required': True, 'content': json_content({'$ref': '#/components/schemas/Registration'})},
+                                                 'responses': {'201': {'description': 'Registered.'}, '400': {'description': 'Validation errors.'}}}},
+    }
+
+    for app in apps:
+        for model_schema in app.get('models', []):
+            model_schemas, model_paths = openapi_model_document(app.get('appName'), model_schema, apps, async_target, timestamps)
+            schemas.update(model_schemas)
+            paths.update(model_paths)
+
+    return {
+        'openapi': '3.0.3',
+        'info': {'title': f'{project_name} API Docs', 'version': 'v2'},
+        'paths': paths,
+        'components': {
+            'schemas': schemas,
+            'parameters': {
+                'fields': {'name': 'fields', 'in': 'query', 'schema': {'type': 'string'},
+                           'description': 'Comma separated fields to return, or -field to leave a field out.'},
+                'expand': {'name': 'expand', 'in': 'query', 'schema': {'type': 'string'},
+                           'description': 'Comma separated relations to nest instead of returning their primary key.'},
+                'batch_size': {'name': 'batch_size', 'in': 'query', 'schema': {'type': 'integer'},
+                               'description': 'Rows per database statement.'},
+            },
+            'securitySchemes': {
+                'Token': {'type': 'apiKey', 'in': 'header', 'name': 'Authorization',
+                          'description': 'Token authentication, "Token <key>".'},
+            },
+        },
+        'security': [{}, {'Token': []}],
+    }
+
+def write_openapi_document(openapi_file, project_name, apps, async_target=False, timestamps=False):
+    """
+    Write the document build_openapi_document returns (indented by 2) one model at a time,
+    apps are read twice, once for the paths and once for the component schemas.
+    """
+    document = build_openapi_document(project_name, [], async_target=async_target)
+    # Placeholders closing the paths and schemas objects mark where the models' members go
+    document['paths']['\0'] = None
+    document['components']['schemas']['\0'] = None
+    text = json.dumps(document, indent=2)
+    placeholder = '"\\u0000": null'
+    for part in (1, 0):
+        position = text.index(placeholder)
+        line_start = text.rindex('\n', 0, position) + 1
+        padding = ' ' * (position - line_start - 2)
+        # Drop the ",\n" before the placeholder, each model member brings its own
+        openapi_file.write(text[:line_start - 2])
+        for app in apps:
+            for model_schema in app.get('models', []):
+                members = openapi_model_document(app.get('appName'), model_schema, apps, async_target, timestamps)[part]
+                for key, value in members.items():
+                    # json.dumps of {key: value} without its braces, indented like the placeholder
+                    lines = json.dumps({key: value}, indent=2)[2:-2].split('\n')
+                    openapi_file.write(',\n' + '\n'.join(padding + line for line in lines))
+        text = text[position + len(placeholder):]
+    openapi_file.write(text)
+
+def generate_swagger_html_content(project_name):
+    # Swagger UI page served at /docs/, using the swagger-ui assets shipped with drf-yasg
+    return f'''{{% load static %}}
+<!DOCTYPE html>
+<html>
+<head>
+  <title>{project_name} API Docs</title>
+  <link rel="stylesheet" href="{{% static 'drf-yasg/swagger-ui-dist/swagger-ui.css' %}}">
+</head>
+<body>
+  <div id="swagger-ui"></div>
+  <script src="{{% static 'drf-yasg/swagger-ui-dist/swagger-ui-bundle.js' %}}"></script>
+  <script src="{{% static 'drf-yasg/swagger-ui-dist/swagger-ui-standalone-preset.js' %}}"></script>
+  <script>
+    window.ui = SwaggerUIBundle({{
+      url: "{{{{ spec_url }}}}",
+      dom_id: "#swagger-ui",
+      presets: [SwaggerUIBundle.presets.apis, SwaggerUIStandalonePreset],
+      layout: "StandaloneLayout",
+    }});
+  </script>
+</body>
+</html>
+'''
+
+def docs_content():
+    # Content of the docs.py module serving the prebuilt openapi.json and Swagger UI
+    return '''
+import hashlib
+import os
+from functools import lru_cache, wraps
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.shortcuts import render
+from django.urls import reverse
+from django.utils.cache import patch_cache_control
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition, require_safe
+
+# Written by the builder next to manage.py, it never changes while the process runs
+OPENAPI_PATH = os.path.join(settings.BASE_DIR, 'openapi.json')
+
+
+@lru_cache(maxsize=None)
+def openapi_document():
+    with open(OPENAPI_PATH, 'rb') as openapi_file:
+        content = openapi_file.read()
+    return content, hashlib.sha256(content).hexdigest()[:16]
+
+
+def document_etag(request):
+    return openapi_document()[1]
+
+
+def versioned_cache_control(view):
+    """
+    Responses (304s included) to URLs whose ?v= is the hash of the current document are kept
+    for a year: the docs page links it so, and a rebuild changes the URL. Any other URL, a plain
+    /openapi.json or the hash of a previous build, is revalidated with its ETag on every use.
+    """
+    @wraps(view)
+    def wrapped(request, *args, **kwargs):
+        response = view(request, *args, **kwargs)
+        if request.GET.get('v') == openapi_document()[1]:
+            patch_cache_control(response, public=True, max_age=31536000, immutable=True)
+        else:
+            patch_cache_control(response, public=True, no_cache=True)
+        return response
+    return wrapped
+
+
+@require_safe
+@versioned_cache_control
+@condition(etag_func=document_etag)
+def openapi_json(request):
+    return HttpResponse(openapi_document()[0], content_type='application/json')
+
+
+@require_safe
+@condition(etag_func=document_etag)
+@cache_control(public=True, max_age=3600)
+def swagger_ui(request):
+    spec_url = f"{reverse('openapi')}?v={openapi_document()[1]}"
+    return render(request, 'swagger.html', {'spec_url': spec_url})
+'''
+
+def settings_content(project_name, schema_generated_apps, cache_backend=None, async_target=False, profile='dev', database='sqlite', replica=False):
 
     jazzmin_settings_content = f'''
 JAZZMIN_SETTINGS = {{
@@ -189,6 +1301,151 @@ JAZZMIN_TWEAKS = {{
         }}
     ]
 }}
+'''
+    # Response cache used by the generated CachedReadMixin
+    cache_settings_content = ''
+    if cache_backend == 'file':
+        cache_settings_content = '''
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(BASE_DIR, 'cache'),
+    },
+}
+'''
+    elif cache_backend == 'redis':
+        cache_settings_content = '''
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ.get('DJANGO_REDIS_URL', 'redis://127.0.0.1:6379/1'),
+    },
+}
+'''
+    elif cache_backend == 'locmem':
+        cache_settings_content = f'''
+# The local-memory cache is per process, model changes only invalidate the entries of the
+# process saving them: gunicorn.conf.py refuses to start several workers with it
+CACHES = {{
+    'default': {{
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': '{project_name}',
+    }},
+}}
+'''
+    if cache_settings_content:
+        cache_settings_content += '''
+# Seconds a cached list/retrieve response is kept, model changes invalidate it earlier
+API_CACHE_TIMEOUT = 300
+'''
+    # daphne must come first so its runserver (ASGI) replaces Django's (WSGI)
+    server_apps_content = "    'daphne',\n" if async_target else ''
+    server_settings_content = f"WSGI_APPLICATION = '{project_name}.wsgi.application'\n"
+    if async_target:
+        server_settings_content = f"ASGI_APPLICATION = '{project_name}.asgi.application'\n" + server_settings_content
+    # The dev profile keeps everything in the file, production reads secrets and hosts from the environment
+    production = profile == 'production'
+    if production:
+        security_settings_content = '''SECRET_KEY = os.environ['DJANGO_SECRET_KEY']
+
+DEBUG = os.environ.get('DJANGO_DEBUG', '') == '1'
+
+ALLOWED_HOSTS = [host for host in os.environ.get('DJANGO_ALLOWED_HOSTS', 'localhost,127.0.0.1').split(',') if host]
+'''
+        # Compress responses before any other middleware handles the body
+        compression_middleware_content = "    'django.middleware.gzip.GZipMiddleware',\n"
+        # Templates are compiled once per process instead of on every render
+        templates_loading_content = '''        'APP_DIRS': False,
+        'OPTIONS': {
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
+'''
+        # Reuse connections across requests, checked before reuse after an idle period
+        connection_settings_content = '''        'CONN_MAX_AGE': int(os.environ.get('DJANGO_CONN_MAX_AGE', '60')),
+        'CONN_HEALTH_CHECKS': True,
+'''
+        storage_settings_content = f'''
+# Hashed file names (cacheable forever) with a gzip copy of each text asset, written by
+# collectstatic for the front-end server (e.g. nginx gzip_static) to serve from STATIC_ROOT
+STORAGES = {{
+    'default': {{
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    }},
+    'staticfiles': {{
+        'BACKEND': '{project_name}.storage.CompressedManifestStaticFilesStorage',
+    }},
+}}
+'''
+    else:
+        security_settings_content = '''SECRET_KEY = 'django-insecure-i7w8dm6ml*(ii@e&#f-fw23i0$!9izhthjm=y#dgi!!lu2(p+g'
+
+# SECURITY WARNING: don't run with debug turned on in production!
+DEBUG = True
+
+ALLOWED_HOSTS = []
+'''
+        compression_middleware_content = ''
+        templates_loading_content = '''        'APP_DIRS': True,
+        'OPTIONS': {
+'''
+        connection_settings_content = ''
+        storage_settings_content = ''
+    if database == 'postgresql':
+        database_settings_content = f'''        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': os.environ.get('POSTGRES_DB', '{project_name.lower()}'),
+        'USER': os.environ.get('POSTGRES_USER', 'postgres'),
+        'PASSWORD': os.environ.get('POSTGRES_PASSWORD', ''),
+        'HOST': os.environ.get('POSTGRES_HOST', 'localhost'),
+        'PORT': os.environ.get('POSTGRES_PORT', '5432'),
+'''
+        database_apps_content = "    'django.contrib.postgres',\n"
+    else:
+        database_settings_content = '''        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'db.sqlite3',
+'''
+        database_apps_content = ''
+    replica_settings_content = ''
+    replica_middleware_content = ''
+    if replica:
+        if database == 'postgresql':
+            replica_database_content = f'''    # Defaults to the primary server: reads then stay on the primary connection
+    'replica': {{
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': os.environ.get('POSTGRES_DB', '{project_name.lower()}'),
+        'USER': os.environ.get('POSTGRES_REPLICA_USER', os.environ.get('POSTGRES_USER', 'postgres')),
+        'PASSWORD': os.environ.get('POSTGRES_REPLICA_PASSWORD', os.environ.get('POSTGRES_PASSWORD', '')),
+        'HOST': os.environ.get('POSTGRES_REPLICA_HOST', os.environ.get('POSTGRES_HOST', 'localhost')),
+        'PORT': os.environ.get('POSTGRES_REPLICA_PORT', os.environ.get('POSTGRES_PORT', '5432')),
+'''
+        else:
+            replica_database_content = '''    # Read-only copy of db.sqlite3, refreshed by `python manage.py syncreplica`
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': (BASE_DIR / 'db.replica.sqlite3').as_uri() + '?mode=ro',
+'''
+        replica_settings_content = replica_database_content + connection_settings_content + '''        'TEST': {
+            'MIRROR': 'default',
+        },
+    },
+'''
+        replica_middleware_content = f"    '{project_name}.routers.ReplicaPinningMiddleware',\n"
+    router_settings_content = ''
+    if replica:
+        router_settings_content = f'''
+# Reads of the generated apps made by GET/HEAD/OPTIONS requests go to the replica, writes to
+# the primary. A client that wrote reads from the primary for PIN_SECONDS (cookie COOKIE).
+DATABASE_ROUTERS = ['{project_name}.routers.PrimaryReplicaRouter']
+
+API_REPLICA = {{
+    'ALIAS': 'replica',
+    'APPS': {list(schema_generated_apps)},
+    'PIN_SECONDS': 5,
+    'COOKIE': 'api_primary',
+}}
 '''
     # Generate the INSTALLED_APPS list dynamically
     installed_apps_content = ',\n    '.join(["'" + app + "'" for app in schema_generated_apps])
@@ -205,23 +1462,17 @@ from datetime import timedelta
 BASE_DIR = Path(__file__).resolve().parent.parent
 
 
-SECRET_KEY = 'django-insecure-i7w8dm6ml*(ii@e&#f-fw23i0$!9izhthjm=y#dgi!!lu2(p+g'
-
-# SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
-
-ALLOWED_HOSTS = []
-
+{security_settings_content}
 # Application definition
 INSTALLED_APPS = [  
-    'jazzmin',
+{server_apps_content}    'jazzmin',
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
-    'rest_framework',
+{database_apps_content}    'rest_framework',
     'rest_framework.authtoken',
     'dj_rest_auth',
     'allauth',
@@ -233,8 +1484,9 @@ INSTALLED_APPS = [
 ] +  [{installed_apps_content}] + ['Authentication']
 
 MIDDLEWARE = [
-    'django.middleware.security.SecurityMiddleware',
-    'django.contrib.sessions.middleware.SessionMiddleware',
+    '{project_name}.instrumentation.InstrumentationMiddleware',
+{replica_middleware_content}    'django.middleware.security.SecurityMiddleware',
+{compression_middleware_content}    'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
@@ -249,9 +1501,7 @@ TEMPLATES = [
     {{
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [],
-        'APP_DIRS': True,
-        'OPTIONS': {{
-            'context_processors': [
+{templates_loading_content}            'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
@@ -261,18 +1511,15 @@ TEMPLATES = [
     }},
 ]
 
-WSGI_APPLICATION = '{project_name}.wsgi.application'
-
+{server_settings_content}
 # Database
 # https://docs.djangoproject.com/en/3.2/ref/settings/#databases
 
 DATABASES = {{
     'default': {{
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }},
-}}
-
+{database_settings_content}{connection_settings_content}    }},
+{replica_settings_content}}}
+{router_settings_content}
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
 
@@ -334,6 +1581,49 @@ REST_FRAMEWORK = {{
     ),
 
     'DEFAULT_SCHEMA_CLASS': 'rest_framework.schemas.coreapi.AutoSchema',
+    # JSON on orjson when it is installed, the json module otherwise (see renderers.py)
+    'DEFAULT_RENDERER_CLASSES': (
+        '{project_name}.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        '{project_name}.renderers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
+}}
+
+# Rows per INSERT/UPDATE/DELETE statement of the bulk endpoints (overridable with ?batch_size=)
+API_BULK_BATCH_SIZE = 1000
+
+# Rows fetched per database round-trip by the streaming CSV/NDJSON export endpoints
+API_EXPORT_CHUNK_SIZE = 2000
+
+# Per-request SQL and timing instrumentation: a JSON log line (logger '{project_name}.instrumentation')
+# for requests slower than SLOW_REQUEST_MS, and a Server-Timing header on every response with DEBUG
+# on only, as it tells clients the query counts and SQL time of each endpoint
+API_INSTRUMENTATION = {{
+    'ENABLED': True,
+    'SERVER_TIMING': DEBUG,
+    'SLOW_REQUEST_MS': 500,
+    'TOP_QUERIES': 5,
+}}
+
+LOGGING = {{
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {{
+        'console': {{
+            'class': 'logging.StreamHandler',
+        }},
+    }},
+    'loggers': {{
+        '{project_name}.instrumentation': {{
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        }},
+    }},
 }}
 
 STATIC_URL = '/static/'
@@ -347,30 +1637,33 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 AUTH_USER_MODEL = "Authentication.ApplicationUser"
-# Jazzmin settings
+{storage_settings_content}{cache_settings_content}# Jazzmin settings
 {jazzmin_settings_content}
 
 # Jazzmin tweaks
 {jazzmin_tweaks_content}
+'''
+    # Production leaves /media/ to the front-end server
+    media_urlpatterns_content = '' if production else ' + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)'
+    media_serve_content = '' if production else '''
+if settings.DEBUG:
+    urlpatterns += [
+        path('media/<path:path>', serve, {
+            'document_root': settings.MEDIA_ROOT,
+        }),
+    ]
 '''
     urls_content = f'''
 from django.urls import include, re_path, path
 from django.contrib import admin
 from django.views.generic import RedirectView, TemplateView
-from drf_yasg.views import get_schema_view
-from drf_yasg import openapi
 
 from django.conf import settings
 from django.conf.urls.static import static
 
 from django.views.static import serve
 
-schema_view = get_schema_view(
-    openapi.Info(
-        title='{project_name} API Docs',
-        default_version='v2',
-    )
-)
+from {project_name} import docs
 
 urlpatterns = [
     re_path(r'^$', TemplateView.as_view(template_name="index.html"), name='index'),
@@ -379,58 +1672,3450 @@ urlpatterns = [
     re_path(r'^account/', include('allauth.urls')),
     re_path(r'^admin/', admin.site.urls),
     re_path(r'^accounts/profile/$', RedirectView.as_view(url='/', permanent=True), name='profile-redirect'),
-    re_path(r'^docs/$', schema_view.with_ui('swagger', cache_timeout=0), name='api_docs')
-] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+    re_path(r'^docs/$', docs.swagger_ui, name='api_docs'),
+    re_path(r'^openapi\\.json$', docs.openapi_json, name='openapi'),
+]{media_urlpatterns_content}
 
 
 # Include schema-generated app URLs
 urlpatterns += [
     {app_urlpatterns}
 ]
-
-if settings.DEBUG:
-    urlpatterns += [
-        path('media/<path:path>', serve, {{
-            'document_root': settings.MEDIA_ROOT,
-        }}),
-    ]
-
+{media_serve_content}
 admin.site.site_header = "{project_name} - Platform Admin"
 admin.site.site_title = "{project_name} - Platform Admin Portal"
 admin.site.index_title = "Welcome to {project_name} - Platform Portal"
 '''
     return full_settings_content, urls_content
 
-def update_venv_and_modules():
-    # Determine the OS (Windows or Linux)
-    is_windows = sys.platform.startswith('win')
+def caching_content():
+    # Content of the caching.py module shared by the generated viewsets
+    return '''
+import hashlib
+import time
 
-    # Set up the virtual environment path
-    project_dir = os.path.join(os.getcwd())
-    venv_dir = os.path.join(project_dir, '.venv')
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.response import Response
 
-    # Create the virtual environment
-    if is_windows:
-        subprocess.run(['python', '-m', 'venv', venv_dir], check=True)
+
+def version_key(model):
+    return f'api-version:{model._meta.label_lower}'
+
+
+def get_model_version(model):
+    # A missing counter (evicted or never set) starts from the clock so it never repeats
+    return cache.get_or_set(version_key(model), time.time_ns, None)
+
+
+def bump_model_version(model):
+    try:
+        cache.incr(version_key(model))
+    except ValueError:
+        cache.set(version_key(model), time.time_ns(), None)
+
+
+def dependent_models(model):
+    """
+    The model plus every model it is directly related to, in either direction.
+    Responses may embed data from these, so a change to any of them invalidates the cache.
+    """
+    related = {model}
+    for field in model._meta.get_fields():
+        if field.is_relation and field.related_model is not None:
+            related.add(field.related_model)
+    return sorted(related, key=lambda related_model: related_model._meta.label_lower)
+
+
+class CachedReadMixin:
+    """
+    Caches the data of list and retrieve responses, keyed by the request path, the
+    query parameters and the versions of the models the response depends on.
+    """
+    cache_timeout = getattr(settings, 'API_CACHE_TIMEOUT', 300)
+
+    def get_cache_key(self, request, action):
+        model = self.queryset.model
+        versions = [str(get_model_version(related)) for related in dependent_models(model)]
+        query = sorted(request.query_params.lists())
+        raw = f'{request.path}|{query}|{"-".join(versions)}'
+        digest = hashlib.md5(raw.encode('utf-8')).hexdigest()
+        return f'api:{model._meta.label_lower}:{action}:{digest}'
+
+    def cached_response(self, action, handler, request, *args, **kwargs):
+        key = self.get_cache_key(request, action)
+        data = cache.get(key)
+        if data is not None:
+            return Response(data)
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(key, response.data, self.cache_timeout)
+        return response
+
+    def bulk_changed(self, models):
+        for model in models:
+            bump_model_version(model)
+        super().bulk_changed(models)
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response('list', super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response('retrieve', super().retrieve, request, *args, **kwargs)
+'''
+
+def conditional_content(project_name):
+    # Content of the conditional.py module answering conditional GETs of the generated viewsets
+    return f'''
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+from rest_framework.permissions import SAFE_METHODS
+
+from {project_name}.fieldsets import requested_fields
+''' + '''
+
+def timestamp(value):
+    # Microseconds since the epoch of an aware or naive datetime, None stays None
+    return None if value is None else int(value.timestamp() * 1000000)
+
+
+def touch_many_to_many(model, field_name, instance, reverse, pk_set):
+    """
+    Set the modified field of the `model` rows whose `field_name` links changed, from an
+    m2m_changed handler: adding or removing links saves the through table only, and the
+    validators of a row listing its links would otherwise still match.
+    """
+    rows = model._base_manager.all()
+    if not reverse:
+        rows = rows.filter(pk=instance.pk)
+    elif pk_set is not None:
+        rows = rows.filter(pk__in=pk_set)
     else:
-        subprocess.run(['python3', '-m', 'venv', venv_dir], check=True)
+        # Clearing from the other side of the relation, the links are still there (pre_clear)
+        rows = rows.filter(**{field_name: instance})
+    rows.update(**{ConditionalMixin.modified_field: timezone.now()})
 
-    # Activate the virtual environment and install Django
-    activate_script = 'activate.bat' if is_windows else 'activate'
-    activate_path = os.path.join(venv_dir, 'Scripts' if is_windows else 'bin', activate_script)
-    command = activate_path if is_windows else "source " + activate_path
 
-    return command
-    
-def get_requirements():
-    return """
-asgiref
-certifi
-cffi
-charset-normalizer
-coreapi
-coreschema
-cryptography
+class ConditionalMixin:
+    """
+    Answers list and retrieve requests carrying If-None-Match (or, for retrieve,
+    If-Modified-Since) with 304 Not Modified when nothing changed, before the rows are read
+    or serialized. The validators come from `modified_field`, an auto_now column: a list's
+    weak ETag is the count and latest modification of the filtered rows, read in one
+    aggregate query, a retrieve's is the modification of the row.
+
+    Responses that embed other models (?expand=, aggregates) get no validators, changes to
+    those models do not touch `modified_field`. Changes to the many-to-many links of a row
+    do, see touch_many_to_many.
+    """
+    modified_field = 'updated_at'
+
+    def has_validators(self, request):
+        model = self.get_queryset().model
+        if self.modified_field not in {field.name for field in model._meta.concrete_fields}:
+            return False
+        _, _, expand = requested_fields(request)
+        return not expand and not getattr(self, 'aggregates', None)
+
+    def representation_key(self, request):
+        # The same rows render differently for another format or other query parameters
+        renderer = getattr(request, 'accepted_renderer', None)
+        query = sorted(request.query_params.lists())
+        raw = f'{getattr(renderer, "format", "")}|{query}'
+        return hashlib.md5(raw.encode('utf-8')).hexdigest()[:12]
+
+    def conditional_response(self, handler, request, etag, last_modified, check_last_modified, *args, **kwargs):
+        if request.method in SAFE_METHODS:
+            not_modified = get_conditional_response(
+                request,
+                etag=etag,
+                last_modified=last_modified if check_last_modified else None,
+            )
+            if not_modified is not None:
+                return not_modified
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            response['ETag'] = etag
+            if last_modified is not None:
+                response['Last-Modified'] = http_date(last_modified)
+            # Clients keep the response but revalidate it before every use
+            patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        if not self.has_validators(request):
+            return super().list(request, *args, **kwargs)
+        queryset = self.filter_queryset(self.get_queryset()).order_by()
+        state = queryset.aggregate(modified=Max(self.modified_field), count=Count('pk'))
+        modified = timestamp(state['modified'])
+        etag = f'W/"{state["count"]}-{modified or 0}-{self.representation_key(request)}"'
+        last_modified = modified // 1000000 if modified is not None else None
+        # Deleting rows leaves the latest modification as it was, only the ETag (which counts
+        # the rows) can tell a list is unchanged
+        return self.conditional_response(super().list, request, etag, last_modified, False, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        if not self.has_validators(request):
+            return super().retrieve(request, *args, **kwargs)
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        queryset = self.filter_queryset(self.get_queryset()).order_by()
+        modified = timestamp(
+            queryset.filter(**{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+            .values_list(self.modified_field, flat=True).first()
+        )
+        if modified is None:
+            # Missing rows (404) and rows never saved through the ORM get no validators
+            return super().retrieve(request, *args, **kwargs)
+        etag = f'W/"{modified}-{self.representation_key(request)}"'
+        return self.conditional_response(super().retrieve, request, etag, modified // 1000000, True, *args, **kwargs)
+'''
+
+def listing_content():
+    # Content of the listing.py module shared by the generated viewsets
+    return '''
+from django.db.models import F
+from rest_framework import serializers
+from rest_framework.response import Response
+
+# Serializer fields whose representation of a values() result is the value itself
+PASSTHROUGH_FIELDS = (
+    serializers.BooleanField,
+    serializers.CharField,
+    serializers.ChoiceField,
+    serializers.FloatField,
+    serializers.IntegerField,
+    serializers.JSONField,
+    serializers.PrimaryKeyRelatedField,
+)
+
+
+def file_url_converter(storage, request):
+    def convert(name):
+        if not name:
+            return None
+        url = storage.url(name)
+        return request.build_absolute_uri(url) if request is not None else url
+    return convert
+
+
+def column_aliases(serializer):
+    """
+    {field name: F(column)} of the fields rendering a model column under their own name,
+    those with a values_converter (thumbnails.ThumbnailURLField), to pass to values().
+    """
+    columns = {field.name for field in serializer.Meta.model._meta.concrete_fields}
+    return {
+        name: F(field.source) for name, field in serializer.fields.items()
+        if hasattr(field, 'values_converter') and field.source in columns
+    }
+
+
+def build_converters(serializer, request):
+    """
+    Precompute (field name, converter) pairs turning values() results into the
+    representation the serializer would produce. Passthrough fields are skipped.
+    """
+    model = serializer.Meta.model
+    converters = []
+    for name, field in serializer.fields.items():
+        if field.write_only or isinstance(field, PASSTHROUGH_FIELDS):
+            continue
+        if hasattr(field, 'values_converter'):
+            converters.append((name, field.values_converter(model, request)))
+            continue
+        if isinstance(field, serializers.ManyRelatedField) and isinstance(field.child_relation, serializers.PrimaryKeyRelatedField):
+            # Lists of primary keys, as collected for many-to-many fields
+            continue
+        if isinstance(field, serializers.FileField):
+            converters.append((name, file_url_converter(model._meta.get_field(name).storage, request)))
+        else:
+            converters.append((name, field.to_representation))
+    return converters
+
+
+def convert_rows(rows, converters):
+    data = list(rows)
+    for row in data:
+        for name, convert in converters:
+            value = row[name]
+            if value is not None:
+                row[name] = convert(value)
+    return data
+
+
+class ListSerializerMixin:
+    """
+    Uses list_serializer_class for list responses and serializer_class for everything else.
+    """
+    list_serializer_class = None
+
+    def get_serializer_class(self):
+        if self.action == 'list' and self.list_serializer_class is not None:
+            return self.list_serializer_class
+        return super().get_serializer_class()
+
+
+class ValuesListMixin:
+    """
+    Serves list responses straight from QuerySet.values(), skipping model instances and
+    the per-field serializer machinery. Falls back to the serializer when it declares
+    fields that are neither model columns nor queryset annotations, or expanded relations.
+    """
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        serializer = self.get_serializer()
+        fields = [name for name, field in serializer.fields.items() if not field.write_only]
+        aliases = column_aliases(serializer)
+        available = {field.name for field in queryset.model._meta.concrete_fields} | set(queryset.query.annotations) | set(aliases)
+        nested = any(isinstance(field, serializers.BaseSerializer) for field in serializer.fields.values())
+        if nested or not set(fields) <= available:
+            return super().list(request, *args, **kwargs)
+
+        converters = build_converters(serializer, request)
+        rows = queryset.prefetch_related(None).values(*[name for name in fields if name not in aliases], **aliases)
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(convert_rows(page, converters))
+        return Response(convert_rows(rows, converters))
+'''
+
+def fieldsets_content():
+    # Content of the fieldsets.py module shared by the generated serializers and viewsets
+    return '''
+from django.utils.module_loading import import_string
+from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+
+# Generic serializers for expanded models that have no generated list serializer
+_expanded_serializers = {}
+
+
+def parse_query_list(request, name):
+    value = request.query_params.get(name, '')
+    return [item.strip() for item in value.split(',') if item.strip()]
+
+
+def requested_fields(request):
+    """
+    Read ?fields=a,b (only these), ?fields=-a,-b (all but these) and ?expand=relation.
+    Returns the (include, exclude, expand) sets of field names.
+    """
+    names = parse_query_list(request, 'fields')
+    include = {name for name in names if not name.startswith('-')}
+    exclude = {name[1:] for name in names if name.startswith('-')}
+    expand = set(parse_query_list(request, 'expand'))
+    return include, exclude, expand
+
+
+def forward_relations(model):
+    fields = list(model._meta.fields) + list(model._meta.many_to_many)
+    return {field.name: field for field in fields if field.is_relation}
+
+
+def expanded_serializer_class(model):
+    """
+    The generated <Model>ListSerializer of the related model, or a generic serializer of
+    its concrete columns (without the password) for models outside the generated apps.
+    """
+    try:
+        return import_string(f'{model._meta.app_label}.serializers.{model.__name__}ListSerializer')
+    except ImportError:
+        pass
+    if model not in _expanded_serializers:
+        fields = [field.name for field in model._meta.concrete_fields if field.name != 'password']
+        meta = type('Meta', (), {'model': model, 'fields': fields})
+        _expanded_serializers[model] = type(f'{model.__name__}ExpandedSerializer', (serializers.ModelSerializer,), {'Meta': meta})
+    return _expanded_serializers[model]
+
+
+class DynamicFieldsMixin:
+    """
+    Restricts the serialized fields to ?fields= and nests the related objects named in
+    ?expand=. Only applies to the top-level serializer of read requests.
+    """
+
+    def is_top_level(self):
+        parent = self.parent
+        if isinstance(parent, serializers.ListSerializer):
+            parent = parent.parent
+        return parent is None
+
+    def get_fields(self):
+        fields = super().get_fields()
+        request = self.context.get('request')
+        if request is None or request.method not in SAFE_METHODS or not self.is_top_level():
+            return fields
+
+        include, exclude, expand = requested_fields(request)
+        relations = forward_relations(self.Meta.model)
+        for name in expand & relations.keys():
+            relation = relations[name]
+            serializer_class = expanded_serializer_class(relation.related_model)
+            fields[name] = serializer_class(many=relation.many_to_many, read_only=True)
+        if include:
+            fields = {name: field for name, field in fields.items() if name in include or name in expand}
+        for name in exclude:
+            fields.pop(name, None)
+        return fields
+
+
+class SparseFieldsMixin:
+    """
+    Narrows the queryset of read requests to what ?fields= and ?expand= ask for:
+    .only()/.defer() for the columns, select_related/prefetch_related for expansions.
+    """
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        request = getattr(self, 'request', None)
+        if request is None or request.method not in SAFE_METHODS:
+            return queryset
+
+        include, exclude, expand = requested_fields(request)
+        model = queryset.model
+        relations = forward_relations(model)
+        select = {name for name in expand if name in relations and not relations[name].many_to_many}
+        prefetch = {name for name in expand if name in relations and relations[name].many_to_many}
+        concrete = {field.name for field in model._meta.concrete_fields}
+        pk_name = model._meta.pk.name
+
+        if include:
+            queryset = queryset.only(pk_name, *sorted((include | select) & concrete))
+        elif exclude:
+            deferred = (exclude & concrete) - select - {pk_name}
+            if deferred:
+                queryset = queryset.defer(*sorted(deferred))
+        if select:
+            queryset = queryset.select_related(*sorted(select))
+        if prefetch:
+            queryset = queryset.prefetch_related(*sorted(prefetch))
+        return queryset
+'''
+
+def bulk_content():
+    # Content of the bulk.py module shared by the generated viewsets
+    return '''
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.relations import ManyRelatedField, PrimaryKeyRelatedField
+from rest_framework.response import Response
+
+
+class PreloadedObjects:
+    """
+    Stands in for the queryset of a related field and answers .get(pk=...) from rows
+    loaded up front, so validating a batch costs one query per relation, not per item.
+    """
+
+    def __init__(self, model, objects):
+        self.model = model
+        self.objects = objects
+
+    def get(self, pk):
+        try:
+            key = self.model._meta.pk.to_python(pk)
+        except ValidationError:
+            raise ValueError(pk)
+        try:
+            return self.objects[key]
+        except KeyError:
+            raise self.model.DoesNotExist
+
+
+def to_pk(pk_field, value):
+    # The primary key value, or None when the value is missing or not a valid key
+    if value is None or isinstance(value, bool):
+        return None
+    try:
+        return pk_field.to_python(value)
+    except ValidationError:
+        return None
+
+
+def preload_related(serializer, items):
+    for name, field in serializer.child.fields.items():
+        if field.read_only:
+            continue
+        relation = field.child_relation if isinstance(field, ManyRelatedField) else field
+        if not isinstance(relation, PrimaryKeyRelatedField) or relation.pk_field is not None:
+            continue
+
+        model = relation.get_queryset().model
+        pks = set()
+        for item in items:
+            value = item.get(name)
+            for pk in value if isinstance(value, list) else [value]:
+                if isinstance(pk, (int, str)):
+                    pks.add(to_pk(model._meta.pk, pk))
+        pks.discard(None)
+        objects = relation.get_queryset().in_bulk(pks) if pks else {}
+        relation.queryset = PreloadedObjects(model, objects)
+
+
+def item_errors(errors):
+    return [{'index': index, 'errors': error} for index, error in enumerate(errors) if error]
+
+
+# Per-item error of the rows a database constraint rejects though they passed validation
+CONFLICT_ERROR = {'non_field_errors': ['Conflicts with an existing object or an earlier item of the request.']}
+
+
+class BulkMixin:
+    """
+    Adds POST/PATCH/DELETE <prefix>/bulk/ endpoints taking JSON arrays. All items are
+    validated first, then written with bulk_create/bulk_update/filtered delete in
+    batches inside one transaction. Any invalid item rejects the whole request with
+    per-item errors, as do the items a unique constraint rejects when written (two
+    items of the request, or a row inserted since they were validated).
+    """
+    bulk_batch_size = getattr(settings, 'API_BULK_BATCH_SIZE', 1000)
+
+    def get_bulk_batch_size(self):
+        try:
+            return max(1, int(self.request.query_params.get('batch_size', self.bulk_batch_size)))
+        except ValueError:
+            return self.bulk_batch_size
+
+    def get_bulk_items(self, request):
+        if not isinstance(request.data, list) or not all(isinstance(item, dict) for item in request.data):
+            return None
+        return request.data
+
+    def bulk_changed(self, models):
+        """
+        Called once a bulk write is committed. bulk_create/bulk_update send no model
+        signals, so mixins that react to changes hook in here.
+        """
+
+    def validate_bulk(self, items, partial=False):
+        serializer = self.get_serializer(data=items, many=True, partial=partial)
+        preload_related(serializer, items)
+        serializer.is_valid()
+        return serializer
+
+    def save_many_to_many(self, model, rows, batch_size, replace=False):
+        # rows: (object pk, {field name: [related objects]})
+        touched = []
+        for field in model._meta.many_to_many:
+            links = [(pk, values[field.name]) for pk, values in rows if field.name in values]
+            if not links:
+                continue
+            through = field.remote_field.through
+            source = through._meta.get_field(field.m2m_field_name()).attname
+            target = through._meta.get_field(field.m2m_reverse_field_name()).attname
+            if replace:
+                through.objects.filter(**{f'{source}__in': [pk for pk, _ in links]}).delete()
+            through.objects.bulk_create(
+                [through(**{source: pk, target: related.pk}) for pk, related_objects in links for related in related_objects],
+                batch_size=batch_size,
+                ignore_conflicts=True,
+            )
+            touched.append(field.related_model)
+        return touched
+
+    def conflicting_items(self, model, objects):
+        """
+        Errors of the objects an IntegrityError rejects, found by inserting them one by one in
+        savepoints of a transaction rolled back afterwards.
+        """
+        errors = [{} for _ in objects]
+        with transaction.atomic():
+            for index, obj in enumerate(objects):
+                try:
+                    with transaction.atomic():
+                        model._default_manager.bulk_create([obj])
+                except IntegrityError:
+                    errors[index] = CONFLICT_ERROR
+            transaction.set_rollback(True)
+        return errors
+
+    @action(detail=False, methods=['post'], url_path='bulk')
+    def bulk_create(self, request, *args, **kwargs):
+        items = self.get_bulk_items(request)
+        if items is None:
+            return Response({'detail': 'Expected a list of objects.'}, status=status.HTTP_400_BAD_REQUEST)
+        serializer = self.validate_bulk(items)
+        if serializer.errors:
+            return Response({'errors': item_errors(serializer.errors)}, status=status.HTTP_400_BAD_REQUEST)
+
+        model = self.get_queryset().model
+        many_to_many = {field.name for field in model._meta.many_to_many}
+        batch_size = self.get_bulk_batch_size()
+
+        def new_objects():
+            return [
+                model(**{name: value for name, value in data.items() if name not in many_to_many})
+                for data in serializer.validated_data
+            ]
+
+        objects = new_objects()
+        try:
+            with transaction.atomic():
+                model._default_manager.bulk_create(objects, batch_size=batch_size)
+                rows = [
+                    (obj.pk, {name: value for name, value in data.items() if name in many_to_many})
+                    for obj, data in zip(objects, serializer.validated_data)
+                ]
+                touched = self.save_many_to_many(model, rows, batch_size)
+                transaction.on_commit(lambda: self.bulk_changed([model] + touched))
+        except IntegrityError:
+            # Rows inserted since validation fail the unique validators now, with their messages
+            serializer = self.validate_bulk(items)
+            if serializer.errors:
+                return Response({'errors': item_errors(serializer.errors)}, status=status.HTTP_400_BAD_REQUEST)
+            # Otherwise items of the request collide with each other, the ones after the first are reported
+            errors = self.conflicting_items(model, new_objects())
+            if not any(errors):
+                raise
+            return Response({'errors': item_errors(errors)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'created': len(objects), 'ids': [obj.pk for obj in objects]}, status=status.HTTP_201_CREATED)
+
+    @bulk_create.mapping.patch
+    def bulk_update(self, request, *args, **kwargs):
+        items = self.get_bulk_items(request)
+        if items is None:
+            return Response({'detail': 'Expected a list of objects.'}, status=status.HTTP_400_BAD_REQUEST)
+        serializer = self.validate_bulk(items, partial=True)
+        errors = list(serializer.errors) if serializer.errors else [{} for _ in items]
+
+        model = self.get_queryset().model
+        ids = [to_pk(model._meta.pk, item.get('id')) for item in items]
+        instances = self.get_queryset().in_bulk({pk for pk in ids if pk is not None})
+        for index, (item, pk) in enumerate(zip(items, ids)):
+            if item.get('id') is None:
+                errors[index] = {**errors[index], 'id': ['This field is required.']}
+            elif pk not in instances:
+                errors[index] = {**errors[index], 'id': [f'Invalid pk "{item.get("id")}" - object does not exist.']}
+        if any(errors):
+            return Response({'errors': item_errors(errors)}, status=status.HTTP_400_BAD_REQUEST)
+
+        many_to_many = {field.name for field in model._meta.many_to_many}
+        # bulk_update() does not call pre_save(), so auto_now fields are set here
+        auto_now = [field for field in model._meta.concrete_fields if getattr(field, 'auto_now', False)]
+        batch_size = self.get_bulk_batch_size()
+        changed_fields = {field.name for field in auto_now}
+        rows = []
+        for pk, data in zip(ids, serializer.validated_data):
+            instance = instances[pk]
+            for name, value in data.items():
+                if name not in many_to_many:
+                    setattr(instance, name, value)
+                    changed_fields.add(name)
+            for field in auto_now:
+                field.pre_save(instance, False)
+            rows.append((instance.pk, {name: value for name, value in data.items() if name in many_to_many}))
+        with transaction.atomic():
+            if changed_fields:
+                model._default_manager.bulk_update(list(instances.values()), sorted(changed_fields), batch_size=batch_size)
+            touched = self.save_many_to_many(model, rows, batch_size, replace=True)
+            transaction.on_commit(lambda: self.bulk_changed([model] + touched))
+        return Response({'updated': len(instances)})
+
+    @bulk_create.mapping.delete
+    def bulk_destroy(self, request, *args, **kwargs):
+        # Accepts [1, 2, 3] as well as [{"id": 1}, ...]
+        if not isinstance(request.data, list):
+            return Response({'detail': 'Expected a list of ids.'}, status=status.HTTP_400_BAD_REQUEST)
+        values = [item.get('id') if isinstance(item, dict) else item for item in request.data]
+
+        queryset = self.get_queryset()
+        pk_field = queryset.model._meta.pk
+        batch_size = self.get_bulk_batch_size()
+        ids = [to_pk(pk_field, value) for value in values]
+        candidates = sorted({pk for pk in ids if pk is not None})
+        existing = set()
+        for start in range(0, len(candidates), batch_size):
+            existing.update(queryset.filter(pk__in=candidates[start:start + batch_size]).values_list('pk', flat=True))
+        errors = [
+            {} if pk in existing else {'id': [f'Invalid pk "{value}" - object does not exist.']}
+            for value, pk in zip(values, ids)
+        ]
+        if any(errors):
+            return Response({'errors': item_errors(errors)}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Filtered deletes still send post_delete, so no bulk_changed() call is needed here
+        existing = sorted(existing)
+        with transaction.atomic():
+            for start in range(0, len(existing), batch_size):
+                queryset.filter(pk__in=existing[start:start + batch_size]).delete()
+        return Response({'deleted': len(existing)})
+'''
+
+def renderers_content():
+    # Content of the renderers.py module, the JSON renderer and parser of the API
+    return '''"""
+JSON rendering and parsing of the API on orjson when it is installed, on the json module
+otherwise. The output has the same values as DRF's JSONRenderer with its default settings
+(UNICODE_JSON, COMPACT_JSON): compact UTF-8, with \\\\u2028 and \\\\u2029 escaped. Floats
+in exponent notation are written differently (orjson writes 1e16 and 1.5e-7 where the json
+module writes 1e+16 and 1.5e-07), and NaN and Infinity raise ValueError, as STRICT_JSON does.
+"""
+import json
+import math
+
+from django.conf import settings
+from django.http import HttpResponse
+from rest_framework import parsers, renderers
+from rest_framework.exceptions import ParseError
+from rest_framework.utils.encoders import JSONEncoder
+from rest_framework.utils.json import strict_constant
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# orjson serializes dicts, lists, datetimes, dates, times and UUIDs itself, DRF's encoder does
+# the rest (Decimal, lazy translations, querysets, timedelta, ...)
+ENCODER = JSONEncoder()
+OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z if orjson else 0
+
+
+def has_non_finite(data):
+    """
+    Whether data holds a NaN or infinite float, which orjson writes as null.
+    """
+    stack = [data]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, float):
+            if not math.isfinite(value):
+                return True
+        elif isinstance(value, dict):
+            stack.extend(value.values())
+        elif isinstance(value, (list, tuple)):
+            stack.extend(value)
+    return False
+
+
+def dumps(data):
+    """
+    JSON bytes of data, as FastJSONRenderer renders them.
+    """
+    if orjson is not None:
+        try:
+            content = orjson.dumps(data, default=ENCODER.default, option=OPTIONS)
+        except orjson.JSONEncodeError:
+            # Integers over 64 bits and the like, the json module handles them
+            pass
+        else:
+            # Non-finite floats are only ever behind a null, the json module raises on them
+            if b'null' in content and has_non_finite(data):
+                return renderers.JSONRenderer().render(data)
+            return content.replace('\\u2028'.encode(), b'\\\\u2028').replace('\\u2029'.encode(), b'\\\\u2029')
+    return renderers.JSONRenderer().render(data)
+
+
+def loads(content):
+    """
+    The data of JSON bytes, raises ValueError when they are not valid JSON.
+    """
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content, parse_constant=strict_constant if parsers.JSONParser.strict else None)
+
+
+def json_response(data, status=200, headers=None):
+    return HttpResponse(dumps(data), content_type='application/json', status=status, headers=headers)
+
+
+class FastJSONRenderer(renderers.JSONRenderer):
+    """
+    JSONRenderer on orjson. Indented output (the browsable API, 'application/json; indent=4')
+    and non-default JSON settings go through the json module.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if orjson is None or data is None or indent is not None or self.ensure_ascii or not self.compact:
+            return super().render(data, accepted_media_type, renderer_context)
+        return dumps(data)
+
+
+class FastJSONParser(parsers.JSONParser):
+    """
+    JSONParser on orjson for UTF-8 bodies. orjson rejects NaN and Infinity, as STRICT_JSON does.
+    """
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get('encoding', settings.DEFAULT_CHARSET)
+        if orjson is None or not self.strict or encoding.lower().replace('_', '-') not in ('utf-8', 'utf8'):
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError(f'JSON parse error - {exc}')
+'''
+
+def storage_content():
+    # Content of the storage.py module used as static files storage by the production profile
+    return '''
+import gzip
+import os
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+COMPRESSIBLE_EXTENSIONS = ('.css', '.js', '.json', '.map', '.svg', '.txt', '.html', '.xml', '.ico', '.ttf', '.otf', '.eot')
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """
+    ManifestStaticFilesStorage that also writes name.gz next to every compressible file
+    collectstatic stores, so the front-end server can send precompressed responses.
+    """
+    # Source map references are left as they are: bundled packages (jazzmin) point at maps they do not ship
+    patterns = tuple(
+        (extension, tuple(pattern for pattern in extension_patterns if 'sourceMappingURL' not in str(pattern)))
+        for extension, extension_patterns in ManifestStaticFilesStorage.patterns
+    )
+    min_size = 256
+
+    def stored_name(self, name):
+        # Files referenced before they are added (the jazzmin site_logo) keep their plain name instead of failing
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            return name
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run=dry_run, **options)
+        if dry_run:
+            return
+        for name in set(paths) | set(self.hashed_files.values()):
+            if name.endswith(COMPRESSIBLE_EXTENSIONS) and self.exists(name):
+                self.compress(name)
+
+    def compress(self, name):
+        path = self.path(name)
+        compressed_path = path + '.gz'
+        if os.path.exists(compressed_path) and os.path.getmtime(compressed_path) >= os.path.getmtime(path):
+            return
+        with open(path, 'rb') as source:
+            content = source.read()
+        if len(content) < self.min_size:
+            return
+        # mtime=0 keeps the output identical across runs
+        compressed = gzip.compress(content, compresslevel=9, mtime=0)
+        if len(compressed) < len(content):
+            with open(compressed_path, 'wb') as target:
+                target.write(compressed)
+'''
+
+def sqlite_search_sql(table, fields):
+    # FTS5 index over the searchable columns of table, external content kept in sync by triggers
+    search_table = f'{table}_search'
+    columns = ', '.join(f'"{field}"' for field in fields)
+    new_values = ', '.join(f'new."{field}"' for field in fields)
+    old_values = ', '.join(f'old."{field}"' for field in fields)
+    insert = f'INSERT INTO "{search_table}"(rowid, {columns}) VALUES (new."id", {new_values});'
+    delete = f'INSERT INTO "{search_table}"("{search_table}", rowid, {columns}) VALUES (\'delete\', old."id", {old_values});'
+    sql = [
+        f'CREATE VIRTUAL TABLE "{search_table}" USING fts5({columns}, content=\'{table}\', content_rowid=\'id\', tokenize=\'unicode61 remove_diacritics 2\')',
+        f'CREATE TRIGGER "{search_table}_insert" AFTER INSERT ON "{table}" BEGIN {insert} END',
+        f'CREATE TRIGGER "{search_table}_delete" AFTER DELETE ON "{table}" BEGIN {delete} END',
+        f'CREATE TRIGGER "{search_table}_update" AFTER UPDATE OF {columns} ON "{table}" BEGIN {delete} {insert} END',
+        f'INSERT INTO "{search_table}"("{search_table}") VALUES (\'rebuild\')',
+    ]
+    reverse_sql = [
+        f'DROP TRIGGER IF EXISTS "{search_table}_update"',
+        f'DROP TRIGGER IF EXISTS "{search_table}_delete"',
+        f'DROP TRIGGER IF EXISTS "{search_table}_insert"',
+        f'DROP TABLE IF EXISTS "{search_table}"',
+    ]
+    return sql, reverse_sql
+
+def postgresql_search_sql(table, fields, config='english'):
+    # Trigger filling the search_vector column of table, earlier searchable fields weigh more
+    def vector(prefix):
+        return ' || '.join(
+            f"setweight(to_tsvector('{config}', coalesce({prefix}\"{field}\"::text, '')), '{'ABCD'[min(index, 3)]}')"
+            for index, field in enumerate(fields)
+        )
+    function = f'{table}_search_update'
+    columns = ', '.join(f'"{field}"' for field in fields)
+    sql = [
+        f'CREATE FUNCTION "{function}"() RETURNS trigger AS $$ BEGIN NEW."search_vector" := {vector("NEW.")}; RETURN NEW; END $$ LANGUAGE plpgsql',
+        f'CREATE TRIGGER "{function}" BEFORE INSERT OR UPDATE OF {columns} ON "{table}" FOR EACH ROW EXECUTE FUNCTION "{function}"()',
+        f'UPDATE "{table}" SET "search_vector" = {vector("")}',
+    ]
+    reverse_sql = [
+        f'DROP TRIGGER IF EXISTS "{function}" ON "{table}"',
+        f'DROP FUNCTION IF EXISTS "{function}"()',
+    ]
+    return sql, reverse_sql
+
+def search_sql(table, fields, database='sqlite'):
+    if database == 'postgresql':
+        return postgresql_search_sql(table, fields)
+    return sqlite_search_sql(table, fields)
+
+def search_migration_content(app_name, dependency, models, database='sqlite'):
+    # Migration creating the full-text search index of every model of an app with searchable fields
+    operations = ''
+    for model_name, fields in models:
+        sql, reverse_sql = search_sql(f'{app_name}_{model_name.lower()}', fields, database)
+        operations += "        migrations.RunSQL(\n"
+        operations += "            sql=[\n" + ''.join(f"                {statement!r},\n" for statement in sql) + "            ],\n"
+        operations += "            reverse_sql=[\n" + ''.join(f"                {statement!r},\n" for statement in reverse_sql) + "            ],\n"
+        operations += "        ),\n"
+    return f"""# Full-text search index of the searchable fields, generated by buildapp
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('{app_name}', '{dependency}'),
+    ]
+
+    operations = [
+{operations}    ]
+"""
+
+# Attributes models.py writes as code rather than as quoted strings
+UNQUOTED_ATTRIBUTES = ('max_length', 'max_digits', 'decimal_places', 'on_delete')
+
+def schema_field(app_name, field_schema):
+    """
+    The field models.py declares for a schema field, as a Field instance built in the builder so
+    migrations can be written without loading the generated project. Attribute values keep the type
+    models.py gives them (quoted ones stay strings), so the migration state matches the models.
+    Relations are qualified with their app, the way makemigrations writes them.
+    """
+    from django.db import models
+    arguments = {}
+    for key, value in field_schema.get('attributes', {}).items():
+        if not value or key == 'undefined':
+            continue
+        if key == 'on_delete':
+            arguments[key] = getattr(models, str(value).rsplit('.', 1)[-1])
+        elif key in UNQUOTED_ATTRIBUTES:
+            arguments[key] = int(value)
+        else:
+            arguments[key] = str(value)
+    if 'to' in arguments and '.' not in arguments['to'] and arguments['to'] != 'self':
+        arguments['to'] = f"{app_name}.{arguments['to']}"
+    return getattr(models, field_schema.get('fieldType'))(**arguments)
+
+def one_off_default(field):
+    # The value existing rows get when a non-nullable field without default is added, as makemigrations asks for
+    import datetime
+    import uuid
+    from django.utils import timezone
+    defaults = {
+        'BooleanField': False, 'CharField': '', 'TextField': '', 'SlugField': '', 'FileField': '',
+        'DecimalField': 0, 'FloatField': 0, 'DurationField': datetime.timedelta(0),
+        'DateField': timezone.now, 'DateTimeField': timezone.now, 'TimeField': datetime.time(0),
+        'JSONField': dict, 'UUIDField': uuid.uuid4,
+    }
+    defaults.update(dict.fromkeys(INTEGER_FIELD_TYPES, 0))
+    internal_type = field.get_internal_type()
+    return internal_type in defaults, defaults.get(internal_type)
+
+def schema_operations(app_name, old_states, new_states, database='sqlite'):
+    """
+    The migration operations turning the models of an app from old_states into new_states, both
+    {model name: {'fields': [(name, field)], 'indexes': [index], 'search': [searchable field names]}}.
+    Returns (operations, related apps, warnings), the related apps being the other apps the new
+    fields point at. A renamed field or model shows up as a removal and an addition.
+    Full-text search indexes of the models whose table changes are dropped first and recreated
+    last, SQLite rebuilds tables on most alterations and takes their triggers along.
+    """
+    from django.db import migrations, models
+
+    def target(field):
+        # 'app.model' label of a relation, lowercased, None for other fields
+        return field.remote_field.model.lower() if field.remote_field and isinstance(field.remote_field.model, str) else None
+
+    def label(model_name):
+        return f'{app_name}.{model_name}'.lower()
+
+    related, warnings, touched = set(), [], set()
+
+    def note_relation(field):
+        if target(field) and '.' in target(field):
+            related.add(field.remote_field.model.split('.')[0])
+
+    def with_default(model_name, field_name, field):
+        # (field, preserve_default) filling existing rows of a new non-nullable column
+        if field.many_to_many or field.null or field.has_default():
+            return field, True
+        found, default = one_off_default(field)
+        if not found:
+            warnings.append(f'{app_name}.{model_name}.{field_name} is not nullable and has no default, '
+                            f'migrating a table with rows fails')
+            return field, True
+        field = field.clone()
+        field.default = default
+        return field, False
+
+    created = [name for name in new_states if name not in old_states]
+    deleted = [name for name in old_states if name not in new_states]
+    created_labels = {label(name) for name in created}
+    deleted_labels = {label(name) for name in deleted}
+    drop_search, create, relate, remove_indexes, remove_fields = [], [], [], [], []
+    add_fields, alter_fields, delete, add_indexes, create_search = [], [], [], [], []
+
+    for name in created:
+        fields = []
+        if not any(field.primary_key for _, field in new_states[name]['fields']):
+            fields.append(('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')))
+        for field_name, field in new_states[name]['fields']:
+            note_relation(field)
+            # Relations between new models are added once all of them exist
+            if target(field) in created_labels and target(field) != label(name):
+                relate.append(migrations.AddField(model_name=name.lower(), name=field_name, field=field))
+            else:
+                fields.append((field_name, field))
+        create.append(migrations.CreateModel(name=name, fields=fields))
+        add_indexes += [migrations.AddIndex(model_name=name.lower(), index=index) for index in new_states[name]['indexes']]
+
+    for name in deleted:
+        # Relations between removed models go first, a model is deleted once nothing points at it
+        for field_name, field in old_states[name]['fields']:
+            if target(field) in deleted_labels and target(field) != label(name):
+                remove_fields.append(migrations.RemoveField(model_name=name.lower(), name=field_name))
+        delete.append(migrations.DeleteModel(name=name))
+
+    for name in new_states:
+        if name not in old_states:
+            continue
+        old_fields, new_fields = dict(old_states[name]['fields']), dict(new_states[name]['fields'])
+        for field_name in old_fields:
+            if field_name not in new_fields:
+                remove_fields.append(migrations.RemoveField(model_name=name.lower(), name=field_name))
+                touched.add(name)
+        for field_name, field in new_fields.items():
+            previous = old_fields.get(field_name)
+            if previous is not None and previous.deconstruct()[1:] == field.deconstruct()[1:]:
+                continue
+            touched.add(name)
+            note_relation(field)
+            if previous is None or previous.many_to_many != field.many_to_many:
+                # A many-to-many field is a table of its own, it cannot be altered into a column
+                if previous is not None:
+                    remove_fields.append(migrations.RemoveField(model_name=name.lower(), name=field_name))
+                field, preserve_default = with_default(name, field_name, field)
+                add_fields.append(migrations.AddField(model_name=name.lower(), name=field_name, field=field, preserve_default=preserve_default))
+            else:
+                preserve_default = True
+                if previous.null:
+                    field, preserve_default = with_default(name, field_name, field)
+                alter_fields.append(migrations.AlterField(model_name=name.lower(), name=field_name, field=field, preserve_default=preserve_default))
+        old_indexes = {index.name: index for index in old_states[name]['indexes']}
+        new_indexes = {index.name: index for index in new_states[name]['indexes']}
+        for key, index in old_indexes.items():
+            if key not in new_indexes or new_indexes[key].deconstruct() != index.deconstruct():
+                remove_indexes.append(migrations.RemoveIndex(model_name=name.lower(), name=key))
+        for key, index in new_indexes.items():
+            if key not in old_indexes or old_indexes[key].deconstruct() != index.deconstruct():
+                add_indexes.append(migrations.AddIndex(model_name=name.lower(), index=index))
+
+    for name in list(old_states) + created:
+        old_search = old_states.get(name, {}).get('search', [])
+        new_search = new_states.get(name, {}).get('search', [])
+        if name not in created and name not in deleted and name not in touched and old_search == new_search:
+            continue
+        table = f'{app_name}_{name.lower()}'
+        if old_search:
+            sql, reverse_sql = search_sql(table, old_search, database)
+            drop_search.append(migrations.RunSQL(sql=reverse_sql, reverse_sql=sql))
+        if new_search:
+            sql, reverse_sql = search_sql(table, new_search, database)
+            create_search.append(migrations.RunSQL(sql=sql, reverse_sql=reverse_sql))
+
+    related.discard(app_name)
+    operations = (drop_search + create + relate + remove_indexes + remove_fields + add_fields
+                  + alter_fields + delete + add_indexes + create_search)
+    return operations, related, warnings
+
+def schema_migration_content(app_name, name, dependencies, operations):
+    # Migration applying the schema changes of an app since the previous build
+    from django.db import migrations
+    from django.db.migrations.writer import MigrationWriter
+    migration = migrations.Migration(name, app_name)
+    migration.dependencies = dependencies
+    migration.operations = operations
+    return ("# Schema changes since the previous build, generated by buildapp\n\n"
+            + MigrationWriter(migration, include_header=False).as_string())
+
+def search_content(database='sqlite'):
+    # Content of the search.py module (full-text search action and admin search) for the chosen database
+    if database == 'postgresql':
+        backend = '''
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db.models import F
+
+# Text search configuration, must match the one of the search migration triggers
+SEARCH_CONFIG = 'english'
+
+
+def search_query(text):
+    text = text.strip()
+    return SearchQuery(text, search_type='websearch', config=SEARCH_CONFIG) if text else None
+
+
+def matching(queryset, text):
+    query = search_query(text)
+    return queryset.filter(search_vector=query) if query is not None else queryset.none()
+
+
+def ranked_search(queryset, text, limit, offset):
+    """
+    (count, [(object, rank), ...]) of the rows of queryset matching text, best first.
+    """
+    query = search_query(text)
+    if query is None:
+        return 0, []
+    matches = queryset.filter(search_vector=query)
+    ranked = matches.annotate(rank=SearchRank(F('search_vector'), query)).order_by('-rank')[offset:offset + limit]
+    return matches.count(), [(obj, obj.rank) for obj in ranked]
+'''
+    else:
+        backend = '''
+import re
+
+from django.db import connections
+from django.db.models import FloatField
+from django.db.models.expressions import RawSQL
+
+
+def search_table(model):
+    # FTS5 table created by the search migration of the model's app
+    return f'{model._meta.db_table}_search'
+
+
+def match_expression(text):
+    """
+    FTS5 query matching rows containing every word of text, the last one as a prefix.
+    Words are quoted, so FTS5 operators and syntax in the input are matched literally.
+    """
+    words = re.findall(r'\\w+', text)
+    if not words:
+        return None
+    return ' '.join(f'"{word}"' for word in words) + '*'
+
+
+def matching(queryset, text):
+    expression = match_expression(text)
+    if expression is None:
+        return queryset.none()
+    table = connections[queryset.db].ops.quote_name(search_table(queryset.model))
+    return queryset.filter(pk__in=RawSQL(f'SELECT rowid FROM {table} WHERE {table} MATCH %s', [expression]))
+
+
+def ranked_search(queryset, text, limit, offset):
+    """
+    (count, [(object, rank), ...]) of the rows of queryset matching text, best first. The
+    matches are filtered by queryset before they are counted and paged, each ranked by bm25
+    in a subquery on the index restricted to its rowid.
+    """
+    expression = match_expression(text)
+    if expression is None:
+        return 0, []
+    quote_name = connections[queryset.db].ops.quote_name
+    table = quote_name(search_table(queryset.model))
+    pk_column = f'{quote_name(queryset.model._meta.db_table)}.{quote_name(queryset.model._meta.pk.column)}'
+    matches = matching(queryset, text)
+    rank = RawSQL(
+        f'SELECT -bm25({table}) FROM {table} WHERE {table} MATCH %s AND {table}.rowid = {pk_column}',
+        [expression], output_field=FloatField(),
+    )
+    ranked = matches.annotate(rank=rank).order_by('-rank', 'pk')[offset:offset + limit]
+    return matches.count(), [(obj, obj.rank) for obj in ranked]
+'''
+    return backend + '''
+from rest_framework.decorators import action
+from rest_framework.response import Response
+
+
+def bounded_int(value, default, maximum):
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        return default
+    return max(0, min(number, maximum))
+
+
+class SearchMixin:
+    """
+    Adds <prefix>/search/?q=<text>&limit=&offset= to a viewset: the rows whose searchable
+    fields match q, best ranked first, rendered with the list serializer plus their rank.
+    """
+    search_page_size = 20
+    max_search_page_size = 100
+
+    @action(detail=False, methods=['get'], url_path='search')
+    def search(self, request, *args, **kwargs):
+        limit = bounded_int(request.query_params.get('limit'), self.search_page_size, self.max_search_page_size)
+        offset = bounded_int(request.query_params.get('offset'), 0, 2 ** 31)
+        queryset = self.filter_queryset(self.get_queryset())
+        count, ranked = ranked_search(queryset, request.query_params.get('q', ''), limit, offset)
+
+        serializer_class = getattr(self, 'list_serializer_class', None) or self.get_serializer_class()
+        rows = serializer_class([obj for obj, _ in ranked], many=True, context=self.get_serializer_context()).data
+        for row, (_, rank) in zip(rows, ranked):
+            row['rank'] = round(float(rank), 6)
+        return Response({'count': count, 'results': rows})
+
+
+class FullTextSearchAdminMixin:
+    """
+    Admin changelist search through the full-text index instead of icontains over every field.
+    """
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term.strip():
+            return queryset, False
+        return matching(queryset, search_term), False
+'''
+
+def aggregates_content(project_name):
+    # Content of the aggregates.py module annotating the generated viewsets with reverse-relation aggregates
+    return f'''
+from django.apps import apps
+from django.db.models import Avg, Count, Max, Min, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from rest_framework.permissions import SAFE_METHODS
+
+from {project_name}.fieldsets import requested_fields
+''' + '''
+FUNCTIONS = {'Count': Count, 'Sum': Sum, 'Avg': Avg, 'Min': Min, 'Max': Max}
+
+# Aggregates of no rows that are 0 rather than null
+ZERO_WHEN_EMPTY = ('Count', 'Sum')
+
+
+def reverse_aggregate(label, relation, function='Count', field=None):
+    """
+    function(field) over the rows of the model `label` whose `relation` (a foreign key or
+    many-to-many field) points at the annotated row. A correlated subquery rather than a
+    join with GROUP BY: several aggregates on one queryset do not multiply each other's
+    rows, and .only()/.values() keep narrowing the outer query.
+    """
+    model = apps.get_model(label)
+    rows = model._default_manager.filter(**{relation: OuterRef('pk')}).order_by().values(relation)
+    subquery = Subquery(rows.annotate(value=FUNCTIONS[function](field or 'pk')).values('value'))
+    if function in ZERO_WHEN_EMPTY:
+        return Coalesce(subquery, Value(0), output_field=subquery.output_field)
+    return subquery
+
+
+class AggregatesMixin:
+    """
+    Annotates the queryset of read requests with the viewset's `aggregates`
+    ({name: expression}), computed in the same query as the rows. Aggregates that
+    ?fields= leaves out are not computed.
+    """
+    aggregates = {}
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        request = getattr(self, 'request', None)
+        if request is None or request.method not in SAFE_METHODS or not self.aggregates:
+            return queryset
+        include, exclude, _ = requested_fields(request)
+        names = [name for name in self.aggregates if (not include or name in include) and name not in exclude]
+        if not names:
+            return queryset
+        return queryset.annotate(**{name: self.aggregates[name] for name in names})
+'''
+
+def thumbnails_content():
+    # Content of the thumbnails.py module rendering resized variants of uploaded images
+    return '''"""
+Resized variants of uploaded images, stored next to the original (profile_pictures/me.png gets
+profile_pictures/me.thumbnail.png and profile_pictures/me.medium.png). They are rendered with
+Pillow by a thread pool once the save of the upload is committed, so uploads do not wait for
+them. The URL of a variant is derived from the original's name without looking the file up,
+so pages listing images do not touch the storage once per row. Until a variant is rendered (a
+moment after the save commits) its URL is not found, the admin's <img> then falls back to the
+original.
+"""
+import io
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import models, transaction
+from django.db.models.signals import post_save
+from django.utils.html import format_html
+from rest_framework import serializers
+
+logger = logging.getLogger(__name__)
+
+# Bounding box of each variant, images keep their aspect ratio and are never enlarged
+VARIANTS = getattr(settings, 'API_THUMBNAILS', {'thumbnail': (150, 150), 'medium': (600, 600)})
+# Pillow releases the GIL while decoding, resizing and encoding, so threads render in parallel
+WORKERS = getattr(settings, 'API_THUMBNAIL_WORKERS', min(4, os.cpu_count() or 1))
+
+_executor = ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix='thumbnails')
+_lock = threading.Lock()
+# Image name -> future rendering its variants
+_pending = {}
+
+
+def variant_name(name, variant):
+    root, extension = os.path.splitext(name)
+    return f'{root}.{variant}{extension}'
+
+
+def render_variants(storage, name):
+    from PIL import Image, ImageOps
+
+    with storage.open(name, 'rb') as image_file, Image.open(image_file) as original:
+        image_format = original.format
+        # Photos are stored as shot, with their orientation in the EXIF data
+        image = ImageOps.exif_transpose(original)
+        for variant, size in VARIANTS.items():
+            resized = image.copy()
+            resized.thumbnail(size, Image.LANCZOS)
+            if image_format == 'JPEG' and resized.mode not in ('RGB', 'L'):
+                resized = resized.convert('RGB')
+            buffer = io.BytesIO()
+            resized.save(buffer, format=image_format)
+            target = variant_name(name, variant)
+            # A variant left by a previous image of the same name is replaced, not renamed
+            if storage.exists(target):
+                storage.delete(target)
+            storage.save(target, ContentFile(buffer.getvalue()))
+
+
+def render_logged(storage, name):
+    try:
+        render_variants(storage, name)
+    except Exception:
+        logger.exception('Rendering the variants of %s failed', name)
+
+
+def schedule(storage, name):
+    """
+    Render the variants of the image name of storage in the background, once at a time per
+    image. Returns the future of the rendering.
+    """
+    with _lock:
+        future = _pending.get(name)
+        if future is None:
+            future = _executor.submit(render_logged, storage, name)
+            _pending[name] = future
+            future.add_done_callback(lambda done: _forget(name, done))
+    return future
+
+
+def _forget(name, future):
+    with _lock:
+        if _pending.get(name) is future:
+            del _pending[name]
+
+
+def wait_for_thumbnails(timeout=None):
+    # Block until the variants scheduled so far are rendered, for tests and management commands
+    with _lock:
+        futures = list(_pending.values())
+    wait(futures, timeout=timeout)
+
+
+def has_variants(file):
+    return all(file.storage.exists(variant_name(file.name, variant)) for variant in VARIANTS)
+
+
+def image_fields(model):
+    return [field for field in model._meta.concrete_fields if isinstance(field, models.ImageField)]
+
+
+def image_saved(sender, instance, **kwargs):
+    for field in image_fields(sender):
+        file = getattr(instance, field.attname)
+        if file and not has_variants(file):
+            # Rendering reads the stored file, which a rolled back save may never have committed to
+            transaction.on_commit(lambda storage=file.storage, name=file.name: schedule(storage, name))
+
+
+def connect_image_fields():
+    """
+    Render variants for the images saved into the ImageFields of every installed model.
+    Called once the app registry is ready, see Authentication.apps.
+    """
+    for model in apps.get_models():
+        if image_fields(model):
+            post_save.connect(image_saved, sender=model, dispatch_uid=f'thumbnails:{model._meta.label_lower}')
+
+
+def variant_url(storage, name, variant='thumbnail'):
+    # URL of a variant of the image name, rendered or about to be
+    if not name:
+        return None
+    return storage.url(variant_name(name, variant))
+
+
+def thumbnail_url(file, variant='thumbnail'):
+    return variant_url(file.storage, file.name, variant) if file else None
+
+
+def thumbnail_tag(file, alt='', variant='thumbnail'):
+    """
+    <img> of a variant for the admin, the original is scaled down by the browser until the
+    variant is rendered.
+    """
+    if not file:
+        return ''
+    width, height = VARIANTS[variant]
+    return format_html(
+        '<img src="{}" alt="{}" loading="lazy" style="max-width: {}px; max-height: {}px" '
+        'onerror="this.onerror = null; this.src = \\'{}\\'"/>',
+        thumbnail_url(file, variant), alt, width, height, file.url,
+    )
+
+
+class ThumbnailURLField(serializers.Field):
+    """
+    Read-only URL of a variant of the image field named by source, absolute when the
+    serializer context has the request.
+    """
+
+    def __init__(self, variant='thumbnail', **kwargs):
+        self.variant = variant
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        return self.absolute(thumbnail_url(value, self.variant), self.context.get('request'))
+
+    def absolute(self, url, request):
+        return request.build_absolute_uri(url) if url and request is not None else url
+
+    def values_converter(self, model, request):
+        # Representation of the image name values() reads, see listing.build_converters
+        storage = model._meta.get_field(self.source).storage
+        return lambda name: self.absolute(variant_url(storage, name, self.variant), request)
+'''
+
+def instrumentation_content():
+    # Content of the instrumentation.py module (per-request SQL and timing middleware)
+    return '''
+import json
+import logging
+import time
+from collections import Counter
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'ENABLED': True,
+    'SERVER_TIMING': False,
+    'SLOW_REQUEST_MS': 500,
+    'TOP_QUERIES': 5,
+}
+
+# (sql, seconds) of the queries of the current request, None outside instrumented requests.
+# Context variables follow the request into sync_to_async threads, thread-locals would not.
+current_queries = ContextVar('current_queries', default=None)
+
+
+def record_query(execute, sql, params, many, context):
+    queries = current_queries.get()
+    if queries is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        queries.append((sql, time.perf_counter() - started))
+
+
+def install_wrapper(sender=None, connection=None, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def repeated_queries(queries):
+    # The same SQL run several times with different parameters, the usual N+1 pattern
+    counts = Counter(sql for sql, _ in queries)
+    return [(sql, count) for sql, count in counts.most_common() if count > 1]
+
+
+class InstrumentationMiddleware:
+    """
+    Records the number of queries, SQL time, repeated queries and view time of every
+    request. Logs requests slower than SLOW_REQUEST_MS as JSON with their slowest and most
+    repeated queries, and adds the numbers to the response as a Server-Timing header when
+    SERVER_TIMING is on (off by default, the header is readable by any client).
+    Configured by the API_INSTRUMENTATION setting, not loaded at all when disabled.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.options = {**DEFAULTS, **getattr(settings, 'API_INSTRUMENTATION', {})}
+        if not self.options['ENABLED']:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+        connection_created.connect(install_wrapper, weak=False, dispatch_uid='instrumentation')
+        for connection in connections.all(initialized_only=True):
+            install_wrapper(connection=connection)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        queries = []
+        token = current_queries.set(queries)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            current_queries.reset(token)
+        return self.finish(request, response, queries, started)
+
+    async def __acall__(self, request):
+        queries = []
+        token = current_queries.set(queries)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_queries.reset(token)
+        return self.finish(request, response, queries, started)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.instrumentation_view_started = time.perf_counter()
+
+    def finish(self, request, response, queries, started):
+        finished = time.perf_counter()
+        total_ms = (finished - started) * 1000
+        view_started = getattr(request, 'instrumentation_view_started', None)
+        view_ms = (finished - view_started) * 1000 if view_started is not None else 0.0
+        sql_ms = sum(seconds for _, seconds in queries) * 1000
+        repeated = repeated_queries(queries)
+
+        if self.options['SERVER_TIMING']:
+            response['Server-Timing'] = (
+                f'total;dur={total_ms:.1f}, view;dur={view_ms:.1f}, '
+                f'db;dur={sql_ms:.1f};desc="{len(queries)} queries, {len(repeated)} repeated"'
+            )
+        if total_ms >= self.options['SLOW_REQUEST_MS']:
+            top = self.options['TOP_QUERIES']
+            slowest = sorted(queries, key=lambda query: query[1], reverse=True)[:top]
+            logger.warning(json.dumps({
+                'event': 'slow_request',
+                'method': request.method,
+                'path': request.get_full_path(),
+                'status': response.status_code,
+                'total_ms': round(total_ms, 2),
+                'view_ms': round(view_ms, 2),
+                'sql_ms': round(sql_ms, 2),
+                'queries': len(queries),
+                'slowest_queries': [{'sql': sql, 'ms': round(seconds * 1000, 2)} for sql, seconds in slowest],
+                'repeated_queries': [{'sql': sql, 'count': count} for sql, count in repeated[:top]],
+            }))
+        return response
+'''
+
+def routers_content():
+    # Content of the routers.py module (primary/replica database router and read-your-writes middleware)
+    return '''
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+DEFAULTS = {
+    'ALIAS': 'replica',
+    'APPS': [],
+    'PIN_SECONDS': 5,
+    'COOKIE': 'api_primary',
+}
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# Routing of the current request, None outside requests (management commands, shell):
+# everything then reads from the primary. A mutable object rather than a flag so that
+# writes made in sync_to_async threads are seen by the request that started them.
+current_routing = ContextVar('current_routing', default=None)
+
+
+def replica_options():
+    return {**DEFAULTS, **getattr(settings, 'API_REPLICA', {})}
+
+
+class RequestRouting:
+    __slots__ = ('use_replica', 'wrote')
+
+    def __init__(self, use_replica):
+        self.use_replica = use_replica
+        self.wrote = False
+
+
+def same_database(alias, other=DEFAULT_DB_ALIAS):
+    # A replica configured with the primary's database (a TEST MIRROR during tests, or no
+    # replica host set) is the primary: a second connection would not see the first one's
+    # uncommitted transaction.
+    first, second = connections[alias].settings_dict, connections[other].settings_dict
+    return all(first.get(key) == second.get(key) for key in ('ENGINE', 'NAME', 'HOST', 'PORT'))
+
+
+class PrimaryReplicaRouter:
+    """
+    Sends the reads of the generated apps (API_REPLICA['APPS']) made by safe requests to
+    the replica alias, and everything else, writes included, to the primary. The first
+    write of a request moves its remaining reads to the primary.
+    """
+
+    def __init__(self):
+        options = replica_options()
+        self.alias = options['ALIAS']
+        self.apps = frozenset(options['APPS'])
+
+    def db_for_read(self, model, **hints):
+        routing = current_routing.get()
+        if routing is None or not routing.use_replica or model._meta.app_label not in self.apps:
+            return None
+        if same_database(self.alias):
+            return None
+        return self.alias
+
+    def db_for_write(self, model, **hints):
+        routing = current_routing.get()
+        if routing is not None:
+            routing.use_replica = False
+            routing.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases hold the same rows
+        if {obj1._state.db, obj2._state.db} <= {DEFAULT_DB_ALIAS, self.alias}:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # The replica receives the primary's schema through replication
+        if db == self.alias:
+            return False
+        return None
+
+
+class ReplicaPinningMiddleware:
+    """
+    Lets the reads of GET/HEAD/OPTIONS requests go to the replica. A request that writes
+    sets a cookie keeping the client's reads on the primary for PIN_SECONDS, longer than
+    the replication lag, so clients always read their own writes.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        options = replica_options()
+        self.cookie = options['COOKIE']
+        self.pin_seconds = options['PIN_SECONDS']
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        routing = self.start(request)
+        token = current_routing.set(routing)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_routing.reset(token)
+        return self.finish(response, routing)
+
+    async def __acall__(self, request):
+        routing = self.start(request)
+        token = current_routing.set(routing)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_routing.reset(token)
+        return self.finish(response, routing)
+
+    def pinned(self, request):
+        try:
+            return float(request.COOKIES.get(self.cookie, 0)) > time.time()
+        except ValueError:
+            return False
+
+    def start(self, request):
+        return RequestRouting(request.method in SAFE_METHODS and not self.pinned(request))
+
+    def finish(self, response, routing):
+        if routing.wrote:
+            response.set_cookie(
+                self.cookie, f'{time.time() + self.pin_seconds:.3f}',
+                max_age=self.pin_seconds, httponly=True, samesite='Lax',
+            )
+        return response
+'''
+
+def sync_replica_command_content(project_name):
+    # Content of the syncreplica management command copying the SQLite primary into the replica file
+    return f'''
+import sqlite3
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from {project_name}.routers import replica_options
+''' + '''
+
+def database_uri(name):
+    # The replica is configured as a read-only URI, the copy is written through a writable one
+    name = str(name)
+    if name.startswith('file:'):
+        return name.split('?', 1)[0]
+    return Path(name).resolve().as_uri()
+
+
+class Command(BaseCommand):
+    help = 'Copy the SQLite primary database into the replica file, once or every --interval seconds'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=0,
+                            help='Seconds between copies, simulating replication lag. Copies once when 0.')
+
+    def handle(self, *args, **options):
+        primary = connections[DEFAULT_DB_ALIAS].settings_dict
+        replica = connections[replica_options()['ALIAS']].settings_dict
+        if any(database['ENGINE'] != 'django.db.backends.sqlite3' for database in (primary, replica)):
+            raise CommandError('syncreplica copies SQLite databases only, other servers replicate themselves')
+        while True:
+            started = time.perf_counter()
+            source = sqlite3.connect(database_uri(primary['NAME']), uri=True)
+            target = sqlite3.connect(database_uri(replica['NAME']), uri=True)
+            try:
+                # The online backup API copies a consistent snapshot while the server keeps writing
+                source.backup(target)
+            finally:
+                target.close()
+                source.close()
+            self.stdout.write(f'Replica synced in {(time.perf_counter() - started) * 1000:.0f} ms')
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
+'''
+
+def export_content(project_name):
+    # Content of the export.py module shared by the generated viewsets
+    return f'''
+import csv
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from rest_framework import serializers
+from rest_framework.decorators import action
+
+from {project_name}.listing import build_converters, column_aliases
+''' + '''
+
+class Echo:
+    # csv.writer target that hands back each formatted line instead of storing it
+    def write(self, value):
+        return value
+
+
+class ExportMixin:
+    """
+    Adds GET <prefix>/export/csv/ and <prefix>/export/ndjson/ streaming every row that
+    the list endpoint would return (same filters and ?fields=), read with
+    values_list().iterator() so memory stays flat regardless of table size.
+    """
+    export_chunk_size = getattr(settings, 'API_EXPORT_CHUNK_SIZE', 2000)
+
+    def get_export_rows(self, request):
+        queryset = self.filter_queryset(self.get_queryset()).prefetch_related(None)
+        serializer = self.get_serializer()
+        aliases = column_aliases(serializer)
+        available = {field.name for field in queryset.model._meta.concrete_fields} | set(queryset.query.annotations) | set(aliases)
+        fields = [
+            name for name, field in serializer.fields.items()
+            if not field.write_only and name in available and not isinstance(field, serializers.BaseSerializer)
+        ]
+        converters = [
+            (fields.index(name), convert) for name, convert in build_converters(serializer, request) if name in fields
+        ]
+
+        def rows():
+            columns = [aliases.get(name, name) for name in fields]
+            for values in queryset.values_list(*columns).iterator(chunk_size=self.export_chunk_size):
+                if converters:
+                    values = list(values)
+                    for index, convert in converters:
+                        if values[index] is not None:
+                            values[index] = convert(values[index])
+                yield values
+
+        return fields, rows()
+
+    def export_response(self, content, content_type, extension):
+        response = StreamingHttpResponse(content, content_type=content_type)
+        filename = f'{self.get_queryset().model._meta.model_name}.{extension}'
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+    def batched(self, lines):
+        # Join lines into larger chunks, one write per chunk instead of per row
+        batch = []
+        for line in lines:
+            batch.append(line)
+            if len(batch) >= self.export_chunk_size:
+                yield ''.join(batch)
+                batch = []
+        if batch:
+            yield ''.join(batch)
+
+    @action(detail=False, methods=['get'], url_path='export/csv')
+    def export_csv(self, request, *args, **kwargs):
+        fields, rows = self.get_export_rows(request)
+        writer = csv.writer(Echo())
+
+        def lines():
+            yield writer.writerow(fields)
+            for values in rows:
+                yield writer.writerow(values)
+
+        return self.export_response(self.batched(lines()), 'text/csv', 'csv')
+
+    @action(detail=False, methods=['get'], url_path='export/ndjson')
+    def export_ndjson(self, request, *args, **kwargs):
+        fields, rows = self.get_export_rows(request)
+        encoder = DjangoJSONEncoder()
+
+        def lines():
+            for values in rows:
+                yield encoder.encode(dict(zip(fields, values))) + '\\n'
+
+        return self.export_response(self.batched(lines()), 'application/x-ndjson', 'ndjson')
+'''
+
+def factories_content():
+    # Content of the factories.py module used by the generated tests
+    return '''
+import datetime
+import decimal
+import itertools
+import uuid
+
+from django.db import models
+from django.utils import timezone
+
+_sequence = itertools.count(1)
+
+
+def fake_value(field, n):
+    """
+    A value for a concrete, non-relational field derived from the sequence number n and
+    kept within the field's own limits (max_length, max_digits, choices).
+    """
+    if field.choices:
+        return field.choices[n % len(field.choices)][0]
+    if isinstance(field, models.BooleanField):
+        return n % 2 == 0
+    if isinstance(field, models.EmailField):
+        return f'user{n}@example.com'
+    if isinstance(field, models.URLField):
+        return f'https://example.com/{n}'
+    if isinstance(field, models.GenericIPAddressField):
+        return f'10.0.{n // 256 % 256}.{n % 256}'
+    if isinstance(field, models.FileField):
+        return ''
+    if isinstance(field, (models.CharField, models.TextField)):
+        value = f'{field.name}-{n}'
+        # Keep the tail so the sequence number (and uniqueness) survives truncation
+        return value[-field.max_length:] if field.max_length else value
+    if isinstance(field, models.DecimalField):
+        return decimal.Decimal(n % 10 ** (field.max_digits - field.decimal_places))
+    if isinstance(field, (models.SmallIntegerField, models.PositiveSmallIntegerField)):
+        return n % 32767
+    if isinstance(field, models.IntegerField):
+        return n
+    if isinstance(field, models.FloatField):
+        return n * 1.5
+    if isinstance(field, models.DateTimeField):
+        return timezone.now() - datetime.timedelta(minutes=n)
+    if isinstance(field, models.DateField):
+        return datetime.date.today() - datetime.timedelta(days=n % 3650)
+    if isinstance(field, models.TimeField):
+        return datetime.time(n % 24, n % 60)
+    if isinstance(field, models.DurationField):
+        return datetime.timedelta(seconds=n)
+    if isinstance(field, models.UUIDField):
+        return uuid.uuid4()
+    if isinstance(field, models.JSONField):
+        return {'n': n}
+    if isinstance(field, models.BinaryField):
+        return b''
+    return None
+
+
+def make_instance(model, with_many_to_many=False, _chain=(), **overrides):
+    """
+    Create and save an instance of model with every field filled in, creating the related
+    rows it points to. with_many_to_many also links one new related row per many-to-many field.
+    """
+    n = next(_sequence)
+    chain = _chain + (model,)
+    values = {}
+    for field in model._meta.concrete_fields:
+        if field.primary_key or field.name in overrides or field.has_default():
+            continue
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False):
+            continue
+        if field.is_relation:
+            # Stop at relation cycles, leaving nullable relations empty
+            if field.related_model in chain:
+                continue
+            values[field.name] = make_instance(field.related_model, _chain=chain)
+        else:
+            values[field.name] = fake_value(field, n)
+    values.update(overrides)
+    instance = model._default_manager.create(**values)
+
+    if with_many_to_many:
+        for field in model._meta.many_to_many:
+            if field.related_model not in chain:
+                getattr(instance, field.name).add(make_instance(field.related_model, _chain=chain))
+    return instance
+'''
+
+def seed_command_content(project_name, app_names, cache_enabled=False):
+    # Content of the seed management command filling the schema's models with generated rows
+    content = f'''
+import random
+import time
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count, Max, Min
+
+from {project_name}.factories import fake_value
+'''
+    if cache_enabled:
+        content += f"from {project_name}.caching import bump_model_version\n"
+    content += f'''
+# Apps generated from the schema, their models are seeded
+SEED_APPS = {app_names}
+''' + '''
+
+def forward_relations(model):
+    return [field for field in model._meta.concrete_fields if field.is_relation]
+
+
+def dependency_order(models):
+    """
+    The models and every model their foreign keys point to, ordered so that targets come
+    first. Cycles are broken at nullable foreign keys, which are then left empty.
+    """
+    pending = {}
+    stack = list(models)
+    while stack:
+        model = stack.pop()
+        if model not in pending:
+            pending[model] = forward_relations(model)
+            stack.extend(field.related_model for field in pending[model])
+
+    ordered = []
+    while pending:
+        done = set(ordered)
+        ready = [
+            model for model, fields in pending.items()
+            if all(field.related_model in done or field.related_model is model for field in fields)
+        ]
+        if not ready:
+            ready = [
+                model for model, fields in pending.items()
+                if all(field.related_model in done or field.related_model is model or field.null for field in fields)
+            ]
+        if not ready:
+            labels = ', '.join(model._meta.label for model in pending)
+            raise CommandError(f'Required foreign keys form a cycle between {labels}.')
+        for model in ready:
+            ordered.append(model)
+            del pending[model]
+    return ordered
+
+
+class PkPool:
+    """
+    Primary keys of the rows of a model, indexable by position. Contiguous keys are held
+    as a range, so pointing millions of rows at a table does not load its keys.
+    """
+
+    def __init__(self, model):
+        manager = model._default_manager
+        stats = manager.aggregate(low=Min('pk'), high=Max('pk'), count=Count('pk'))
+        if stats['count'] and isinstance(stats['low'], int) and stats['high'] - stats['low'] + 1 == stats['count']:
+            self.pks = range(stats['low'], stats['high'] + 1)
+        else:
+            self.pks = list(manager.order_by('pk').values_list('pk', flat=True))
+
+    def __len__(self):
+        return len(self.pks)
+
+    def __getitem__(self, index):
+        return self.pks[index]
+
+
+class Command(BaseCommand):
+    help = 'Fill every generated model with fake rows, in dependency order, using bulk_create'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000, help='Rows to add to every model.')
+        parser.add_argument('--fanout', type=int, default=3,
+                            help='Rows pointing at each related row, and links per many-to-many field of each row.')
+        parser.add_argument('--batch-size', type=int, default=2000, help='Rows per INSERT statement and transaction.')
+        parser.add_argument('--seed', type=int, default=0, help='Seed of the random many-to-many links.')
+
+    def handle(self, *args, **options):
+        self.rows = options['rows']
+        self.fanout = max(options['fanout'], 1)
+        self.batch_size = options['batch_size']
+        self.random = random.Random(options['seed'])
+        self.pools = {}
+
+        seeded = [model for label in SEED_APPS for model in apps.get_app_config(label).get_models()]
+        first_new_pk = {}
+        for model in dependency_order(seeded):
+            # Models outside the schema (e.g. the user model) are only filled when they are empty
+            if model not in seeded and model._default_manager.exists():
+                continue
+            first_new_pk[model] = model._default_manager.aggregate(last=Max('pk'))['last']
+            self.seed_model(model)
+        for model in seeded:
+            for field in model._meta.many_to_many:
+                self.link_many_to_many(model, field, first_new_pk[model])
+'''
+    if cache_enabled:
+        content += '''        # bulk_create and the many-to-many inserts send no signals
+        for model in first_new_pk:
+            bump_model_version(model)
+'''
+    content += '''
+    def pool(self, model):
+        if model not in self.pools:
+            self.pools[model] = PkPool(model)
+        return self.pools[model]
+
+    def seed_model(self, model):
+        """
+        Insert self.rows rows into model in batches. Foreign keys point at fanout consecutive
+        rows per target row, one-to-one and unique foreign keys at a target row each.
+        """
+        manager = model._default_manager
+        offset = manager.count()
+        rows = self.rows
+        plan = []
+        for field in model._meta.concrete_fields:
+            if field.primary_key or field.has_default():
+                continue
+            if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False):
+                continue
+            if not field.is_relation:
+                plan.append((field.attname, lambda n, i, field=field: fake_value(field, n)))
+                continue
+            targets = self.pool(field.related_model) if field.related_model is not model else None
+            if not targets:
+                if field.null:
+                    continue
+                raise CommandError(f'{model._meta.label}.{field.name} needs rows in {field.related_model._meta.label}.')
+            if field.unique:
+                rows = min(rows, len(targets) - offset)
+                plan.append((field.attname, lambda n, i, targets=targets: targets[offset + i]))
+            else:
+                plan.append((field.attname, lambda n, i, targets=targets: targets[(offset + i) // self.fanout % len(targets)]))
+
+        started = time.perf_counter()
+        for start in range(0, max(rows, 0), self.batch_size):
+            objects = [
+                model(**{attname: value(offset + i + 1, i) for attname, value in plan})
+                for i in range(start, min(start + self.batch_size, rows))
+            ]
+            with transaction.atomic(using=manager.db):
+                manager.bulk_create(objects, batch_size=self.batch_size)
+        self.pools.pop(model, None)
+        self.report(model._meta.label, max(rows, 0), started)
+
+    def link_many_to_many(self, model, field, after_pk):
+        """
+        Link every row added to model to fanout random rows of the field's target.
+        """
+        through = field.remote_field.through
+        targets = self.pool(field.related_model)
+        # Custom through models carry fields of their own, they are seeded as models
+        if not through._meta.auto_created or not targets:
+            return
+        source = through._meta.get_field(field.m2m_field_name()).attname
+        target = through._meta.get_field(field.m2m_reverse_field_name()).attname
+        manager = model._default_manager
+        started = time.perf_counter()
+        links = 0
+        last = after_pk
+        while True:
+            # Keyset pagination, so no cursor stays open while inserting
+            pks = manager.order_by('pk')
+            if last is not None:
+                pks = pks.filter(pk__gt=last)
+            pks = list(pks.values_list('pk', flat=True)[:self.batch_size])
+            if not pks:
+                break
+            rows = [
+                through(**{source: pk, target: targets[self.random.randrange(len(targets))]})
+                for pk in pks for _ in range(min(self.fanout, len(targets)))
+            ]
+            with transaction.atomic(using=manager.db):
+                through._default_manager.bulk_create(rows, batch_size=self.batch_size, ignore_conflicts=True)
+            links += len(rows)
+            last = pks[-1]
+        self.report(f'{model._meta.label}.{field.name}', links, started)
+
+    def report(self, label, count, started):
+        elapsed = time.perf_counter() - started
+        rate = count / elapsed if elapsed else 0
+        self.stdout.write(f'{label}: {count} rows in {elapsed:.1f}s ({rate:.0f} rows/s)')
+'''
+    return content
+
+def testing_content(project_name, replica=False, timestamps=False):
+    # Content of the testing.py module used by the generated tests
+    stdlib_imports = "import asyncio\nimport io\nimport json\nimport tempfile\nfrom unittest import mock\n"
+    django_imports = (
+        "from django.db import connection, router\nfrom django.http import HttpResponse\nfrom django.test import RequestFactory\n"
+        if replica else "from django.db import connection\n"
+    )
+    project_imports = f"from {project_name} import routers\n" if replica else ''
+    content = f'''
+{stdlib_imports}
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+{django_imports}from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.generics import GenericAPIView
+from rest_framework.utils.encoders import JSONEncoder
+
+{project_imports}from {project_name}.asgi import application
+from {project_name}.factories import make_instance
+from {project_name}.thumbnails import VARIANTS, thumbnail_tag, thumbnail_url, variant_name, wait_for_thumbnails
+''' + '''
+
+async def asgi_request(method, path, body=None, query_string=''):
+    """
+    Send one HTTP request through the project's ASGI application, in-process.
+    Returns (status, headers, content).
+    """
+    payload = json.dumps(body).encode('utf-8') if body is not None else b''
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': method,
+        'scheme': 'http',
+        'path': path,
+        'raw_path': path.encode('utf-8'),
+        'query_string': query_string.encode('utf-8'),
+        'root_path': '',
+        'headers': [(b'host', b'testserver'), (b'content-type', b'application/json')],
+        'client': ('127.0.0.1', 50000),
+        'server': ('testserver', 80),
+    }
+    sent_body = False
+
+    async def receive():
+        nonlocal sent_body
+        if not sent_body:
+            sent_body = True
+            return {'type': 'http.request', 'body': payload, 'more_body': False}
+        # The client never disconnects before the response is complete
+        await asyncio.Event().wait()
+
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    await application(scope, receive, send)
+    start = next(message for message in messages if message['type'] == 'http.response.start')
+    headers = {name.decode('latin-1').lower(): value.decode('latin-1') for name, value in start['headers']}
+    content = b''.join(message.get('body', b'') for message in messages if message['type'] == 'http.response.body')
+    return start['status'], headers, content
+
+
+class QueryCountTestMixin:
+    """
+    Guards the endpoints of `model` mounted at `url` against N+1 queries: list, retrieve and
+    admin changelist requests must issue as many queries with `large` related rows seeded
+    as with `small`. Mix into a TestCase.
+    """
+    model = None
+    url = None
+    small = 2
+    large = 12
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.user = get_user_model().objects.create_superuser('querycount', 'querycount@example.com', 'pass')
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.user)
+
+    def get(self, url):
+        # Cached responses would hide the queries being counted
+        cache.clear()
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def seed(self, count):
+        return [make_instance(self.model, with_many_to_many=True) for _ in range(count)]
+
+    def link(self, obj, count):
+        # Attach count more rows to every many-to-many field of obj
+        for field in self.model._meta.many_to_many:
+            getattr(obj, field.name).add(*[make_instance(field.related_model) for _ in range(count)])
+
+    def assertQueriesIndependentOfRows(self, url, grow):
+        """
+        Request url once to learn the number of queries, call grow() to add rows, and
+        assert the same request still issues exactly that many queries.
+        """
+        # A first request warms per-process caches (content types, permissions) out of the count
+        self.get(url)
+        with CaptureQueriesContext(connection) as baseline:
+            self.get(url)
+        grow()
+        with self.assertNumQueries(len(baseline)):
+            self.get(url)
+
+    def test_list_queries(self):
+        self.seed(self.small)
+        self.assertQueriesIndependentOfRows(self.url, lambda: self.seed(self.large - self.small))
+
+    def test_retrieve_queries(self):
+        obj = self.seed(1)[0]
+        self.link(obj, self.small)
+        self.assertQueriesIndependentOfRows(f'{self.url}{obj.pk}/', lambda: self.link(obj, self.large - self.small))
+
+    def test_admin_changelist_queries(self):
+        opts = self.model._meta
+        url = reverse(f'admin:{opts.app_label}_{opts.model_name}_changelist')
+        self.seed(self.small)
+        self.assertQueriesIndependentOfRows(url, lambda: self.seed(self.large - self.small))
+
+
+class SearchTestMixin:
+    """
+    Checks that `url`search/ and the admin changelist search find a row by a word of its
+    `search_field`. Mix into a TestCase.
+    """
+    model = None
+    url = None
+    search_field = None
+    word = 'quokka'
+
+    def setUp(self):
+        super().setUp()
+        self.others = [make_instance(self.model) for _ in range(3)]
+        self.target = make_instance(self.model, **{self.search_field: self.word})
+
+    def test_search_ranks_matching_row(self):
+        response = self.client.get(f'{self.url}search/', {'q': self.word[:-1]})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['count'], 1)
+        self.assertEqual(response.json()['results'][0]['id'], self.target.pk)
+
+    def test_search_counts_and_pages_filtered_rows(self):
+        second = make_instance(self.model, **{self.search_field: f'{self.word} {self.word}'})
+        pages = [self.client.get(f'{self.url}search/', {'q': self.word, 'limit': 1, 'offset': offset}).json() for offset in (0, 1, 2)]
+        self.assertEqual([page['count'] for page in pages], [2, 2, 2])
+        self.assertEqual(sorted(row['id'] for page in pages for row in page['results']), sorted([self.target.pk, second.pk]))
+        # Rows the viewset filters out are neither counted nor take a place on a page
+        hidden = lambda view, queryset: queryset.exclude(pk=second.pk)
+        with mock.patch.object(GenericAPIView, 'filter_queryset', hidden):
+            response = self.client.get(f'{self.url}search/', {'q': self.word, 'limit': 1})
+        self.assertEqual(response.json()['count'], 1)
+        self.assertEqual([row['id'] for row in response.json()['results']], [self.target.pk])
+
+    def test_search_without_words(self):
+        response = self.client.get(f'{self.url}search/', {'q': '"*'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'count': 0, 'results': []})
+
+    def test_admin_search(self):
+        user = get_user_model().objects.create_superuser('search', 'search@example.com', 'pass')
+        self.client.force_login(user)
+        opts = self.model._meta
+        response = self.client.get(reverse(f'admin:{opts.app_label}_{opts.model_name}_changelist'), {'q': self.word})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['cl'].result_count, 1)
+
+
+class AggregateTestMixin:
+    """
+    Checks the reverse-relation aggregates of `model` mounted at `url` in list and retrieve
+    responses against the same aggregates computed in Python. `aggregates` maps each name to
+    (related model label, relation, function, field). Mix into a TestCase.
+    """
+    model = None
+    url = None
+    aggregates = {}
+    children = 3
+
+    def setUp(self):
+        super().setUp()
+        self.target, self.other, self.empty = [make_instance(self.model) for _ in range(3)]
+        for label, relation in {(label, relation) for label, relation, _, _ in self.aggregates.values()}:
+            for _ in range(self.children):
+                self.add_child(self.target, label, relation)
+            self.add_child(self.other, label, relation)
+
+    def add_child(self, obj, label, relation):
+        related_model = apps.get_model(label)
+        if related_model._meta.get_field(relation).many_to_many:
+            child = make_instance(related_model)
+            getattr(child, relation).add(obj)
+            return child
+        return make_instance(related_model, **{relation: obj})
+
+    def expected(self, obj, name):
+        # The aggregate computed in Python from the related rows, rendered as JSON would render it
+        label, relation, function, field = self.aggregates[name]
+        rows = apps.get_model(label)._default_manager.filter(**{relation: obj})
+        values = [value for value in rows.values_list(field or 'pk', flat=True) if value is not None]
+        if function == 'Count':
+            value = len(values)
+        elif function == 'Sum':
+            value = sum(values)
+        elif not values:
+            value = None
+        elif function == 'Avg':
+            value = sum(values) / len(values)
+        else:
+            value = min(values) if function == 'Min' else max(values)
+        return json.loads(json.dumps(value, cls=JSONEncoder))
+
+    def assertAggregates(self, row, obj):
+        for name in self.aggregates:
+            expected = self.expected(obj, name)
+            if isinstance(expected, (int, float)) and not isinstance(expected, bool):
+                self.assertAlmostEqual(float(row[name]), expected, places=4, msg=name)
+            else:
+                self.assertEqual(row[name], expected, msg=name)
+
+    def get(self, url, params=None):
+        cache.clear()
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_list_aggregates(self):
+        rows = {row['id']: row for row in self.get(self.url)}
+        for obj in (self.target, self.other, self.empty):
+            self.assertAggregates(rows[obj.pk], obj)
+
+    def test_retrieve_aggregates(self):
+        self.assertAggregates(self.get(f'{self.url}{self.target.pk}/'), self.target)
+
+    def test_fields_selects_aggregates(self):
+        name = next(iter(self.aggregates))
+        rows = self.get(self.url, {'fields': f'id,{name}'})
+        self.assertEqual(set(rows[0]), {'id', name})
+
+
+class AsyncViewTestMixin:
+    """
+    Tests for the async views of `model` mounted at `url`, sending concurrent requests
+    through the ASGI application. Mix into a TransactionTestCase: the requests are served
+    from other threads and only see committed rows.
+    """
+    model = None
+    url = None
+    rows = 5
+    concurrency = 10
+
+    def setUp(self):
+        super().setUp()
+        self.objects = [make_instance(self.model, with_many_to_many=True) for _ in range(self.rows)]
+
+    async def test_concurrent_list_and_retrieve(self):
+        lists = [asgi_request('GET', self.url) for _ in range(self.concurrency)]
+        details = [asgi_request('GET', f'{self.url}{obj.pk}/') for obj in self.objects]
+        responses = await asyncio.gather(*lists, *details)
+
+        for status, _, content in responses[:len(lists)]:
+            self.assertEqual(status, 200)
+            self.assertEqual(len(json.loads(content)), self.rows)
+        for (status, _, content), obj in zip(responses[len(lists):], self.objects):
+            self.assertEqual(status, 200)
+            self.assertEqual(json.loads(content)['id'], obj.pk)
+
+    async def test_paginated_list_reports_total(self):
+        status, headers, content = await asgi_request('GET', self.url, query_string='limit=2&offset=1')
+        self.assertEqual(status, 200)
+        self.assertEqual(len(json.loads(content)), 2)
+        self.assertEqual(headers['x-total-count'], str(self.rows))
+
+    async def test_partial_update(self):
+        obj = self.objects[0]
+        status, _, content = await asgi_request('PATCH', f'{self.url}{obj.pk}/', body={})
+        self.assertEqual(status, 200)
+        self.assertEqual(json.loads(content)['id'], obj.pk)
+
+    async def test_delete(self):
+        obj = self.objects[0]
+        status, _, _ = await asgi_request('DELETE', f'{self.url}{obj.pk}/')
+        self.assertEqual(status, 204)
+        status, _, _ = await asgi_request('GET', f'{self.url}{obj.pk}/')
+        self.assertEqual(status, 404)
+        self.assertFalse(await self.model._default_manager.filter(pk=obj.pk).aexists())
+'''
+    if replica:
+        content += '''
+
+class ReplicaRoutingTestMixin:
+    """
+    Checks the primary/replica routing of `model` mounted at `url`: safe requests read from
+    the replica, writes go to the primary and keep the writer's later reads there. The test
+    replica mirrors the primary, so it is treated as a distinct database only for the routing
+    decisions, no query reaches it. Mix into a TestCase.
+    """
+    model = None
+    url = None
+
+    def setUp(self):
+        super().setUp()
+        self.factory = RequestFactory()
+        self.options = routers.replica_options()
+        distinct = mock.patch.object(routers, 'same_database', return_value=False)
+        distinct.start()
+        self.addCleanup(distinct.stop)
+
+    def route(self, request, write=None):
+        """
+        Pass request through the pinning middleware to a view recording the database of a
+        read of `model`, before and after calling write() when given.
+        Returns (response, databases read).
+        """
+        reads = []
+
+        def view(request):
+            reads.append(router.db_for_read(self.model))
+            if write is not None:
+                write()
+                reads.append(router.db_for_read(self.model))
+            return HttpResponse()
+
+        return routers.ReplicaPinningMiddleware(view)(request), reads
+
+    def test_safe_request_reads_from_replica(self):
+        _, reads = self.route(self.factory.get(self.url))
+        self.assertEqual(reads, [self.options['ALIAS']])
+
+    def test_unsafe_request_reads_from_primary(self):
+        _, reads = self.route(self.factory.post(self.url))
+        self.assertEqual(reads, ['default'])
+
+    def test_write_pins_request_and_client_to_primary(self):
+        response, reads = self.route(self.factory.get(self.url), write=lambda: make_instance(self.model))
+        self.assertEqual(reads, [self.options['ALIAS'], 'default'])
+        cookie = response.cookies[self.options['COOKIE']]
+        _, reads = self.route(self.factory.get(self.url, HTTP_COOKIE=f'{cookie.key}={cookie.value}'))
+        self.assertEqual(reads, ['default'])
+
+    def test_writes_and_migrations_use_primary(self):
+        self.assertEqual(router.db_for_write(self.model), 'default')
+        self.assertFalse(router.allow_migrate(self.options['ALIAS'], self.model._meta.app_label))
+
+    def test_endpoint_write_sets_pin_cookie(self):
+        obj = make_instance(self.model)
+        response = self.client.delete(f'{self.url}{obj.pk}/')
+        self.assertEqual(response.status_code, 204)
+        self.assertIn(self.options['COOKIE'], response.cookies)
+'''
+    content += '''
+
+class ThumbnailTestMixin:
+    """
+    Checks the variants of `image_field` of `model`: saving an upload renders them in the
+    background once committed, within their bounding boxes, and the list endpoint at `url`
+    (when set) links to the thumbnail. Mix into a TestCase.
+    """
+    model = None
+    image_field = None
+    url = None
+
+    def setUp(self):
+        super().setUp()
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        media_settings = self.settings(MEDIA_ROOT=media_root.name)
+        media_settings.enable()
+        self.addCleanup(media_settings.disable)
+
+    def upload(self, size=(800, 400)):
+        from PIL import Image
+
+        buffer = io.BytesIO()
+        Image.new('RGB', size, 'teal').save(buffer, format='PNG')
+        obj = make_instance(self.model)
+        with self.captureOnCommitCallbacks(execute=True):
+            getattr(obj, self.image_field).save('upload.png', ContentFile(buffer.getvalue()))
+        wait_for_thumbnails()
+        return obj, getattr(obj, self.image_field)
+
+    def test_variants_rendered_within_bounds(self):
+        from PIL import Image
+
+        _, image = self.upload()
+        for variant, (width, height) in VARIANTS.items():
+            with image.storage.open(variant_name(image.name, variant)) as variant_file, Image.open(variant_file) as rendered:
+                self.assertLessEqual(rendered.width, width)
+                self.assertLessEqual(rendered.height, height)
+                self.assertEqual(rendered.width / rendered.height, 2)
+        self.assertEqual(thumbnail_url(image), image.storage.url(variant_name(image.name, 'thumbnail')))
+
+    def test_url_derived_without_storage_lookups(self):
+        obj = make_instance(self.model)
+        image = getattr(obj, self.image_field)
+        image.name = 'missing.png'
+        with mock.patch.object(image.storage, 'exists') as exists:
+            self.assertEqual(thumbnail_url(image), image.storage.url('missing.thumbnail.png'))
+            self.assertIn(image.storage.url('missing.png'), thumbnail_tag(image))
+        exists.assert_not_called()
+
+    def test_endpoint_links_thumbnail(self):
+        if self.url is None:
+            self.skipTest('No endpoint')
+        obj, image = self.upload()
+        response = self.client.get(f'{self.url}{obj.pk}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()[f'{self.image_field}_thumbnail'].endswith(variant_name(image.name, 'thumbnail')))
+'''
+    if timestamps:
+        content += '''
+
+class ConditionalGetTestMixin:
+    """
+    Checks the conditional GETs of `model` mounted at `url`: list and retrieve responses
+    carry validators, and requests revalidating them get 304 Not Modified, without reading
+    the rows, until one is created, saved or deleted. Mix into a TestCase.
+    """
+    model = None
+    url = None
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.rows = [make_instance(self.model) for _ in range(3)]
+
+    def assertNotModified(self, url, response):
+        # One query, the one reading the validators
+        with self.assertNumQueries(1):
+            revalidated = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(revalidated.status_code, 304)
+        self.assertEqual(revalidated.content, b'')
+
+    def assertModified(self, url, response):
+        cache.clear()
+        revalidated = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(revalidated.status_code, 200)
+        self.assertNotEqual(revalidated['ETag'], response['ETag'])
+
+    def test_list_not_modified(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['ETag'].startswith('W/'))
+        self.assertIn('Last-Modified', response)
+        self.assertNotModified(self.url, response)
+
+    def test_list_modified_by_save_create_and_delete(self):
+        for change in (self.rows[0].save, lambda: make_instance(self.model), self.rows[1].delete):
+            response = self.client.get(self.url)
+            change()
+            self.assertModified(self.url, response)
+
+    def test_list_validators_depend_on_query(self):
+        response = self.client.get(self.url)
+        revalidated = self.client.get(self.url, {'fields': 'id'}, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(revalidated.status_code, 200)
+
+    def test_retrieve_not_modified(self):
+        url = f'{self.url}{self.rows[0].pk}/'
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotModified(url, response)
+        revalidated = self.client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(revalidated.status_code, 304)
+
+    def test_retrieve_modified_by_save(self):
+        url = f'{self.url}{self.rows[0].pk}/'
+        response = self.client.get(url)
+        self.rows[0].save()
+        self.assertModified(url, response)
+
+    def test_retrieve_modified_by_many_to_many(self):
+        row = self.rows[0]
+        url = f'{self.url}{row.pk}/'
+        if not self.model._meta.many_to_many:
+            self.skipTest(f'{self.model.__name__} has no many-to-many fields')
+        for field in self.model._meta.many_to_many:
+            related = make_instance(field.related_model)
+            links = getattr(row, field.name)
+            unlink = lambda: links.remove(related)
+            accessor = field.remote_field.get_accessor_name()
+            if accessor and not field.remote_field.is_hidden():
+                # Unlinking from the related row's side
+                unlink = getattr(related, accessor).clear
+            for change in (lambda: links.add(related), unlink):
+                response, listed = self.client.get(url), self.client.get(self.url)
+                change()
+                self.assertModified(url, response)
+                self.assertModified(self.url, listed)
+'''
+    return content
+
+def asyncapi_content(project_name):
+    # Content of the asyncapi.py module with the base classes of the generated async views
+    return f'''
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
+from django.views import View
+
+from {project_name}.listing import build_converters, column_aliases, convert_rows
+from {project_name}.renderers import json_response, loads
+''' + '''
+
+def not_found():
+    return json_response({'detail': 'Not found.'}, status=404)
+
+
+class AsyncModelView(View):
+    """
+    Base of the generated async views. Reads use the async ORM directly; writes validate
+    and save through the generated DRF serializers in a worker thread.
+    """
+    model = None
+    serializer_class = None
+    # {name: expression} annotated on reads, see aggregates.reverse_aggregate
+    aggregates = {}
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        view = super().as_view(**initkwargs)
+        # Token/JWT clients send no CSRF token, same as the DRF viewsets
+        view.csrf_exempt = True
+        return view
+
+    def read_plan(self, serializer_class):
+        """
+        Split the readable serializer fields into values() columns, values() aliases (see
+        listing.column_aliases) and many-to-many fields, with converters producing the
+        serializer's representation.
+        """
+        serializer = serializer_class()
+        columns = {field.name for field in self.model._meta.concrete_fields}
+        many_to_many = {field.name for field in self.model._meta.many_to_many}
+        readable = [name for name, field in serializer.fields.items() if not field.write_only]
+        fields = [name for name in readable if name in columns or name in self.aggregates]
+        many_to_many = [name for name in readable if name in many_to_many]
+        return fields, column_aliases(serializer), many_to_many, build_converters(serializer, self.request)
+
+    def get_queryset(self):
+        return self.model._default_manager.annotate(**self.aggregates)
+
+    def parse_body(self):
+        try:
+            return loads(self.request.body or b'{}')
+        except ValueError:
+            return None
+
+    async def save(self, serializer, status):
+        def write():
+            if not serializer.is_valid():
+                return serializer.errors, 400
+            serializer.save()
+            return serializer.data, status
+
+        data, status = await sync_to_async(write)()
+        return json_response(data, status=status)
+
+
+class AsyncCollectionView(AsyncModelView):
+    list_serializer_class = None
+
+    async def get(self, request):
+        fields, aliases, _, converters = self.read_plan(self.list_serializer_class or self.serializer_class)
+        queryset = self.get_queryset().order_by('pk').values(*fields, **aliases)
+        headers = {}
+        if 'limit' in request.GET:
+            try:
+                limit = max(0, int(request.GET['limit']))
+                offset = max(0, int(request.GET.get('offset', 0)))
+            except ValueError:
+                return json_response({'detail': 'limit and offset must be integers.'}, status=400)
+            headers['X-Total-Count'] = str(await self.model._default_manager.acount())
+            queryset = queryset[offset:offset + limit]
+        rows = [row async for row in queryset]
+        return json_response(convert_rows(rows, converters), headers=headers)
+
+    async def post(self, request):
+        data = self.parse_body()
+        if data is None:
+            return json_response({'detail': 'Invalid JSON.'}, status=400)
+        return await self.save(self.serializer_class(data=data, context={'request': request}), 201)
+
+
+class AsyncItemView(AsyncModelView):
+
+    async def get(self, request, pk):
+        fields, aliases, many_to_many, converters = self.read_plan(self.serializer_class)
+        try:
+            row = await self.get_queryset().values(*fields, **aliases).aget(pk=pk)
+        except self.model.DoesNotExist:
+            return not_found()
+        for name in many_to_many:
+            field = self.model._meta.get_field(name)
+            links = field.remote_field.through.objects.filter(**{field.m2m_field_name(): pk})
+            row[name] = [related async for related in links.values_list(field.m2m_reverse_field_name(), flat=True)]
+        return json_response(convert_rows([row], converters)[0])
+
+    async def put(self, request, pk):
+        return await self.update(request, pk, partial=False)
+
+    async def patch(self, request, pk):
+        return await self.update(request, pk, partial=True)
+
+    async def update(self, request, pk, partial):
+        try:
+            instance = await self.model._default_manager.aget(pk=pk)
+        except self.model.DoesNotExist:
+            return not_found()
+        data = self.parse_body()
+        if data is None:
+            return json_response({'detail': 'Invalid JSON.'}, status=400)
+        serializer = self.serializer_class(instance, data=data, partial=partial, context={'request': request})
+        return await self.save(serializer, 200)
+
+    async def delete(self, request, pk):
+        deleted, _ = await self.model._default_manager.filter(pk=pk).adelete()
+        if not deleted:
+            return not_found()
+        return HttpResponse(status=204)
+'''
+
+def serializer_benchmark_content(project_name, viewsets):
+    # Content of benchmarks/serializers.py, the list of viewsets is fixed at build time
+    viewsets_content = ''.join(f"    '{viewset}',\n" for viewset in viewsets)
+    return f'''"""
+List serialization benchmark for {project_name}.
+
+Measures rows/second of the ModelSerializer (fields = '__all__'), the list serializer
+and the values() fast path for every generated viewset, using the rows already in the
+database. Run from the project root:
+
+    python benchmarks/serializers.py --limit 10000 --repeat 3
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', '{project_name}.settings')
+
+import django
+
+django.setup()
+
+from django.utils.module_loading import import_string
+
+from {project_name}.listing import build_converters, column_aliases, convert_rows
+
+VIEWSETS = [
+{viewsets_content}]
+''' + '''
+
+def best_rate(function, rows, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return rows / best if best else float('inf')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--limit', type=int, default=10000, help='Maximum rows serialized per model.')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per path, the best one is reported.')
+    args = parser.parse_args()
+
+    print(f"{'viewset':<40} {'rows':>8} {'model rows/s':>14} {'list rows/s':>14} {'values rows/s':>14}")
+    for path in VIEWSETS:
+        viewset = import_string(path)
+        # Same annotations as the viewset's read requests
+        queryset = viewset.queryset.annotate(**getattr(viewset, 'aggregates', {}))[:args.limit]
+        rows = queryset.count()
+        if not rows:
+            print(f"{path:<40} {0:>8}  (no rows, seed the database first)")
+            continue
+
+        # No request in the context: file fields render relative URLs on every path
+        context = {}
+        list_serializer_class = viewset.list_serializer_class or viewset.serializer_class
+        list_serializer = list_serializer_class(context=context)
+        aliases = column_aliases(list_serializer)
+        fields = [name for name, field in list_serializer.fields.items() if not field.write_only and name not in aliases]
+        converters = build_converters(list_serializer, None)
+
+        model_rate = best_rate(lambda: viewset.serializer_class(queryset, many=True, context=context).data, rows, args.repeat)
+        list_rate = best_rate(lambda: list_serializer_class(queryset, many=True, context=context).data, rows, args.repeat)
+        values_rate = best_rate(lambda: convert_rows(queryset.values(*fields, **aliases), converters), rows, args.repeat)
+        print(f"{path:<40} {rows:>8} {model_rate:>14,.0f} {list_rate:>14,.0f} {values_rate:>14,.0f}")
+
+
+if __name__ == '__main__':
+    main()
+'''
+
+def renderer_benchmark_content(project_name, viewsets):
+    # Content of benchmarks/renderers.py, the list of viewsets is fixed at build time
+    viewsets_content = ''.join(f"    '{viewset}',\n" for viewset in viewsets)
+    return f'''"""
+JSON rendering benchmark for {project_name}.
+
+Serializes the rows already in the database with the list serializer of every generated
+viewset once, then measures MB/second of rendering that data to JSON and parsing it back with
+DRF's JSONRenderer/JSONParser (json module) and with renderers.FastJSONRenderer/FastJSONParser
+(orjson when installed). Run from the project root:
+
+    python benchmarks/renderers.py --limit 10000 --repeat 5
+"""
+import argparse
+import io
+import json
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', '{project_name}.settings')
+
+import django
+
+django.setup()
+
+from django.utils.module_loading import import_string
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from {project_name}.renderers import FastJSONParser, FastJSONRenderer, orjson
+
+VIEWSETS = [
+{viewsets_content}]
+''' + '''
+
+def best_rate(function, size, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return size / 1024 / 1024 / best if best else float('inf')
+
+
+NUMBER = re.compile(rb'-?[0-9][0-9.eE+-]*')
+
+
+def compare(content, fast):
+    """
+    How the fast renderer's output differs from DRF's: None when the bytes are the same, the
+    number literals written differently when the values are the same (floats in exponent
+    notation), or a mismatch.
+    """
+    if fast == content:
+        return None
+    if json.loads(fast) != json.loads(content):
+        return 'renderers disagree on this data'
+    differences = [
+        (ours.decode(), theirs.decode())
+        for ours, theirs in zip(NUMBER.findall(fast), NUMBER.findall(content)) if ours != theirs
+    ]
+    examples = ', '.join(f'{ours} for {theirs}' for ours, theirs in differences[:3])
+    return f'same values, {len(differences)} floats formatted differently ({examples})'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--limit', type=int, default=10000, help='Maximum rows rendered per model.')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per measure, the best one is reported.')
+    args = parser.parse_args()
+
+    print(f"JSON library: {'orjson ' + orjson.__version__ if orjson else 'json module (orjson is not installed)'}")
+    print(f"{'viewset':<40} {'rows':>8} {'MB':>8} {'render MB/s':>12} {'fast MB/s':>10} {'parse MB/s':>11} {'fast MB/s':>10}")
+    for path in VIEWSETS:
+        viewset = import_string(path)
+        queryset = viewset.queryset.annotate(**getattr(viewset, 'aggregates', {}))[:args.limit]
+        rows = queryset.count()
+        if not rows:
+            print(f"{path:<40} {0:>8}  (no rows, seed the database first)")
+            continue
+        list_serializer_class = viewset.list_serializer_class or viewset.serializer_class
+        data = list_serializer_class(queryset, many=True, context={}).data
+        content = JSONRenderer().render(data)
+        difference = compare(content, FastJSONRenderer().render(data))
+        if difference:
+            print(f"{path:<40} {difference}")
+        size = len(content)
+        rates = [
+            best_rate(lambda: JSONRenderer().render(data), size, args.repeat),
+            best_rate(lambda: FastJSONRenderer().render(data), size, args.repeat),
+            best_rate(lambda: JSONParser().parse(io.BytesIO(content)), size, args.repeat),
+            best_rate(lambda: FastJSONParser().parse(io.BytesIO(content)), size, args.repeat),
+        ]
+        print(f"{path:<40} {rows:>8} {size / 1024 / 1024:>8.2f} {rates[0]:>12,.1f} {rates[1]:>10,.1f} {rates[2]:>11,.1f} {rates[3]:>10,.1f}")
+
+
+if __name__ == '__main__':
+    main()
+'''
+
+def load_test_content(project_name, routes):
+    # Content of benchmarks/loadtest.py, the routes are fixed at build time
+    routes_content = ''.join(f"    {route!r},\n" for route in routes)
+    return f'''"""
+HTTP load generator for {project_name}, standard library only.
+
+Sends requests to a running server from --concurrency keep-alive connections for
+--duration seconds, choosing the operation of each request by the weights of --mix,
+and prints requests/second and latency percentiles per endpoint as JSON:
+
+    python manage.py runserver --noreload &
+    python benchmarks/loadtest.py --url http://127.0.0.1:8000 --concurrency 16 --duration 30 --mix list=5,retrieve=4,update=1
+
+Operations: list, retrieve, update (an empty PATCH), csv and ndjson (exports), and
+async_list and async_retrieve when the project was built with --async. Seed the
+database first (python manage.py seed): retrieve and update need existing rows.
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+import urllib.parse
+
+ROUTES = [
+{routes_content}]
+''' + '''
+# Operation: (method, path template, body). {url} and {async_url} are the route's
+# prefixes, {id} the primary key of an existing row.
+OPERATIONS = {
+    'list': ('GET', '{url}', None),
+    'retrieve': ('GET', '{url}{id}/', None),
+    'update': ('PATCH', '{url}{id}/', b'{}'),
+    'csv': ('GET', '{url}export/csv/', None),
+    'ndjson': ('GET', '{url}export/ndjson/', None),
+    'async_list': ('GET', '{async_url}?limit=100', None),
+    'async_retrieve': ('GET', '{async_url}{id}/', None),
+}
+DEFAULT_MIX = 'list=5,retrieve=4,update=1'
+
+
+class Connection:
+    """
+    A keep-alive HTTP/1.1 connection, reopened whenever the server closes it.
+    """
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.reader = self.writer = None
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except OSError:
+                pass
+        self.reader = self.writer = None
+
+    async def request(self, method, path, body=None):
+        """
+        Send one request and read the whole response. Returns (status, body).
+        """
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        body = body or b''
+        head = (
+            f'{method} {path} HTTP/1.1\\r\\n'
+            f'Host: {self.host}:{self.port}\\r\\n'
+            'Accept: application/json\\r\\n'
+            'Content-Type: application/json\\r\\n'
+            f'Content-Length: {len(body)}\\r\\n'
+            '\\r\\n'
+        )
+        self.writer.write(head.encode('latin-1') + body)
+        await self.writer.drain()
+
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionError('connection closed by the server')
+        status = int(status_line.split()[1])
+        headers = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b'\\r\\n', b'\\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        if 'content-length' in headers:
+            content = await self.reader.readexactly(int(headers['content-length']))
+        elif headers.get('transfer-encoding', '').lower() == 'chunked':
+            chunks = []
+            while True:
+                size = int((await self.reader.readline()).split(b';')[0], 16)
+                if not size:
+                    await self.reader.readline()
+                    break
+                chunks.append(await self.reader.readexactly(size))
+                await self.reader.readline()
+            content = b''.join(chunks)
+        else:
+            # No framing: the body ends with the connection
+            content = await self.reader.read()
+            headers['connection'] = 'close'
+        if headers.get('connection', '').lower() == 'close':
+            await self.close()
+        return status, content
+
+
+def parse_mix(value, async_routes):
+    mix = {}
+    for item in value.split(','):
+        name, _, weight = item.partition('=')
+        name = name.strip()
+        if name not in OPERATIONS:
+            raise SystemExit(f'Unknown operation {name!r}, choose from {", ".join(OPERATIONS)}')
+        if name.startswith('async_') and not async_routes:
+            raise SystemExit(f'{name} needs a project built with --async')
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def percentile(ordered, fraction):
+    # Nearest-rank percentile of an already sorted list
+    if not ordered:
+        return None
+    index = max(0, min(len(ordered) - 1, round(fraction * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+
+async def discover_ids(connection, sample):
+    """
+    Primary keys of up to `sample` existing rows per route, read from the list endpoints.
+    """
+    ids = {}
+    for route in ROUTES:
+        status, content = await connection.request('GET', f"{route['url']}?fields=id")
+        rows = json.loads(content) if status == 200 else []
+        if isinstance(rows, dict):
+            rows = rows.get('results', [])
+        ids[route['name']] = [row['id'] for row in rows[:sample]]
+    return ids
+
+
+def build_plan(mix, ids):
+    """
+    Every (endpoint, method, path template, body, route) the mix can produce, with its weight.
+    Operations needing a row are skipped for routes without rows.
+    """
+    plan = []
+    for operation, weight in mix.items():
+        method, template, body = OPERATIONS[operation]
+        for route in ROUTES:
+            if '{async_url}' in template and not route['async_url']:
+                continue
+            if '{id}' in template and not ids[route['name']]:
+                continue
+            endpoint = f"{method} {template.format(url=route['url'], async_url=route['async_url'], id='{id}')}"
+            plan.append((endpoint, method, template, body, route, weight))
+    return plan
+
+
+async def worker(connection, plan, ids, deadline, results, rng):
+    endpoints = plan
+    weights = [item[-1] for item in plan]
+    while time.perf_counter() < deadline:
+        endpoint, method, template, body, route, _ = rng.choices(endpoints, weights)[0]
+        pk = rng.choice(ids[route['name']]) if '{id}' in template else None
+        path = template.format(url=route['url'], async_url=route['async_url'], id=pk)
+        started = time.perf_counter()
+        try:
+            status, _ = await connection.request(method, path, body)
+        except (OSError, ConnectionError, asyncio.IncompleteReadError, ValueError, IndexError):
+            status = None
+            await connection.close()
+        results.append((endpoint, status, time.perf_counter() - started))
+
+
+def summarize(results, elapsed):
+    endpoints = {}
+    for endpoint, status, latency in results:
+        stats = endpoints.setdefault(endpoint, {'latencies': [], 'statuses': {}, 'errors': 0})
+        stats['latencies'].append(latency)
+        key = str(status) if status is not None else 'connection_error'
+        stats['statuses'][key] = stats['statuses'].get(key, 0) + 1
+        if status is None or status >= 400:
+            stats['errors'] += 1
+
+    report = {}
+    for endpoint in sorted(endpoints):
+        stats = endpoints[endpoint]
+        ordered = sorted(stats['latencies'])
+        report[endpoint] = {
+            'requests': len(ordered),
+            'errors': stats['errors'],
+            'statuses': stats['statuses'],
+            'requests_per_second': round(len(ordered) / elapsed, 2),
+            'latency_ms': {
+                name: round(percentile(ordered, fraction) * 1000, 2)
+                for name, fraction in (('p50', 0.5), ('p90', 0.9), ('p99', 0.99), ('max', 1.0))
+            },
+        }
+    return report
+
+
+async def run(args):
+    target = urllib.parse.urlsplit(args.url)
+    host, port = target.hostname or '127.0.0.1', target.port or 80
+    async_routes = any(route['async_url'] for route in ROUTES)
+    mix = parse_mix(args.mix, async_routes)
+    rng = random.Random(args.seed)
+
+    probe = Connection(host, port)
+    try:
+        ids = await discover_ids(probe, args.sample)
+    except OSError as error:
+        raise SystemExit(f'Cannot reach {args.url}: {error}')
+    await probe.close()
+    plan = build_plan(mix, ids)
+    if not plan:
+        raise SystemExit('Nothing to request: seed the database first (python manage.py seed).')
+
+    results = []
+    connections = [Connection(host, port) for _ in range(args.concurrency)]
+    started = time.perf_counter()
+    deadline = started + args.duration
+    await asyncio.gather(*[
+        worker(connection, plan, ids, deadline, results, random.Random(rng.random()))
+        for connection in connections
+    ])
+    elapsed = time.perf_counter() - started
+    for connection in connections:
+        await connection.close()
+
+    errors = sum(1 for _, status, _ in results if status is None or status >= 400)
+    return {
+        'url': args.url,
+        'concurrency': args.concurrency,
+        'mix': mix,
+        'duration_seconds': round(elapsed, 3),
+        'requests': len(results),
+        'errors': errors,
+        'requests_per_second': round(len(results) / elapsed, 2),
+        'endpoints': summarize(results, elapsed),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default='http://127.0.0.1:8000', help='Base URL of the running server.')
+    parser.add_argument('--concurrency', type=int, default=10, help='Simultaneous connections.')
+    parser.add_argument('--duration', type=float, default=10, help='Seconds to send requests for.')
+    parser.add_argument('--mix', default=DEFAULT_MIX, help='Comma separated operation=weight pairs.')
+    parser.add_argument('--sample', type=int, default=1000, help='Existing rows per route used by retrieve and update.')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed of the request sequence.')
+    parser.add_argument('--output', help='Write the JSON report to this file instead of stdout.')
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    content = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            output_file.write(content + '\\n')
+    else:
+        sys.stdout.write(content + '\\n')
+
+
+if __name__ == '__main__':
+    main()
+'''
+
+def update_venv_and_modules(project_dir):
+    # Determine the OS (Windows or Linux)
+    is_windows = sys.platform.startswith('win')
+
+    # Set up the virtual environment path inside the project
+    venv_dir = os.path.join(project_dir, '.venv')
+
+    # Create the virtual environment
+    if is_windows:
+        subprocess.run(['python', '-m', 'venv', venv_dir], check=True)
+    else:
+        subprocess.run(['python3', '-m', 'venv', venv_dir], check=True)
+
+    # Activate the virtual environment and install Django
+    activate_script = 'activate.bat' if is_windows else 'activate'
+    activate_path = os.path.join(venv_dir, 'Scripts' if is_windows else 'bin', activate_script)
+    command = activate_path if is_windows else "source " + activate_path
+
+    return command
+    
+def gunicorn_conf_content(project_name, async_target=False, profile='dev', cache_backend=None):
+    # Content of gunicorn.conf.py, the application server settings of the project
+    if async_target:
+        server_content = f'''wsgi_app = '{project_name}.asgi:application'
+# One event loop per CPU, async views wait for the database without holding a process
+worker_class = 'uvicorn.workers.UvicornWorker'
+workers = env_int('GUNICORN_WORKERS', CPUS)
+'''
+    else:
+        server_content = f'''wsgi_app = '{project_name}.wsgi:application'
+# Views block on the database: (2 x CPUs) + 1 processes, each serving requests from a few
+# threads so one waiting on I/O does not hold the process
+worker_class = 'gthread'
+workers = env_int('GUNICORN_WORKERS', 2 * CPUS + 1)
+threads = env_int('GUNICORN_THREADS', 4)
+'''
+    bind = '0.0.0.0:8000' if profile == 'production' else '127.0.0.1:8000'
+    return f'''"""
+Gunicorn settings of {project_name}, sized from the CPUs the server may run on when it
+starts. Every value can be overridden from the environment (GUNICORN_WORKERS, ...) or on
+the command line:
+
+    gunicorn --config gunicorn.conf.py
+"""
+import os
+
+
+def env_int(name, default):
+    return int(os.environ.get(name, default))
+
+
+# CPUs this process may run on, which can be fewer than the machine's in a container
+CPUS = len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else os.cpu_count() or 1
+
+bind = os.environ.get('GUNICORN_BIND', '{bind}')
+{server_content}''' + '''# Django and the apps are imported once in the master, workers share those pages after the fork
+preload_app = True
+# Connections kept open between the requests of a client (or a proxy)
+keepalive = env_int('GUNICORN_KEEPALIVE', 5)
+# Workers are replaced after this many requests, spread by the jitter, bounding slow leaks
+max_requests = env_int('GUNICORN_MAX_REQUESTS', 1000)
+max_requests_jitter = env_int('GUNICORN_MAX_REQUESTS_JITTER', 100)
+timeout = env_int('GUNICORN_TIMEOUT', 30)
+graceful_timeout = env_int('GUNICORN_GRACEFUL_TIMEOUT', 30)
+# Worker heartbeats go to memory, a disk-backed /tmp can stall them
+worker_tmp_dir = '/dev/shm' if os.path.isdir('/dev/shm') else None
+# Access logs cost throughput, GUNICORN_ACCESSLOG=- writes them to stdout
+accesslog = os.environ.get('GUNICORN_ACCESSLOG')
+errorlog = '-'
+
+
+def post_fork(server, worker):
+    # Database connections opened while preloading belong to the master, never share them
+    from django.db import connections
+    connections.close_all()
+''' + ('''
+
+def on_starting(server):
+    # Responses are cached in local memory (--cache locmem): a change invalidates the cache of
+    # the worker saving it only, the other workers would serve stale responses
+    if server.cfg.workers > 1:
+        raise RuntimeError(
+            f'{server.cfg.workers} workers cannot share the local-memory response cache, '
+            'start one (GUNICORN_WORKERS=1) or rebuild the project with --cache file or --cache redis'
+        )
+''' if cache_backend == 'locmem' else '')
+
+def start_script_content(project_name, profile='dev'):
+    # Content of start.sh, serving the project with gunicorn
+    production_content = 'python manage.py collectstatic --noinput\n' if profile == 'production' else ''
+    return f'''#!/bin/sh
+# Serve {project_name} with gunicorn, configured by gunicorn.conf.py. Arguments are passed to
+# gunicorn, for example: ./start.sh --workers 4
+set -e
+cd "$(dirname "$0")"
+python manage.py migrate --noinput
+{production_content}exec gunicorn --config gunicorn.conf.py "$@"
+'''
+
+def server_benchmark_content(project_name, async_target=False):
+    # Content of benchmarks/server.py, the application server benchmark of the project
+    threads_content = (
+        "# Uvicorn workers have no request threads\nDEFAULT_THREADS = 'auto'\n" if async_target else "DEFAULT_THREADS = 'auto,1'\n"
+    )
+    return f'''"""
+Application server benchmark of {project_name}.
+
+Starts gunicorn with gunicorn.conf.py on a free local port once per worker and thread
+setting, sends requests to it with benchmarks/loadtest.py and prints the throughput of
+each setting as JSON. "auto" keeps the value gunicorn.conf.py derives from the CPUs.
+Seed the database first, retrieve and update need existing rows:
+
+    python manage.py seed
+    python benchmarks/server.py --workers 1,2,auto --threads auto,1 --duration 10
+"""
+import argparse
+import asyncio
+import json
+import os
+import runpy
+import socket
+import subprocess
+import sys
+import time
+
+import loadtest
+
+PROJECT_FOLDER = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_WORKERS = '1,2,auto'
+{threads_content}''' + '''
+
+def free_port():
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        return probe.getsockname()[1]
+
+
+def wait_until_listening(process, port, timeout):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        if process.poll() is not None:
+            raise SystemExit(f'gunicorn exited with status {process.returncode}')
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=1):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise SystemExit(f'gunicorn did not listen on port {port} within {timeout} seconds')
+
+
+def configured(name, value):
+    # The number of workers or threads a setting stands for, "auto" being gunicorn.conf.py's
+    if value != 'auto':
+        return int(value)
+    return runpy.run_path(os.path.join(PROJECT_FOLDER, 'gunicorn.conf.py')).get(name, 1)
+
+
+def measure(workers, threads, args):
+    port = free_port()
+    environment = {**os.environ, 'GUNICORN_BIND': f'127.0.0.1:{port}'}
+    if workers != 'auto':
+        environment['GUNICORN_WORKERS'] = workers
+    if threads != 'auto':
+        environment['GUNICORN_THREADS'] = threads
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '--config', 'gunicorn.conf.py'],
+        cwd=PROJECT_FOLDER,
+        env=environment,
+        stderr=subprocess.DEVNULL if not args.verbose else None,
+    )
+    try:
+        wait_until_listening(process, port, args.startup_timeout)
+        report = asyncio.run(loadtest.run(argparse.Namespace(
+            url=f'http://127.0.0.1:{port}',
+            concurrency=args.concurrency,
+            duration=args.duration,
+            mix=args.mix,
+            sample=args.sample,
+            seed=0,
+        )))
+    finally:
+        process.terminate()
+        process.wait()
+    return {
+        'workers': configured('workers', workers),
+        'threads': configured('threads', threads),
+        'requests': report['requests'],
+        'errors': report['errors'],
+        'requests_per_second': report['requests_per_second'],
+        'requests_per_second_per_worker': round(report['requests_per_second'] / configured('workers', workers), 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', default=DEFAULT_WORKERS, help='Comma separated worker counts, auto for the configured one.')
+    parser.add_argument('--threads', default=DEFAULT_THREADS, help='Comma separated threads per worker, auto for the configured one.')
+    parser.add_argument('--concurrency', type=int, default=32, help='Simultaneous connections of the load generator.')
+    parser.add_argument('--duration', type=float, default=10, help='Seconds to send requests for, per setting.')
+    parser.add_argument('--mix', default='list=5,retrieve=5', help='Operations of the load generator, see benchmarks/loadtest.py.')
+    parser.add_argument('--sample', type=int, default=1000, help='Existing rows per route used by retrieve and update.')
+    parser.add_argument('--startup-timeout', type=float, default=30, help='Seconds to wait for gunicorn to listen.')
+    parser.add_argument('--verbose', action='store_true', help='Show the gunicorn logs.')
+    args = parser.parse_args()
+
+    report = []
+    for workers in args.workers.split(','):
+        for threads in args.threads.split(','):
+            report.append(measure(workers.strip(), threads.strip(), args))
+            print(json.dumps(report[-1]), file=sys.stderr)
+    print(json.dumps({'cpus': os.cpu_count(), 'concurrency': args.concurrency, 'results': report}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
+'''
+
+def get_requirements(extra_requirements=None):
+    requirements = """
+asgiref
+certifi
+cffi
+charset-normalizer
+coreapi
+coreschema
+cryptography
 defusedxml
 dj-rest-auth
 django
@@ -440,12 +5125,14 @@ django-jazzmin
 djangorestframework
 djangorestframework-simplejwt
 drf-yasg
+gunicorn
 idna
 inflection
 itypes
 Jinja2
 MarkupSafe
 oauthlib
+orjson
 packaging
 Pillow
 pycparser
@@ -459,4 +5146,6 @@ sqlparse
 uritemplate
 urllib3
 """
-
+    for requirement in extra_requirements or []:
+        requirements += f'{requirement}\n'
+    return requirements
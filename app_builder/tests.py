@@ -1,3 +1,617 @@
-from django.test import TestCase
+import contextlib
+import copy
+import hashlib
+import io
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import zipfile
+from unittest import mock
 
-# Create your tests here.
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from .jsonpatch import JsonPatchError, apply_patch
+from .management.commands import utils
+from .management.commands.utils import (
+    ScaffoldCache, SchemaStream, build_openapi_document, compress_zip_entry, file_etag, iter_schema, iter_schema_apps,
+    patch_schema_file, write_openapi_document, zip_project_folder,
+)
+
+# Sizes cutting the documents below inside keys, strings, escapes and numbers
+CHUNK_SIZES = (1, 2, 3, 5, 7, 11, 35)
+
+SCHEMA = {
+    'projectName': 'Shop "\u00e9" \u2028',
+    'version': 12.5,
+    'apps': [
+        {
+            'models': [{'modelName': 'Early', 'fields': []}],
+            'appName': 'Early',
+        },
+        {
+            'appName': 'Catalog',
+            'meta': {'weights': [[1.5e-7, -2e+3, 0.25, 1e16], [10, -0.0, []]], 'note': 'a\nb\t\\ \U0001f600'},
+            'models': [
+                {
+                    'modelName': 'Item',
+                    'fields': [
+                        {'fieldName': 'price', 'fieldType': 'DecimalField', 'attributes': {'max_digits': 12, 'default': 99.99}},
+                        {'fieldName': 'name', 'fieldType': 'CharField', 'attributes': {'max_length': 120, 'null': True}},
+                    ],
+                },
+                {'modelName': 'Empty', 'fields': [], 'ratio': -1.25E-3},
+            ],
+        },
+    ],
+}
+
+
+def walk(stream):
+    # Decode the value at the position member by member, as the schema readers do
+    char = stream.peek()
+    if char == '{':
+        return {key: walk(stream) for key in stream.members()}
+    if char == '[':
+        return [walk(stream) for _ in stream.items()]
+    return stream.value()
+
+
+class SchemaStreamTests(TestCase):
+    def documents(self):
+        # The schema written compactly, indented, and with escapes for every non-ASCII character
+        yield json.dumps(SCHEMA, ensure_ascii=False, separators=(',', ':'))
+        yield json.dumps(SCHEMA, indent=2)
+        yield json.dumps(SCHEMA, ensure_ascii=True).replace('1e+16', '1E16').replace('12.5', '1.25e1')
+
+    def test_values_cut_at_any_chunk_boundary(self):
+        for document in self.documents():
+            for chunk_size in CHUNK_SIZES:
+                with self.subTest(chunk_size=chunk_size, document=document[:40]):
+                    self.assertEqual(walk(SchemaStream(io.StringIO(document), chunk_size)), json.loads(document))
+
+    def test_number_cut_after_point_exponent_or_sign(self):
+        for text, number in (('12.5', 12.5), ('1.5e-7', 1.5e-7), ('-2E+3', -2000.0), ('6e10', 6e10), ('-0.125', -0.125)):
+            document = f'{{"version": {text}, "n": [{text}]}}'
+            for chunk_size in CHUNK_SIZES:
+                with self.subTest(text=text, chunk_size=chunk_size):
+                    self.assertEqual(walk(SchemaStream(io.StringIO(document), chunk_size)), {'version': number, 'n': [number]})
+
+    def test_number_at_end_of_document(self):
+        for chunk_size in CHUNK_SIZES:
+            with self.subTest(chunk_size=chunk_size):
+                self.assertEqual(SchemaStream(io.StringIO('  -31.5e2'), chunk_size).value(), -3150.0)
+
+    def test_incomplete_document(self):
+        for chunk_size in CHUNK_SIZES:
+            with self.subTest(chunk_size=chunk_size):
+                with self.assertRaises(json.JSONDecodeError):
+                    walk(SchemaStream(io.StringIO('{"apps": [{"appName": "A"'), chunk_size))
+
+    def test_data_after_document(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'schema.json')
+            for tail, valid in (('\n  \t\r\n', True), ('}', False), ('\n{"apps": []}', False), ('x', False), (' ' * 40 + ',', False)):
+                with open(path, 'w', encoding='utf-8') as schema_file:
+                    schema_file.write(json.dumps(SCHEMA) + tail)
+                for chunk_size in CHUNK_SIZES:
+                    with self.subTest(tail=tail, chunk_size=chunk_size):
+                        if valid:
+                            self.assertEqual(len(list(iter_schema(path, chunk_size))), 6)
+                        else:
+                            with self.assertRaises(json.JSONDecodeError):
+                                list(iter_schema(path, chunk_size))
+
+    def test_iter_schema_apps(self):
+        expected = [
+            {'appName': app['appName'], 'models': app['models']} for app in SCHEMA['apps']
+        ]
+        for document in self.documents():
+            with tempfile.TemporaryDirectory() as directory:
+                path = os.path.join(directory, 'schema.json')
+                with open(path, 'w', encoding='utf-8') as schema_file:
+                    schema_file.write(document)
+                for chunk_size in CHUNK_SIZES:
+                    with self.subTest(chunk_size=chunk_size, document=document[:40]):
+                        self.assertEqual(list(iter_schema_apps(path, chunk_size)), expected)
+
+
+class JsonPatchTests(TestCase):
+    document = {'projectName': 'Shop', 'apps': [{'appName': 'A', 'models': []}, {'appName': 'B', 'models': []}]}
+
+    def test_add(self):
+        patched = apply_patch(self.document, [
+            {'op': 'add', 'path': '/version', 'value': 2},
+            {'op': 'add', 'path': '/apps/1', 'value': {'appName': 'Between'}},
+            {'op': 'add', 'path': '/apps/-', 'value': {'appName': 'Last'}},
+            {'op': 'add', 'path': '/apps/0/models/-', 'value': {'modelName': 'M'}},
+        ])
+        self.assertEqual(patched['version'], 2)
+        self.assertEqual([app['appName'] for app in patched['apps']], ['A', 'Between', 'B', 'Last'])
+        self.assertEqual(patched['apps'][0]['models'], [{'modelName': 'M'}])
+        # The document itself is left as it was
+        self.assertEqual(len(self.document['apps']), 2)
+
+    def test_remove_and_replace(self):
+        patched = apply_patch(self.document, [
+            {'op': 'remove', 'path': '/apps/0'},
+            {'op': 'replace', 'path': '/apps/0/appName', 'value': 'C'},
+            {'op': 'replace', 'path': '/projectName', 'value': 'Store'},
+        ])
+        self.assertEqual(patched, {'projectName': 'Store', 'apps': [{'appName': 'C', 'models': []}]})
+
+    def test_move_and_copy(self):
+        patched = apply_patch(self.document, [
+            {'op': 'copy', 'from': '/apps/0', 'path': '/apps/-'},
+            {'op': 'move', 'from': '/apps/0', 'path': '/apps/1'},
+            {'op': 'move', 'from': '/projectName', 'path': '/name'},
+        ])
+        self.assertEqual([app['appName'] for app in patched['apps']], ['B', 'A', 'A'])
+        self.assertEqual(patched['name'], 'Shop')
+        self.assertNotIn('projectName', patched)
+        # Copies are not shared
+        patched['apps'][1]['models'].append('x')
+        self.assertEqual(patched['apps'][2]['models'], [])
+
+    def test_test(self):
+        operations = [{'op': 'test', 'path': '/apps/1/appName', 'value': 'B'}, {'op': 'remove', 'path': '/apps/1'}]
+        self.assertEqual(len(apply_patch(self.document, operations)['apps']), 1)
+        with self.assertRaisesRegex(JsonPatchError, 'Test failed at /apps/0/appName'):
+            apply_patch(self.document, [
+                {'op': 'remove', 'path': '/apps/1'},
+                {'op': 'test', 'path': '/apps/0/appName', 'value': 'B'},
+            ])
+        self.assertEqual(len(self.document['apps']), 2)
+
+    def test_test_is_type_strict(self):
+        document = {'flags': [1, True, 1.0, 0, {'nested': [False]}], 'name': 'A'}
+        for path, value in (
+            ('/flags/0', True), ('/flags/0', 1.0), ('/flags/1', 1), ('/flags/2', 1), ('/flags/3', False),
+            ('/flags/4', {'nested': [0]}), ('/flags/4', {'nested': [False], 'other': None}), ('/flags', [1, 1, 1, 0, {'nested': [0]}]),
+        ):
+            with self.subTest(path=path, value=value):
+                with self.assertRaisesRegex(JsonPatchError, 'Test failed'):
+                    apply_patch(document, [{'op': 'test', 'path': path, 'value': value}])
+        self.assertEqual(apply_patch(document, [{'op': 'test', 'path': '', 'value': copy.deepcopy(document)}]), document)
+
+    def test_invalid(self):
+        for operations in (
+            {'op': 'add'},
+            [{'op': 'frobnicate', 'path': '/a'}],
+            [{'op': 'add', 'path': 'apps', 'value': 1}],
+            [{'op': 'replace', 'path': '/projectName'}],
+            [{'op': 'remove', 'path': '/apps/-'}],
+            [{'op': 'remove', 'path': '/apps/01'}],
+            [{'op': 'remove', 'path': '/apps/\u0661'}],
+            [{'op': 'remove', 'path': '/apps/+1'}],
+            [{'op': 'replace', 'path': '/apps/2', 'value': {}}],
+            [{'op': 'remove', 'path': '/missing'}],
+            [{'op': 'move', 'from': '/apps', 'path': '/apps/0'}],
+            [{'op': 'remove', 'path': ''}],
+        ):
+            with self.subTest(operations=operations):
+                with self.assertRaises(JsonPatchError):
+                    apply_patch(self.document, operations)
+
+
+class OpenAPIDocumentTests(SimpleTestCase):
+    def test_written_as_built(self):
+        for timestamps in (False, True):
+            with self.subTest(timestamps=timestamps):
+                document = io.StringIO()
+                write_openapi_document(document, 'Shop', SCHEMA['apps'], timestamps=timestamps)
+                self.assertEqual(json.loads(document.getvalue()), build_openapi_document('Shop', SCHEMA['apps'], timestamps=timestamps))
+
+    def test_timestamps(self):
+        schemas = build_openapi_document('Shop', SCHEMA['apps'], timestamps=True)['components']['schemas']
+        updated_at = {'type': 'string', 'format': 'date-time', 'readOnly': True}
+        self.assertEqual(schemas['Item']['properties']['updated_at'], updated_at)
+        self.assertEqual(schemas['ItemList']['properties']['updated_at'], updated_at)
+        schemas = build_openapi_document('Shop', SCHEMA['apps'])['components']['schemas']
+        self.assertNotIn('updated_at', schemas['Item']['properties'])
+
+
+class SchemaFileTestCase(TestCase):
+    schema = {
+        'projectName': 'Shop',
+        'apps': [
+            {'appName': 'Catalog', 'models': [{'modelName': 'Product', 'fields': [{'fieldName': 'price', 'fieldType': 'FloatField', 'attributes': {'default': 1.5}}]}]},
+            {'appName': 'Sales', 'models': [{'modelName': 'Order', 'fields': []}]},
+            {'appName': 'Reports', 'models': []},
+        ],
+    }
+
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def write_schema(self, name='shop_schema.json'):
+        path = os.path.join(self.directory, name)
+        with open(path, 'w', encoding='utf-8') as schema_file:
+            json.dump(self.schema, schema_file, indent=4)
+        return path
+
+    def read_schema(self, path):
+        with open(path, 'r', encoding='utf-8') as schema_file:
+            return json.load(schema_file)
+
+
+class PatchSchemaFileTests(SchemaFileTestCase):
+    # Patches within existing apps, applied while streaming the file
+    app_patches = [
+        [{'op': 'replace', 'path': '/apps/1/models/0/modelName', 'value': 'Purchase'}],
+        [{'op': 'add', 'path': '/apps/0/models/0/fields/-', 'value': {'fieldName': 'name', 'fieldType': 'CharField'}},
+         {'op': 'test', 'path': '/apps/0/appName', 'value': 'Catalog'},
+         {'op': 'replace', 'path': '/apps/2', 'value': {'appName': 'Analytics', 'models': []}}],
+        [{'op': 'copy', 'from': '/apps/1/models/0', 'path': '/apps/1/models/-'},
+         {'op': 'move', 'from': '/apps/1/models/0', 'path': '/apps/1/models/1'}],
+    ]
+
+    def test_fast_path_matches_whole_document(self):
+        for operations in self.app_patches:
+            with self.subTest(operations=operations):
+                fast = self.write_schema('fast_schema.json')
+                whole = self.write_schema('whole_schema.json')
+                changed = patch_schema_file(fast, operations)
+                # A test outside the apps sends the same patch through the whole document
+                whole_changed = patch_schema_file(whole, [{'op': 'test', 'path': '/projectName', 'value': 'Shop'}] + operations)
+                self.assertEqual(self.read_schema(fast), self.read_schema(whole))
+                self.assertEqual(self.read_schema(fast), apply_patch(self.schema, operations))
+                self.assertEqual(changed, whole_changed)
+
+    def test_fast_path_copies_other_apps(self):
+        path = self.write_schema()
+        with open(path, 'r', encoding='utf-8') as schema_file:
+            original = schema_file.read()
+        self.assertEqual(patch_schema_file(path, self.app_patches[0]), {'Sales'})
+        with open(path, 'r', encoding='utf-8') as schema_file:
+            patched = schema_file.read()
+        catalog = json.dumps(self.schema['apps'][0], indent=4).replace('\n', '\n        ')
+        self.assertIn(catalog, original)
+        self.assertIn(catalog, patched)
+
+    def test_whole_document_changes(self):
+        path = self.write_schema()
+        self.assertEqual(patch_schema_file(path, [{'op': 'remove', 'path': '/apps/0'}]), {'Catalog'})
+        self.assertEqual([app['appName'] for app in self.read_schema(path)['apps']], ['Sales', 'Reports'])
+        self.assertEqual(patch_schema_file(path, [{'op': 'replace', 'path': '/projectName', 'value': 'Store'}]), {'*'})
+
+    def test_failed_patch_leaves_file(self):
+        path = self.write_schema()
+        for operations in (
+            [{'op': 'replace', 'path': '/apps/0/appName', 'value': 'X'}, {'op': 'test', 'path': '/apps/0/appName', 'value': 'Catalog'}],
+            [{'op': 'replace', 'path': '/apps/5/appName', 'value': 'X'}],
+            [{'op': 'test', 'path': '/projectName', 'value': 'Store'}],
+        ):
+            with self.subTest(operations=operations):
+                with self.assertRaises(JsonPatchError):
+                    patch_schema_file(path, operations)
+                self.assertEqual(self.read_schema(path), self.schema)
+        self.assertEqual(os.listdir(self.directory), ['shop_schema.json'])
+
+
+class SchemaDocumentViewTests(SchemaFileTestCase):
+    def setUp(self):
+        super().setUp()
+        os.makedirs(os.path.join(self.directory, 'schema'))
+        settings = override_settings(BASE_DIR=self.directory)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        response = self.client.post(reverse('save_model_schema'), json.dumps(self.schema), content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.url = response.json()['schemaUrl']
+        self.etag = response['ETag']
+        self.path = os.path.join(self.directory, 'schema', 'shop_schema.json')
+
+    def patch(self, operations, if_match=None):
+        headers = {'If-Match': if_match} if if_match else {}
+        return self.client.patch(self.url, json.dumps(operations), content_type='application/json-patch+json', headers=headers)
+
+    def test_get(self):
+        self.assertEqual(self.url, reverse('schema_document', args=['shop']))
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['ETag'], self.etag)
+        self.assertEqual(json.loads(b''.join(response.streaming_content)), self.schema)
+        response.close()
+
+        response = self.client.get(self.url, headers={'If-None-Match': self.etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], self.etag)
+        self.assertEqual(self.client.get(reverse('schema_document', args=['other'])).status_code, 404)
+
+    def test_patch(self):
+        response = self.patch([{'op': 'replace', 'path': '/apps/2/appName', 'value': 'Analytics'}], if_match=self.etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['ETag'], f'"{file_etag(self.path)}"')
+        self.assertNotEqual(response['ETag'], self.etag)
+        # Never built, every app is rebuilt
+        self.assertEqual(response.json()['dirtyApps'], '*')
+        self.assertEqual(self.read_schema(self.path)['apps'][2]['appName'], 'Analytics')
+
+        response = self.client.get(self.url, headers={'If-None-Match': self.etag})
+        self.assertEqual(response.status_code, 200)
+        response.close()
+
+    def test_patch_needs_if_match(self):
+        response = self.patch([{'op': 'remove', 'path': '/apps/2'}])
+        self.assertEqual(response.status_code, 428)
+        self.assertEqual(self.read_schema(self.path), self.schema)
+
+    def test_patch_of_older_version(self):
+        self.assertEqual(self.patch([{'op': 'remove', 'path': '/apps/2'}], if_match=self.etag).status_code, 200)
+        current = f'"{file_etag(self.path)}"'
+        response = self.patch([{'op': 'remove', 'path': '/apps/1'}], if_match=self.etag)
+        self.assertEqual(response.status_code, 412)
+        self.assertEqual(response['ETag'], current)
+        self.assertEqual(len(self.read_schema(self.path)['apps']), 2)
+
+    def test_save_with_data_after_schema(self):
+        changed = {**self.schema, 'apps': self.schema['apps'][:1]}
+        response = self.client.post(reverse('save_model_schema'), json.dumps(changed) + '\n{}', content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.read_schema(self.path), self.schema)
+        self.assertEqual(os.listdir(os.path.join(self.directory, 'schema')), ['shop_schema.json'])
+
+    def test_save_with_if_match(self):
+        changed = {**self.schema, 'apps': self.schema['apps'][:1]}
+        self.assertEqual(self.patch([{'op': 'remove', 'path': '/apps/2'}], if_match=self.etag).status_code, 200)
+        current = f'"{file_etag(self.path)}"'
+        for if_match in (self.etag, '"other"'):
+            with self.subTest(if_match=if_match):
+                response = self.client.post(reverse('save_model_schema'), json.dumps(changed), content_type='application/json', headers={'If-Match': if_match})
+                self.assertEqual(response.status_code, 412)
+                self.assertEqual(response['ETag'], current)
+                self.assertEqual(len(self.read_schema(self.path)['apps']), 2)
+        for if_match in (current, '*'):
+            with self.subTest(if_match=if_match):
+                response = self.client.post(reverse('save_model_schema'), json.dumps(changed), content_type='application/json', headers={'If-Match': if_match})
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(self.read_schema(self.path), changed)
+                current = response['ETag']
+        # No saved version to match
+        other = {**changed, 'projectName': 'Other'}
+        response = self.client.post(reverse('save_model_schema'), json.dumps(other), content_type='application/json', headers={'If-Match': '*'})
+        self.assertEqual(response.status_code, 412)
+        self.assertFalse(os.path.exists(os.path.join(self.directory, 'schema', 'other_schema.json')))
+        self.assertEqual(sorted(os.listdir(os.path.join(self.directory, 'schema'))), ['shop_schema.json'])
+
+    def test_patch_that_does_not_apply(self):
+        for operations in (
+            [{'op': 'test', 'path': '/apps/0/appName', 'value': 'Sales'}],
+            [{'op': 'remove', 'path': '/apps/9'}],
+            [{'op': 'jump', 'path': '/apps'}],
+        ):
+            with self.subTest(operations=operations):
+                response = self.patch(operations, if_match=self.etag)
+                self.assertEqual(response.status_code, 422)
+                self.assertEqual(self.read_schema(self.path), self.schema)
+
+
+class BuildTestCase(SimpleTestCase):
+    """
+    Builds projects with the buildapp command into a temporary builder folder (BASE_DIR), without
+    creating their virtualenv.
+    """
+    schema = {
+        'projectName': 'BuiltAPI',
+        'apps': [{'appName': 'Catalog', 'models': [
+            {'modelName': 'Tag', 'fields': [{'fieldName': 'label', 'fieldType': 'CharField', 'attributes': {'max_length': '50'}}]},
+            {'modelName': 'Product', 'fields': [
+                {'fieldName': 'name', 'fieldType': 'CharField', 'attributes': {'max_length': '100'}},
+                {'fieldName': 'image', 'fieldType': 'ImageField', 'attributes': {'upload_to': 'products', 'null': 'True', 'blank': 'True'}},
+                {'fieldName': 'tags', 'fieldType': 'ManyToManyField', 'attributes': {'to': 'Tag'}},
+            ]},
+        ]}],
+    }
+
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        os.makedirs(os.path.join(self.directory, 'schema'))
+        with open(os.path.join(self.directory, 'schema', 'built_schema.json'), 'w', encoding='utf-8') as schema_file:
+            json.dump(self.schema, schema_file)
+        # The builder changes directory into the projects it builds
+        self.addCleanup(os.chdir, os.getcwd())
+        os.chdir(self.directory)
+        settings = override_settings(BASE_DIR=self.directory)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        venv = mock.patch('app_builder.management.commands.buildapp.update_venv_and_modules', return_value='true')
+        venv.start()
+        self.addCleanup(venv.stop)
+
+    def build(self, **options):
+        with contextlib.redirect_stdout(io.StringIO()):
+            call_command('buildapp', stdout=io.StringIO(), **options)
+        return os.path.join(self.directory, self.schema['projectName'])
+
+    def run_in_project(self, project_directory, *args):
+        # The project's manage.py picks its own settings
+        env = {name: value for name, value in os.environ.items() if name != 'DJANGO_SETTINGS_MODULE'}
+        result = subprocess.run([sys.executable, *args], cwd=project_directory, env=env, capture_output=True, text=True)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        return result.stdout
+
+
+class ScaffoldCacheBuildTests(BuildTestCase):
+    def test_projects_import_in_every_mode(self):
+        for mode in ('reflink', 'link', 'copy', 'off'):
+            with self.subTest(mode=mode):
+                project_directory = self.build(scaffold_cache=mode)
+                self.assertFalse(os.path.exists(os.path.join(project_directory, 'scaffold_project')))
+                self.run_in_project(project_directory, 'manage.py', 'check')
+                # The modules check leaves out: the app configs are ready, the tests import
+                self.run_in_project(project_directory, '-c', (
+                    "import os, django; os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'BuiltAPI.settings'); "
+                    "django.setup(); import Authentication.tests, Catalog.tests"
+                ))
+                for root, _, file_names in os.walk(project_directory):
+                    for file_name in file_names:
+                        if file_name.endswith('.py'):
+                            with open(os.path.join(root, file_name), encoding='utf-8') as source_file:
+                                self.assertNotIn('scaffold_project', source_file.read(), os.path.join(root, file_name))
+                shutil.rmtree(project_directory)
+
+
+class ScaffoldCacheTests(SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.renders = 0
+
+    def cache(self, mode, version='version'):
+        return ScaffoldCache(os.path.join(self.directory, '.scaffold', version), mode)
+
+    def render_text(self):
+        self.renders += 1
+        return 'shared = True\n'
+
+    def render_folder(self, folder):
+        self.renders += 1
+        os.makedirs(os.path.join(folder, 'scaffold_project'))
+        with open(os.path.join(folder, 'scaffold_project', 'settings.py'), 'w') as settings_file:
+            settings_file.write("ROOT_URLCONF = 'scaffold_project.urls'\n")
+        with open(os.path.join(folder, 'manage.py'), 'w') as manage_file:
+            manage_file.write('import sys\n')
+
+    def read(self, *path):
+        with open(os.path.join(self.directory, *path)) as placed_file:
+            return placed_file.read()
+
+    def test_files_rendered_once(self):
+        cache = self.cache('copy')
+        for project in ('one', 'two'):
+            cache.write_file('shared.py', os.path.join(self.directory, project, 'shared.py'), self.render_text)
+            self.assertEqual(self.read(project, 'shared.py'), 'shared = True\n')
+        self.assertEqual(self.renders, 1)
+        self.assertEqual(cache.placed, {'copy': 2})
+        cached = os.path.join(cache.folder, 'shared.py')
+        self.assertFalse(os.stat(cached).st_mode & 0o222)
+
+    def test_placed_files_do_not_share_the_cache(self):
+        for mode in ('reflink', 'copy'):
+            with self.subTest(mode=mode):
+                cache = self.cache(mode)
+                target = os.path.join(self.directory, mode, 'shared.py')
+                cache.write_file('shared.py', target, self.render_text)
+                cached = os.path.join(cache.folder, 'shared.py')
+                self.assertNotEqual(os.stat(target).st_ino, os.stat(cached).st_ino)
+                self.assertTrue(set(cache.placed) <= {'reflink', 'copy'})
+                # Edited in place, as users do
+                with open(target, 'a') as placed_file:
+                    placed_file.write('edited = True\n')
+                with open(cached) as cached_file:
+                    self.assertEqual(cached_file.read(), 'shared = True\n')
+
+    def test_link_mode_hard_links(self):
+        cache = self.cache('link')
+        target = os.path.join(self.directory, 'project', 'shared.py')
+        cache.write_file('shared.py', target, self.render_text)
+        self.assertTrue(set(cache.placed) <= {'reflink', 'hardlink'})
+        if 'hardlink' in cache.placed:
+            self.assertEqual(os.stat(target).st_ino, os.stat(os.path.join(cache.folder, 'shared.py')).st_ino)
+
+    def test_folder_replacements(self):
+        for mode in ('reflink', 'link', 'copy', 'off'):
+            with self.subTest(mode=mode):
+                cache = self.cache(mode, mode)
+                cache.write_folder('startproject', os.path.join(self.directory, mode), self.render_folder, {'scaffold_project': 'Shop'})
+                self.assertEqual(sorted(os.listdir(os.path.join(self.directory, mode))), ['Shop', 'manage.py'])
+                self.assertEqual(self.read(mode, 'Shop', 'settings.py'), "ROOT_URLCONF = 'Shop.urls'\n")
+                self.assertEqual(self.read(mode, 'manage.py'), 'import sys\n')
+                # Only the file mentioning the project is written rather than placed, but for the uncached files
+                self.assertEqual(cache.placed['rendered'], 2 if mode == 'off' else 1)
+                if mode == 'off':
+                    self.assertFalse(os.path.exists(os.path.join(cache.folder, 'startproject')))
+                    self.assertFalse([name for name in os.listdir(self.directory) if name.startswith('.rendering-')])
+        self.assertEqual(self.renders, 4)
+        # Rendered once per cache folder
+        self.cache('copy', 'copy').write_folder('startproject', os.path.join(self.directory, 'again'), self.render_folder, {'scaffold_project': 'Shop'})
+        self.assertEqual(self.renders, 4)
+
+
+class ZipProjectFolderTests(SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        settings_override = override_settings(BASE_DIR=self.directory)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        files = {
+            'manage.py': b'import sys\n',
+            'Shop/settings.py': b"ROOT_URLCONF = 'Shop.urls'\n",
+            'Shop/__init__.py': b'',
+            'Shop/__pycache__/settings.cpython-311.pyc': b'cached',
+            'Catalog/models.py': b'from django.db import models\n' * 200,
+            'Catalog/stale.pyc': b'cached',
+            'Catalog/fixtures/data.bin': os.urandom(256 << 10),
+            '.venv/bin/python': b'',
+        }
+        for name, content in files.items():
+            path = os.path.join(self.directory, 'ShopAPI', *name.split('/'))
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as project_file:
+                project_file.write(content)
+        os.chmod(os.path.join(self.directory, 'ShopAPI', 'manage.py'), 0o775)
+
+    def zip(self, **options):
+        path = zip_project_folder('ShopAPI', **options)
+        with open(path, 'rb') as zip_file:
+            return zip_file.read()
+
+    def test_same_tree_same_bytes(self):
+        archive = self.zip()
+        # Files touched since, with other permissions on non executable ones
+        for name in ('manage.py', os.path.join('Shop', 'settings.py')):
+            os.utime(os.path.join(self.directory, 'ShopAPI', name), (1e9, 1e9))
+        os.chmod(os.path.join(self.directory, 'ShopAPI', 'Shop', 'settings.py'), 0o600)
+        self.assertEqual(self.zip(), archive)
+        with open(os.path.join(self.directory, 'projects', 'ShopAPI.zip.sha256')) as hash_file:
+            self.assertEqual(hash_file.read(), f'{hashlib.sha256(archive).hexdigest()}  ShopAPI.zip\n')
+
+    def test_entries(self):
+        self.zip()
+        with zipfile.ZipFile(os.path.join(self.directory, 'projects', 'ShopAPI.zip')) as zipf:
+            self.assertIsNone(zipf.testzip())
+            infos = zipf.infolist()
+        self.assertEqual([info.filename for info in infos], [
+            'ShopAPI/Catalog/fixtures/data.bin', 'ShopAPI/Catalog/models.py', 'ShopAPI/Shop/__init__.py',
+            'ShopAPI/Shop/settings.py', 'ShopAPI/manage.py',
+        ])
+        self.assertEqual({info.date_time for info in infos}, {(1980, 1, 1, 0, 0, 0)})
+        self.assertEqual({info.filename: info.external_attr >> 16 for info in infos if info.external_attr >> 16 != 0o100644}, {
+            'ShopAPI/manage.py': 0o100755,
+        })
+
+    @mock.patch.object(utils, 'ZIP_SPOOL_SIZE', 4 << 10)
+    def test_threads_write_the_serial_archive(self):
+        for compression in utils.ZIP_COMPRESSION:
+            with self.subTest(compression=compression):
+                serial = self.zip(compression=compression)
+                self.assertEqual(self.zip(compression=compression, workers=4), serial)
+                self.assertEqual(self.zip(compression=compression, workers=0), serial)
+
+    @mock.patch.object(utils, 'ZIP_SPOOL_SIZE', 4 << 10)
+    def test_large_entries_spooled_to_disk(self):
+        # Entries waiting to be written hold ZIP_SPOOL_SIZE of memory at most
+        path = os.path.join(self.directory, 'ShopAPI', 'Catalog', 'fixtures', 'data.bin')
+        crc, size, data = compress_zip_entry(path, zipfile.ZIP_STORED)
+        with data:
+            self.assertEqual(size, 256 << 10)
+            self.assertTrue(data._rolled)
+        crc, size, data = compress_zip_entry(os.path.join(self.directory, 'ShopAPI', 'manage.py'), zipfile.ZIP_DEFLATED)
+        with data:
+            self.assertFalse(data._rolled)
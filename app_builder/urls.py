@@ -4,4 +4,5 @@ urlpatterns = [
     path('', views.index, name="index"),
     path('schema', views.model_schema_view, name="schema"),
     path('save-schema/', views.save_model_schema, name='save_model_schema'),
+    path('schema/<slug:project_slug>/', views.schema_document, name='schema_document'),
 ]
@@ -7,9 +7,17 @@ from django.apps import apps
 from django.views.decorators.csrf import csrf_exempt
 import json
 import os
-from django.http import JsonResponse
+import tempfile
+import threading
+from django.http import FileResponse, HttpResponseNotModified, JsonResponse
+from django.urls import reverse
 from django.utils.text import slugify
 from django.conf import settings
+from .jsonpatch import JsonPatchError
+from .management.commands.utils import file_etag, iter_schema, patch_schema_file, read_dirty_apps, write_dirty_apps
+
+# Saves and patches of a schema file are applied one at a time, each against the version its If-Match names
+schema_lock = threading.Lock()
 
 def index(request):
     return render(request, 'app_builder/index.html')
@@ -17,39 +25,119 @@ def index(request):
 @csrf_exempt
 def save_model_schema(request):
     if request.method == 'POST':
+        upload_path = None
         try:
-            # Load the project schema from the request body
-            project_schema = json.loads(request.body)
-
-            # Extract the project name
-            project_name = project_schema.get('projectName', 'default_project')
-            project_slug = slugify(project_name)
-
             # Ensure the 'schema' directory exists at the project level, next to manage.py
             schema_directory = os.path.join(settings.BASE_DIR, 'schema')
             os.makedirs(schema_directory, exist_ok=True)
 
+            # Stream the request body to disk, a large schema is never held in memory whole
+            with tempfile.NamedTemporaryFile('wb', dir=schema_directory, suffix='.upload', delete=False) as upload:
+                upload_path = upload.name
+                for chunk in iter(lambda: request.read(1 << 16), b''):
+                    upload.write(chunk)
+
+            # Extract the project name, reading the whole schema validates it
+            project_name = 'default_project'
+            for kind, _, value in iter_schema(upload_path):
+                if kind == 'projectName':
+                    project_name = value
+            project_slug = slugify(project_name)
+
             # Construct the file path using the project slug
             file_path = os.path.join(schema_directory, f'{project_slug}_schema.json')
 
-            # Write the project schema to the file
-            with open(file_path, 'w', encoding='utf-8') as file:
-                json.dump(project_schema, file, indent=4)
-
-            # Respond with success
-            return JsonResponse({
+            with schema_lock:
+                # A save with If-Match only replaces the version it names, '*' any saved version
+                if 'If-Match' in request.headers:
+                    etag = file_etag(file_path) if os.path.exists(file_path) else None
+                    if etag is None or request.headers['If-Match'].strip() not in (f'"{etag}"', '*'):
+                        response = JsonResponse({'status': 'error', 'message': 'The schema changed since this version.'}, status=412)
+                        if etag is not None:
+                            response['ETag'] = f'"{etag}"'
+                        return response
+
+                # Move the project schema to the file
+                os.replace(upload_path, file_path)
+                upload_path = None
+                etag = file_etag(file_path)
+
+            # Respond with success, later saves can patch the schema at its URL from this version
+            response = JsonResponse({
                 'status': 'success',
-                'message': 'Project schema saved successfully.'
+                'message': 'Project schema saved successfully.',
+                'schemaUrl': reverse('schema_document', args=[project_slug]),
             })
+            response['ETag'] = f'"{etag}"'
+            return response
 
         except json.JSONDecodeError:
             return JsonResponse({'status': 'error', 'message': 'Invalid JSON format.'}, status=400)
         except Exception as e:
             return JsonResponse({'status': 'error', 'message': str(e)}, status=500)
+        finally:
+            if upload_path and os.path.exists(upload_path):
+                os.remove(upload_path)
 
     else:
         return JsonResponse({'status': 'error', 'message': 'Only POST requests are allowed.'}, status=405)
 
+@csrf_exempt
+def schema_document(request, project_slug):
+    """
+    A saved project schema. GET returns it with its ETag, PATCH applies a JSON Patch (RFC 6902)
+    to it when If-Match names its current ETag, and records the apps the patch changed so the
+    next build regenerates only those.
+    """
+    file_path = os.path.join(settings.BASE_DIR, 'schema', f'{project_slug}_schema.json')
+    if not os.path.exists(file_path):
+        return JsonResponse({'status': 'error', 'message': 'No schema saved for this project.'}, status=404)
+
+    if request.method in ('GET', 'HEAD'):
+        etag = f'"{file_etag(file_path)}"'
+        if etag in request.headers.get('If-None-Match', ''):
+            response = HttpResponseNotModified()
+        else:
+            response = FileResponse(open(file_path, 'rb'), content_type='application/json')
+        response['ETag'] = etag
+        return response
+
+    if request.method != 'PATCH':
+        return JsonResponse({'status': 'error', 'message': 'Only GET and PATCH requests are allowed.'}, status=405)
+    if 'If-Match' not in request.headers:
+        return JsonResponse({'status': 'error', 'message': 'A PATCH needs the If-Match of the schema it applies to.'}, status=428)
+    try:
+        operations = json.loads(request.body)
+    except json.JSONDecodeError:
+        return JsonResponse({'status': 'error', 'message': 'Invalid JSON format.'}, status=400)
+
+    with schema_lock:
+        etag = file_etag(file_path)
+        if request.headers['If-Match'].strip() not in (f'"{etag}"', '*'):
+            response = JsonResponse({'status': 'error', 'message': 'The schema changed since this version.'}, status=412)
+            response['ETag'] = f'"{etag}"'
+            return response
+        dirty_apps = read_dirty_apps(file_path, etag)
+        try:
+            changed_apps = patch_schema_file(file_path, operations)
+        except JsonPatchError as e:
+            return JsonResponse({'status': 'error', 'message': str(e)}, status=422)
+        except json.JSONDecodeError:
+            return JsonResponse({'status': 'error', 'message': 'The saved schema is not valid JSON.'}, status=500)
+        # Apps dirty before the patch stay dirty, unknown stays unknown: every app is rebuilt
+        if dirty_apps is not None and '*' not in changed_apps:
+            dirty_apps |= changed_apps - {None}
+            write_dirty_apps(file_path, dirty_apps)
+        else:
+            dirty_apps = None
+        response = JsonResponse({
+            'status': 'success',
+            'message': 'Project schema patched successfully.',
+            'dirtyApps': sorted(dirty_apps) if dirty_apps is not None else '*',
+        })
+        response['ETag'] = f'"{file_etag(file_path)}"'
+        return response
+
 def get_all_models():
     all_models = apps.get_models()
     return [model._meta.object_name for model in all_models]
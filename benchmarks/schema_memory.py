@@ -0,0 +1,135 @@
+"""
+Schema ingestion memory benchmark.
+
+Writes a synthetic schema file of --size-mb megabytes, then reads it in a fresh process per
+reader and reports the peak resident set size (RSS) and time of each:
+
+    load     json.load of the whole file, as buildapp did before streaming
+    stream   utils.iter_schema, one model decoded at a time
+    apps     utils.SchemaApps, one app at a time, the way the buildapp generators get them
+    openapi  utils.write_openapi_document, the largest project-wide output, written model by model
+
+Run from the builder root:
+
+    python benchmarks/schema_memory.py --size-mb 200
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'Builder.settings')
+
+READERS = ('load', 'stream', 'apps', 'openapi')
+FIELD_TYPES = [
+    ('CharField', {'max_length': '120'}),
+    ('TextField', {'null': 'True'}),
+    ('IntegerField', {}),
+    ('DecimalField', {'max_digits': '10', 'decimal_places': '2'}),
+    ('BooleanField', {}),
+    ('DateTimeField', {'null': 'True'}),
+]
+
+
+def write_schema(path, size_mb, apps, fields):
+    # Models are written one by one until the file reaches the requested size
+    target = size_mb * 1024 * 1024
+    models = 0
+    with open(path, 'w', encoding='utf-8') as schema_file:
+        schema_file.write('{"projectName": "MemoryBench", "apps": [')
+        app = 0
+        while schema_file.tell() < target or app < apps:
+            schema_file.write(('' if app == 0 else ', ') + f'{{"appName": "App{app}", "models": [')
+            for index in range(max(1, target // apps // (fields * 90))):
+                model = {
+                    'modelName': f'Model{models}',
+                    'fields': [
+                        {'fieldName': f'field_{number}', 'fieldType': FIELD_TYPES[number % len(FIELD_TYPES)][0],
+                         'attributes': FIELD_TYPES[number % len(FIELD_TYPES)][1]}
+                        for number in range(fields)
+                    ],
+                }
+                if index:
+                    model['fields'].append({'fieldName': 'previous', 'fieldType': 'ForeignKey',
+                                            'attributes': {'to': f'Model{models - 1}', 'on_delete': 'models.CASCADE'}})
+                schema_file.write(('' if index == 0 else ', ') + json.dumps(model))
+                models += 1
+            schema_file.write(']}')
+            app += 1
+        schema_file.write(']}')
+    return models
+
+
+def peak_rss_mb():
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+
+
+def run_reader(reader, path):
+    import django
+
+    django.setup()
+    from app_builder.management.commands.utils import SchemaApps, iter_schema, write_openapi_document
+
+    baseline = peak_rss_mb()
+    start = time.perf_counter()
+    models = 0
+    if reader == 'load':
+        with open(path, 'r', encoding='utf-8') as schema_file:
+            schema = json.load(schema_file)
+        models = sum(len(app.get('models', [])) for app in schema.get('apps', []))
+    elif reader == 'stream':
+        models = sum(1 for kind, _, _ in iter_schema(path) if kind == 'model')
+    elif reader == 'apps':
+        models = sum(len(app['models']) for app in SchemaApps(path))
+    elif reader == 'openapi':
+        with open(os.devnull, 'w') as openapi_file:
+            write_openapi_document(openapi_file, 'MemoryBench', SchemaApps(path))
+        models = sum(1 for kind, _, _ in iter_schema(path) if kind == 'model')
+    print(json.dumps({
+        'reader': reader,
+        'models': models,
+        'seconds': round(time.perf_counter() - start, 2),
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+        'baseline_rss_mb': round(baseline, 1),
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--size-mb', type=int, default=200, help='Size of the generated schema file.')
+    parser.add_argument('--apps', type=int, default=20, help='Apps the models are spread over.')
+    parser.add_argument('--fields', type=int, default=24, help='Fields per model.')
+    parser.add_argument('--readers', default=','.join(READERS), help='Comma separated readers to measure.')
+    parser.add_argument('--schema', help='Measure an existing schema file instead of generating one.')
+    parser.add_argument('--reader', choices=READERS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.reader:
+        run_reader(args.reader, args.schema)
+        return
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = args.schema
+        if path is None:
+            path = os.path.join(directory, 'memorybench_schema.json')
+            models = write_schema(path, args.size_mb, args.apps, args.fields)
+            print(f'Generated {os.path.getsize(path) / 1024 / 1024:.0f} MB schema with {models} models', file=sys.stderr)
+        report = []
+        for reader in args.readers.split(','):
+            # A fresh process per reader, peak RSS only ever grows within a process
+            result = subprocess.run([sys.executable, __file__, '--reader', reader, '--schema', path],
+                                    capture_output=True, text=True, check=True)
+            report.append(json.loads(result.stdout.strip().splitlines()[-1]))
+            print(json.dumps(report[-1]), file=sys.stderr)
+        print(json.dumps({'schema_mb': round(os.path.getsize(path) / 1024 / 1024, 1), 'readers': report}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+"""
+Project archive compression benchmark.
+
+Writes a synthetic project folder (Python sources, static CSS/JS assets and incompressible
+media files), then zips it with utils.zip_project_folder for each compression and number of
+compressing threads, and reports the best wall time of --repeat runs, the archive size and the
+speedup over one thread. The archive hash is checked to be the same for every thread count.
+
+Run from the builder root:
+
+    python benchmarks/zip_compression.py --workers 1,2,4,8 --compressions deflate,bzip2,lzma
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'Builder.settings')
+
+SOURCE = '''from django.db import models
+
+
+class Model{number}(models.Model):
+    name = models.CharField(max_length=120)
+    description = models.TextField(null=True, blank=True)
+    price = models.DecimalField(max_digits=10, decimal_places=2)
+    created = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f'{{self.name}} ({number})'
+'''
+
+
+def write_project(folder, sources, assets, asset_kb, media, media_mb):
+    # Text compresses well and media not at all, like the static and media folders of a project
+    generator = random.Random(0)
+    words = ['margin', 'padding', 'color', 'display', 'function', 'return', 'const', 'border', 'flex', 'none']
+    for number in range(sources):
+        path = os.path.join(folder, f'app{number % 20}', f'module{number}.py')
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as source_file:
+            source_file.write(SOURCE.format(number=number) * 20)
+    os.makedirs(os.path.join(folder, 'static'), exist_ok=True)
+    for number in range(assets):
+        extension = 'css' if number % 2 else 'js'
+        with open(os.path.join(folder, 'static', f'asset{number}.{extension}'), 'w') as asset_file:
+            size = 0
+            while size < asset_kb * 1024:
+                line = ' '.join(generator.choice(words) for _ in range(12)) + ';\n'
+                asset_file.write(line)
+                size += len(line)
+    os.makedirs(os.path.join(folder, 'media'), exist_ok=True)
+    for number in range(media):
+        with open(os.path.join(folder, 'media', f'upload{number}.jpg'), 'wb') as media_file:
+            media_file.write(os.urandom(media_mb * 1024 * 1024))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', default=','.join(str(count) for count in sorted({1, 2, 4, os.cpu_count() or 1})),
+                        help='Comma separated thread counts to measure.')
+    parser.add_argument('--compressions', default='stored,deflate,bzip2,lzma', help='Comma separated compressions to measure.')
+    parser.add_argument('--compresslevel', type=int, help='Compression level, the default level of each compression otherwise.')
+    parser.add_argument('--sources', type=int, default=400, help='Python source files of the project.')
+    parser.add_argument('--assets', type=int, default=40, help='Static CSS/JS files.')
+    parser.add_argument('--asset-kb', type=int, default=256, help='Size of each static file.')
+    parser.add_argument('--media', type=int, default=8, help='Incompressible media files.')
+    parser.add_argument('--media-mb', type=int, default=4, help='Size of each media file.')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per measure, the fastest is reported.')
+    args = parser.parse_args()
+
+    import django
+
+    django.setup()
+    from django.test.utils import override_settings
+    from app_builder.management.commands.utils import file_sha256, zip_project_folder
+
+    with tempfile.TemporaryDirectory() as directory, override_settings(BASE_DIR=directory):
+        write_project(os.path.join(directory, 'ZipBench'), args.sources, args.assets, args.asset_kb, args.media, args.media_mb)
+        project_mb = sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(directory) for name in names) / 1024 / 1024
+        print(f'Project of {project_mb:.0f} MB, {os.cpu_count()} CPUs', file=sys.stderr)
+        report = []
+        for compression in args.compressions.split(','):
+            hashes, single = set(), None
+            for workers in [int(count) for count in args.workers.split(',')]:
+                timings = []
+                for _ in range(args.repeat):
+                    start = time.perf_counter()
+                    zip_file_path = zip_project_folder('ZipBench', compression, args.compresslevel, workers)
+                    timings.append(time.perf_counter() - start)
+                hashes.add(file_sha256(zip_file_path))
+                single = single or min(timings)
+                report.append({
+                    'compression': compression,
+                    'workers': workers,
+                    'seconds': round(min(timings), 3),
+                    'speedup': round(single / min(timings), 2),
+                    'zip_mb': round(os.path.getsize(zip_file_path) / 1024 / 1024, 2),
+                })
+                print(json.dumps(report[-1]), file=sys.stderr)
+            if len(hashes) != 1:
+                raise SystemExit(f'{compression} archives differ between thread counts')
+        print(json.dumps({'project_mb': round(project_mb, 1), 'cpus': os.cpu_count(), 'results': report}, indent=2))
+
+
+if __name__ == '__main__':
+    main()